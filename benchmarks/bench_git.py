@@ -0,0 +1,185 @@
+"""
+Benchmark the git layer of eGit against synthetic repositories
+
+Usage:
+    python benchmarks/bench_git.py --preset medium --output bench_git.json
+    python benchmarks/bench_git.py --preset large --compare bench_git.json
+    python benchmarks/bench_git.py --commits 20000 --files 1000 --tag-every 5
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import fields, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from egit import git  # noqa: E402
+from synthetic_repo import PRESETS, RepoShape, generate_repo  # noqa: E402
+
+def collect_summarize_staged() -> None:
+    """Data collection done by `egit summarize` without arguments"""
+    git.get_staged_changes()
+    git.get_staged_diff()
+    git.get_branch_changes()
+    git.get_branch_diff()
+
+def collect_summarize_commit() -> None:
+    """Data collection done by `egit summarize <commit>`"""
+    git.get_commit_message("HEAD~1")
+    git.get_commit_changes("HEAD~1")
+    git.get_commit_diff("HEAD~1")
+
+def collect_release_notes() -> None:
+    """Data collection done by `egit release-notes` with the default range"""
+    try:
+        from_ref = git.get_last_tag()
+    except Exception:
+        from_ref = git.get_root_commit()
+    git.get_commits_between(from_ref, "HEAD", with_paths=True)
+
+def build_cases(repo: Path) -> Dict[str, Callable[[], Any]]:
+    """Benchmark cases: every public read-only function in egit.git plus end-to-end collection"""
+    staged_diff = git.get_staged_diff()
+    branch_diff = git.get_branch_diff()
+    depth = min(100, git.count_commits("main") - 1)
+    # The blobs symbol extraction reads for the files changed on the branch
+    blob_ids = [blob for file_diff in git.split_diff_by_file(branch_diff)
+                for blob in (file_diff["old_blob"], file_diff["new_blob"]) if blob]
+    return {
+        "get_commit_message": lambda: git.get_commit_message("HEAD~1"),
+        "get_commit_changes": lambda: git.get_commit_changes("HEAD~1"),
+        "get_commit_diff": lambda: git.get_commit_diff("HEAD~1"),
+        "get_staged_changes": git.get_staged_changes,
+        "get_staged_diff": git.get_staged_diff,
+        "get_branch_changes": git.get_branch_changes,
+        "get_branch_diff": git.get_branch_diff,
+        "split_diff_by_file": lambda: git.split_diff_by_file(branch_diff),
+        "get_changes_from_diff": lambda: git.get_changes_from_diff(staged_diff),
+        f"read_blobs[{len(blob_ids)}]": lambda: git.read_blobs(blob_ids),
+        f"iter_commits_with_patches[main~{depth}..main]": lambda: sum(1 for _ in git.iter_commits_with_patches(f"main~{depth}..main")),
+        "count_commits": lambda: git.count_commits("HEAD"),
+        "count_tracked_files": git.count_tracked_files,
+        "get_current_branch": git.get_current_branch,
+        "get_repo_root": git.get_repo_root,
+        "get_last_tag": git.get_last_tag,
+        "get_root_commit": git.get_root_commit,
+        "get_commits_between[root..HEAD]": lambda: git.get_commits_between(git.get_root_commit(), "HEAD"),
+        "get_commits_between[root..HEAD,paths]": lambda: git.get_commits_between(git.get_root_commit(), "HEAD", with_paths=True),
+        "has_uncommitted_changes": git.has_uncommitted_changes,
+        "e2e:summarize": collect_summarize_staged,
+        "e2e:summarize <commit>": collect_summarize_commit,
+        "e2e:release-notes": collect_release_notes,
+    }
+
+def time_case(func: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    """Time a case, returning summary statistics in milliseconds"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "min_ms": min(samples),
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.fmean(samples),
+        "max_ms": max(samples),
+        "samples": len(samples),
+    }
+
+def run_benchmarks(repo: Path, repeat: int, only: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Run all cases inside the repository"""
+    previous_cwd = os.getcwd()
+    os.chdir(repo)
+    try:
+        results = {}
+        for name, func in build_cases(repo).items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            try:
+                results[name] = time_case(func, repeat)
+            except Exception as e:
+                results[name] = {"error": str(e)}
+            print(f"{name:45} {_format_result(results[name])}")
+        return results
+    finally:
+        os.chdir(previous_cwd)
+
+def _format_result(result: Dict[str, Any]) -> str:
+    if "error" in result:
+        return f"ERROR: {result['error']}"
+    return f"median {result['median_ms']:9.2f} ms   min {result['min_ms']:9.2f} ms"
+
+def compare(results: Dict[str, Any], baseline_path: Path, threshold: float) -> int:
+    """Print the change against a baseline run and count regressions"""
+    baseline = json.loads(baseline_path.read_text())["results"]
+    regressions = 0
+    print(f"\nComparison against {baseline_path} (regression threshold {threshold:.0%}):")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before or "error" in before or "error" in result:
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:45} {before['median_ms']:9.2f} -> {result['median_ms']:9.2f} ms  ({ratio:5.2f}x){flag}")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="medium", help="Base repository shape")
+    for field in fields(RepoShape):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=int, default=None, help=f"Override {field.name}")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--only", action="append", help="Only run cases whose name contains this text")
+    parser.add_argument("--repo-dir", type=Path, help="Generate (or reuse) the repository here instead of a temp dir")
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this file")
+    parser.add_argument("--compare", type=Path, help="Compare with a previous JSON result")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    overrides = {f.name: getattr(args, f.name) for f in fields(RepoShape) if getattr(args, f.name) is not None}
+    shape = replace(PRESETS[args.preset], **overrides)
+
+    with tempfile.TemporaryDirectory(prefix="egit-bench-") as tmp:
+        repo = args.repo_dir or Path(tmp) / "repo"
+        if not (repo / ".git").exists():
+            started = time.perf_counter()
+            generate_repo(repo, shape)
+            print(f"Generated {shape.commits} commit repository in {time.perf_counter() - started:.1f}s at {repo}")
+        results = run_benchmarks(repo, args.repeat, args.only)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "preset": args.preset,
+            "shape": shape.to_dict(),
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "git": subprocess.run(["git", "--version"], capture_output=True, text=True).stdout.strip(),
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\nWrote results to {args.output}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+End-to-end throughput benchmark of summaries and release notes against the fake LLM server
+
+Usage:
+    python benchmarks/bench_llm.py --requests 200 --concurrency 16 --ttft 0.3 --tokens-per-sec 40
+    python benchmarks/bench_llm.py --api-base http://127.0.0.1:8911/v1 --output bench_llm.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from egit import fake_llm  # noqa: E402
+
+DIFF = [
+    "diff --git a/egit/client.py b/egit/client.py",
+    "--- a/egit/client.py",
+    "+++ b/egit/client.py",
+    "@@ -10,6 +10,9 @@ def request(url):",
+] + [f"+    retry_{i} = backoff({i})" for i in range(40)]
+
+COMMITS = [{"hash": f"{i:040x}", "message": f"Fix request handling case {i}", "body": []} for i in range(30)]
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run(name: str, func: Callable[[], Any], requests: int, concurrency: int) -> Dict[str, Any]:
+    """Run func requests times with the given concurrency and report latency and throughput"""
+    latencies: List[float] = []
+    errors = 0
+
+    def timed() -> None:
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            func()
+        except Exception:
+            errors += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(requests):
+            executor.submit(timed)
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": requests / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "mean_ms": statistics.fmean(latencies),
+    }
+    print(f"{name:16} {result['throughput_rps']:8.2f} req/s   p50 {result['p50_ms']:8.1f} ms   "
+          f"p95 {result['p95_ms']:8.1f} ms   errors {errors}")
+    return result
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--api-base", help="Use an already running server instead of starting the fake one")
+    parser.add_argument("--model", default="openai/fake-model")
+    parser.add_argument("--ttft", type=float, default=0.1)
+    parser.add_argument("--tokens-per-sec", type=float, default=100.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    server = None
+    api_base = args.api_base
+    if not api_base:
+        server = fake_llm.start_server(fake_llm.FakeLLMConfig(
+            ttft=args.ttft,
+            tokens_per_sec=args.tokens_per_sec,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            max_concurrency=args.max_concurrency,
+        ))
+        api_base = f"{server.url}/v1"
+
+    # Configure egit through the environment so the user's config file is left alone
+    os.environ.update(LLM_PROVIDER="openai", LLM_MODEL=args.model, LLM_API_BASE=api_base, LLM_API_KEY="sk-bench")
+    os.environ.setdefault("EGIT_CACHE_DIR", str(Path(os.environ.get("TMPDIR", "/tmp")) / "egit-bench-cache"))
+    from egit import llm  # noqa: E402
+
+    results = {
+        "summarize": run("summarize", lambda: llm.summarize_changes(["M egit/client.py"], DIFF), args.requests, args.concurrency),
+        "release_notes": run("release_notes", lambda: llm.generate_release_notes(COMMITS, "v1.0.0"), args.requests, args.concurrency),
+    }
+    if server:
+        results["server"] = server.stats.to_dict()
+        server.shutdown()
+
+    if args.output:
+        args.output.write_text(json.dumps({"args": vars(args) | {"output": str(args.output)}, "results": results}, indent=2))
+        print(f"\nWrote results to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
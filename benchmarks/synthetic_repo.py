@@ -0,0 +1,123 @@
+"""
+Synthetic Git repository generator for eGit benchmarks
+"""
+import os
+import random
+import subprocess
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+@dataclass
+class RepoShape:
+    """Shape of a generated repository"""
+    commits: int = 500
+    files: int = 50
+    file_lines: int = 200
+    files_per_commit: int = 3
+    lines_per_file_change: int = 10
+    binary_every: int = 0  # touch a binary file every N commits (0 disables)
+    binary_size: int = 64 * 1024
+    body_lines: int = 2  # lines in each commit message body
+    tag_every: int = 50  # tag every N commits (0 disables)
+    branch_commits: int = 20  # commits on the feature branch on top of main
+    staged_files: int = 5  # files left staged (and modified) in the work tree
+    seed: int = 42
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+PRESETS = {
+    "small": RepoShape(commits=200, files=20, tag_every=20),
+    "medium": RepoShape(),
+    "large": RepoShape(commits=5000, files=500, files_per_commit=5, binary_every=100, tag_every=10),
+    "huge-diffs": RepoShape(commits=200, files=20, file_lines=5000, files_per_commit=10, lines_per_file_change=500),
+    "many-tags": RepoShape(commits=2000, tag_every=1),
+}
+
+def _git(repo: Path, *args: str, **kwargs) -> subprocess.CompletedProcess:
+    env = dict(os.environ, GIT_AUTHOR_NAME="Bench", GIT_AUTHOR_EMAIL="bench@example.com",
+               GIT_COMMITTER_NAME="Bench", GIT_COMMITTER_EMAIL="bench@example.com")
+    return subprocess.run(["git", *args], cwd=repo, env=env, check=True, capture_output=True, **kwargs)
+
+def _blob(data: bytes) -> bytes:
+    return b"data %d\n%s\n" % (len(data), data)
+
+class _History:
+    """Mutable file contents used to emit a fast-import stream"""
+
+    def __init__(self, shape: RepoShape):
+        self.shape = shape
+        self.random = random.Random(shape.seed)
+        self.files: Dict[str, List[str]] = {}
+        for i in range(shape.files):
+            path = f"pkg{i % 10}/module_{i}.py"
+            self.files[path] = [self._line(path, n) for n in range(shape.file_lines)]
+        self.clock = 1_600_000_000
+
+    def _line(self, path: str, n: int) -> str:
+        return f"value_{n} = {self.random.randint(0, 10**9)}  # {path}\n"
+
+    def change(self, count: int) -> Dict[str, bytes]:
+        """Modify some files and return their new contents"""
+        changed = {}
+        for path in self.random.sample(sorted(self.files), min(count, len(self.files))):
+            lines = self.files[path]
+            for _ in range(self.shape.lines_per_file_change):
+                n = self.random.randrange(len(lines))
+                lines[n] = self._line(path, n)
+            changed[path] = "".join(lines).encode()
+        return changed
+
+    def commit(self, ref: str, index: int, changed: Dict[str, bytes], parent_mark: int, mark: int) -> bytes:
+        """Emit one fast-import commit"""
+        self.clock += 60
+        body = "".join(f"Detail line {n} for change {index}\n" for n in range(self.shape.body_lines))
+        message = f"Update {len(changed)} files in change {index}\n\n{body}".encode()
+        out = [
+            f"commit {ref}\n".encode(),
+            f"mark :{mark}\n".encode(),
+            f"committer Bench <bench@example.com> {self.clock} +0000\n".encode(),
+            _blob(message),
+        ]
+        if parent_mark:
+            out.append(f"from :{parent_mark}\n".encode())
+        for path, content in changed.items():
+            out.append(f"M 100644 inline {path}\n".encode())
+            out.append(_blob(content))
+        return b"".join(out)
+
+def generate_repo(path: Path, shape: RepoShape) -> Path:
+    """Create a repository of the given shape at path using git fast-import"""
+    path.mkdir(parents=True, exist_ok=True)
+    _git(path, "init", "-q", "-b", "main")
+    history = _History(shape)
+
+    stream = []
+    mark = 0
+    for i in range(shape.commits):
+        changed = history.change(shape.files_per_commit) if i else {p: "".join(l).encode() for p, l in history.files.items()}
+        if shape.binary_every and i % shape.binary_every == 0:
+            changed[f"assets/blob_{i % 7}.bin"] = history.random.randbytes(shape.binary_size)
+        stream.append(history.commit("refs/heads/main", i, changed, mark, mark + 1))
+        mark += 1
+        if shape.tag_every and i and i % shape.tag_every == 0:
+            stream.append(f"reset refs/tags/v0.{i // shape.tag_every}.0\nfrom :{mark}\n\n".encode())
+
+    main_mark = mark
+    for i in range(shape.branch_commits):
+        parent = main_mark if i == 0 else mark
+        stream.append(history.commit("refs/heads/feature", shape.commits + i, history.change(shape.files_per_commit), parent, mark + 1))
+        mark += 1
+
+    _git(path, "fast-import", "--quiet", input=b"".join(stream))
+    _git(path, "checkout", "-q", "feature" if shape.branch_commits else "main")
+
+    # Leave some staged and unstaged work in the tree for the staged/branch functions
+    for rel_path, content in list(history.change(shape.staged_files).items()):
+        (path / rel_path).write_bytes(content)
+        _git(path, "add", rel_path)
+    for rel_path, content in history.change(1).items():
+        (path / rel_path).write_bytes(content + b"unstaged = True\n")
+
+    return path
@@ -1,7 +1,6 @@
 """
 eGit - A CLI tool for enhanced Git commit messages and tasks using LLMs
 """
-
 __version__ = "0.5.2"
 
 ## Fancy header thing
@@ -19,7 +18,5 @@ eGit - version {__version__}
 """
 
 
-def print_title():
-    print(TITLE.format(__version__=__version__))
-
-print_title()
\ No newline at end of file
+def print_title(file=None):
+    print(TITLE.format(__version__=__version__), file=file)
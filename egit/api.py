@@ -0,0 +1,313 @@
+"""
+Python API: summaries, release notes and backfills as structured results
+
+Embed eGit without going through the CLI:
+
+    from egit.api import Session
+
+    session = Session()
+    result = session.summarize()
+    print(result.summary, result.total_ms, result.cache_hits)
+
+A session keeps its LLM overrides and runs in the calling process, so the
+parsed config, the response cache and the LLM clients are reused between
+calls. Every call is recorded in the history and metrics like the CLI does.
+"""
+import time
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from . import cache
+from . import git
+from . import metrics
+from . import rawdiff
+from .config import get_config
+
+@dataclass
+class Changes:
+    """Changes to summarize: a commit, or the staged and/or current branch changes"""
+    changes: List[str] = field(default_factory=list)
+    diffs: List[str] = field(default_factory=list)
+    commit: Optional[str] = None
+    commit_message: Optional[str] = None
+    staged_changes: Optional[List[str]] = None  # None when staged changes weren't collected
+    branch_changes: Optional[List[str]] = None  # None when branch changes weren't collected
+    git_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(replace(self, diffs=list(self.diffs)))
+
+@dataclass
+class SummaryResult:
+    """A generated summary with its timings, token usage and cache status"""
+    summary: Optional[str]  # None when there were no changes
+    changes: List[str]
+    commit: Optional[str] = None
+    packages: List[str] = field(default_factory=list)
+    model: Optional[str] = None
+    tier: Optional[str] = None
+    fallback_reason: Optional[str] = None
+    git_ms: float = 0.0
+    llm_ms: Optional[float] = None
+    total_ms: float = 0.0
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+@dataclass
+class ReleaseNotesResult:
+    """Generated release notes with their range, timings, token usage and cache status"""
+    notes: Optional[str]  # None when the range has no commits
+    version: str
+    from_ref: str
+    to_ref: str
+    from_root: bool = False  # no previous release tag, the range starts at the root commit
+    commits: int = 0
+    packages: List[str] = field(default_factory=list)
+    new_commits: Optional[int] = None  # incremental drafts only
+    reused_commits: Optional[int] = None
+    model: Optional[str] = None
+    git_ms: float = 0.0
+    llm_ms: Optional[float] = None
+    total_ms: float = 0.0
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+@dataclass
+class BackfillResult:
+    """Counts of a range backfill and the errors of the commits that failed"""
+    rev_range: str
+    summarized: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)  # commit hash to error
+    total_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def _apply_stats(result: Any, stats: Dict[str, Any], started: float) -> None:
+    """Copy the LLM stats and the LLM cache counters of the run into a result"""
+    result.model = stats.get("model")
+    result.llm_ms = stats.get("latency_ms")
+    result.prompt_tokens = stats.get("prompt_tokens")
+    result.completion_tokens = stats.get("completion_tokens")
+    cache_stats = cache.get_stats(cache.LLM_NAMESPACES)
+    result.cache_hits = cache_stats["hits"]
+    result.cache_misses = cache_stats["misses"]
+    result.total_ms = (time.perf_counter() - started) * 1000
+
+def _caching(regenerate: bool):
+    """Skip cached LLM answers for the duration of a call when regenerating"""
+    return cache.refreshing() if regenerate else nullcontext()
+
+class Session:
+    """Runs eGit commands in-process and returns structured results instead of printing"""
+
+    def __init__(self, overrides: Optional[Dict[str, Any]] = None, record: bool = True):
+        """overrides replace LLM settings (e.g. model or temperature); record=False keeps summaries and release notes out of the history"""
+        self.overrides = dict(overrides) if overrides else None
+        self.record = record
+
+    def collect_changes(self, commit: Optional[str] = None, staged: bool = False, branch: bool = False) -> Changes:
+        """Collect a commit's changes, or the staged and/or current branch changes (both when neither is chosen)"""
+        started = time.perf_counter()
+        if commit:
+            result = Changes(
+                changes=git.get_commit_changes(commit),
+                diffs=git.get_commit_diff(commit),
+                commit=commit,
+                commit_message=git.get_commit_message(commit),
+            )
+        else:
+            result = Changes()
+            diffs = []
+            if staged or not branch:
+                result.staged_changes = git.get_staged_changes()
+                if result.staged_changes:
+                    result.changes.extend(result.staged_changes)
+                    diffs.append(git.get_staged_diff())
+            if branch or not staged:
+                result.branch_changes = git.get_branch_changes()
+                if result.branch_changes:
+                    result.changes.extend(result.branch_changes)
+                    diffs.append(git.get_branch_diff())
+            # Raw diffs are joined as bytes and only decoded for the prompt
+            result.diffs = rawdiff.concat(diffs)
+        result.git_ms = (time.perf_counter() - started) * 1000
+        return result
+
+    def summarize(self, changes: Optional[Changes] = None, commit: Optional[str] = None, staged: bool = False,
+                  branch: bool = False, deadline: Optional[float] = None, paths: Optional[List[str]] = None,
+                  package_map: Optional[Path] = None, regenerate: bool = False) -> SummaryResult:
+        """Summarize collected changes, or collect them first from commit/staged/branch
+
+        deadline is the number of seconds to wait for the LLM before falling
+        back to an offline message (default: summary_deadline). With paths or
+        a package map each package is summarized separately, one line each.
+        regenerate asks the LLM again instead of reusing cached answers.
+        """
+        from . import db
+        from . import heuristic
+        from . import packages as packages_module
+
+        started = metrics.start_run()
+        if changes is None:
+            changes = self.collect_changes(commit, staged, branch)
+        result = SummaryResult(summary=None, changes=changes.changes, commit=changes.commit, git_ms=changes.git_ms)
+        if not changes.changes:
+            result.total_ms = (time.perf_counter() - started) * 1000
+            return result
+
+        if deadline is None:
+            deadline = float(get_config().get("summary_deadline") or 0)
+        packages = packages_module.resolve_packages(paths, package_map)
+        stats: Dict[str, Any] = {}
+        if packages:
+            # Each package gets its own smaller prompt, and all of them run at once
+            # Explicit paths scope the run: changes outside them are left out rather than summarized as (other)
+            partitions = packages_module.partition_changes(changes.changes, changes.diffs, packages, keep_other=not paths)
+            if not partitions:
+                result.total_ms = (time.perf_counter() - started) * 1000
+                return result
+            package_stats = {name: {} for name in partitions}
+            with _caching(regenerate):
+                summaries = packages_module.run_concurrently(partitions, lambda name, partition: heuristic.summarize_with_fallback(
+                    partition[0], partition[1], deadline=deadline or None, stats=package_stats[name], overrides=self.overrides
+                ))
+            result.summary = packages_module.combine_summaries(summaries)
+            result.packages = list(partitions)
+            stats = packages_module.combine_stats(list(package_stats.values()))
+        else:
+            with _caching(regenerate):
+                result.summary = heuristic.summarize_with_fallback(
+                    changes.changes, changes.diffs, deadline=deadline or None, stats=stats, overrides=self.overrides
+                )
+        result.tier = stats.get("tier")
+        result.fallback_reason = stats.get("fallback_reason")
+        if self.record:
+            db.record_message(
+                "summarize",
+                result.summary,
+                ref=changes.commit,
+                original_message=changes.commit_message,
+                diff=rawdiff.to_bytes(changes.diffs),
+                **stats
+            )
+            metrics.record_run("summarize", started, git_ms=changes.git_ms, stats=stats)
+        _apply_stats(result, stats, started)
+        return result
+
+    def release_notes(self, version: str, from_ref: Optional[str] = None, to_ref: Optional[str] = None,
+                      incremental: bool = False, paths: Optional[List[str]] = None,
+                      package_map: Optional[Path] = None, regenerate: bool = False) -> ReleaseNotesResult:
+        """Generate release notes for the commits since the previous release (or from_ref)
+
+        incremental reuses the notes of the commits already seen for the same
+        range and only sends the new ones to the LLM; regenerate sends all of
+        them again instead of reusing cached answers.
+        """
+        from . import db
+        from . import llm
+        from . import packages as packages_module
+
+        started = metrics.start_run()
+        if not version.startswith('v'):
+            version = f"v{version}"
+        to_ref = to_ref or "HEAD"
+        result = ReleaseNotesResult(notes=None, version=version, from_ref=from_ref or "", to_ref=to_ref)
+        if not from_ref:
+            try:
+                from_ref = git.get_last_tag(version, to_ref)
+            except Exception:
+                from_ref = git.get_root_commit(to_ref)
+                result.from_root = True
+            result.from_ref = from_ref
+
+        commits = git.get_commits_between(from_ref, to_ref, with_paths=True)
+        result.commits = len(commits)
+        result.git_ms = (time.perf_counter() - started) * 1000
+        if not commits:
+            result.total_ms = result.git_ms
+            return result
+
+        packages = packages_module.resolve_packages(paths, package_map)
+        base = git.run_git_command(["rev-parse", from_ref]) if incremental else None
+
+        def generate(package_commits, package_stats, package=""):
+            if not incremental:
+                return llm.generate_release_notes(package_commits, version, stats=package_stats, overrides=self.overrides)
+            from . import incremental as incremental_notes
+            return incremental_notes.generate_release_notes(
+                package_commits, version, f"{base}:{package}" if package else base,
+                stats=package_stats, overrides=self.overrides
+            )
+
+        stats: Dict[str, Any] = {}
+        if packages:
+            partitions = packages_module.partition_commits(commits, packages, keep_other=not paths)
+            result.commits = len({commit["hash"] for items in partitions.values() for commit in items})
+            if not partitions:
+                result.total_ms = (time.perf_counter() - started) * 1000
+                return result
+            package_stats = {name: {} for name in partitions}
+            with _caching(regenerate):
+                results = packages_module.run_concurrently(
+                    partitions, lambda name, package_commits: generate(package_commits, package_stats[name], name)
+                )
+            result.notes = packages_module.combine_release_notes(results, version)
+            result.packages = list(partitions)
+            stats = packages_module.combine_stats(list(package_stats.values()))
+        else:
+            with _caching(regenerate):
+                result.notes = generate(commits, stats)
+        result.new_commits = stats.get("new_commits")
+        result.reused_commits = stats.get("reused_commits")
+        if self.record:
+            db.record_message(
+                "release_notes",
+                result.notes,
+                ref=f"{from_ref}..{to_ref}",
+                original_message="\n".join(commit["message"] for commit in commits),
+                **stats
+            )
+            metrics.record_run("release_notes", started, git_ms=result.git_ms, stats=stats)
+        _apply_stats(result, stats, started)
+        return result
+
+    def backfill(self, rev_range: str, jobs: int = 4,
+                 on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 regenerate: bool = False) -> BackfillResult:
+        """Summarize every commit in a range into the history, skipping commits already there
+
+        on_result is called from the worker threads with each commit's hash,
+        message, summary and error as it finishes. regenerate asks the LLM
+        again instead of reusing cached answers.
+        """
+        from . import backfill
+
+        started = time.perf_counter()
+        result = BackfillResult(rev_range=rev_range)
+
+        def collect(commit_result: Dict[str, Any]) -> None:
+            if commit_result["error"]:
+                result.errors[commit_result["hash"]] = commit_result["error"]
+            if on_result:
+                on_result(commit_result)
+
+        with _caching(regenerate):
+            counts = backfill.backfill_range(rev_range, jobs=max(jobs, 1), on_result=collect, overrides=self.overrides)
+        result.summarized, result.skipped, result.failed = counts["summarized"], counts["skipped"], counts["failed"]
+        result.total_ms = (time.perf_counter() - started) * 1000
+        return result
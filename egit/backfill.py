@@ -0,0 +1,74 @@
+"""
+Batch summarization of every commit in a range
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from . import db
+from . import git
+from . import llm
+from . import rawdiff
+from .config import get_config
+
+COMMAND_TYPE = "backfill"
+
+def backfill_range(
+    rev_range: str,
+    jobs: int = 4,
+    cwd: Optional[Path] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    overrides: Optional[Dict[str, Any]] = None
+) -> Dict[str, int]:
+    """Summarize every commit in a range with a bounded worker pool, skipping commits already in the history"""
+    model = llm.get_llm_config(overrides)["model"]
+    done = db.get_summarized_commits(COMMAND_TYPE, model)
+    fast_model = get_config().get("llm_fast_model")
+    if fast_model and not (overrides and "model" in overrides):
+        # With the cascade on, most commits were answered by the fast model
+        done |= db.get_summarized_commits(COMMAND_TYPE, fast_model)
+    counts = {"summarized": 0, "skipped": 0, "failed": 0}
+    counts_lock = threading.Lock()
+
+    # Bound the commits in flight so the streaming reader never runs far ahead of the workers
+    slots = threading.BoundedSemaphore(jobs * 2)
+
+    def summarize(commit: Dict[str, Any]) -> None:
+        result = {"hash": commit["hash"], "message": commit["message"], "summary": None, "error": None}
+        try:
+            stats: Dict[str, Any] = {"model": model}
+            summary = llm.summarize_changes(commit["changes"], commit["diff"], stats=stats, overrides=overrides)
+            db.record_message(
+                COMMAND_TYPE,
+                summary,
+                commit_hash=commit["hash"],
+                ref=commit["hash"],
+                original_message=commit["message"],
+                diff=rawdiff.to_bytes(commit["diff"]),
+                **stats
+            )
+            result["summary"] = summary
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            slots.release()
+
+        with counts_lock:
+            counts["failed" if result["error"] else "summarized"] += 1
+        if on_result:
+            on_result(result)
+
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="egit-backfill") as executor:
+        for commit in git.iter_commits_with_patches(rev_range, cwd=cwd):
+            if commit["hash"] in done:
+                counts["skipped"] += 1
+                if on_result:
+                    on_result({"hash": commit["hash"], "message": commit["message"], "summary": None, "error": None, "skipped": True})
+                continue
+            slots.acquire()
+            executor.submit(summarize, commit)
+
+    # Make sure progress is durable before reporting completion
+    db.flush_history()
+    return counts
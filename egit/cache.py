@@ -0,0 +1,253 @@
+"""
+On-disk cache for eGit LLM results
+"""
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from .config import get_cache_dir
+
+# Namespaces holding LLM results; their lookups are the ones reported in the run metrics
+LLM_NAMESPACES = ("responses", "file_summaries", "commit_summaries")
+
+# Lookups per namespace since the process started (or the last reset)
+_counters: Dict[str, Dict[str, int]] = {}
+_counters_lock = threading.Lock()
+
+# Namespaces whose entries aren't read while refreshing, so every answer is asked for again
+REFRESHED_NAMESPACES = LLM_NAMESPACES + ("release_drafts",)
+_refreshing = 0
+_refreshing_lock = threading.Lock()
+
+def make_key(*parts: Any) -> str:
+    """Build a cache key from the given parts (bytes parts, e.g. raw diffs, are hashed as they are)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(part)
+        else:
+            digest.update(str(part).encode("utf-8", errors="replace"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def _entry_path(namespace: str, key: str) -> Path:
+    """Get the file path of a cache entry"""
+    return get_cache_dir() / namespace / key[:2] / f"{key}.json"
+
+def get(namespace: str, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+    """Get a cached value, or None if it is not cached (or older than max_age seconds)"""
+    value = None if _skips(namespace) else _read(_entry_path(namespace, key), max_age)
+    _count(namespace, "misses" if value is None else "hits")
+    return value
+
+def _read(path: Path, max_age: Optional[float] = None) -> Optional[Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        if max_age is not None and time.time() - entry.get("created", 0) > max_age:
+            return None
+        return entry["value"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _skips(namespace: str) -> bool:
+    return _refreshing > 0 and namespace in REFRESHED_NAMESPACES
+
+@contextmanager
+def refreshing() -> Iterator[None]:
+    """Skip cached LLM answers (and incremental drafts) in this process, storing the new ones in their place"""
+    global _refreshing
+    with _refreshing_lock:
+        _refreshing += 1
+    try:
+        yield
+    finally:
+        with _refreshing_lock:
+            _refreshing -= 1
+
+def _count(namespace: str, counter: str) -> None:
+    with _counters_lock:
+        counters = _counters.setdefault(namespace, {"hits": 0, "misses": 0})
+        counters[counter] += 1
+
+def get_stats(namespaces: Optional[Iterable[str]] = LLM_NAMESPACES) -> Dict[str, int]:
+    """Get the number of cache hits and misses in the given namespaces (all of them with None)"""
+    with _counters_lock:
+        selected = [counters for name, counters in _counters.items() if namespaces is None or name in namespaces]
+        return {
+            "hits": sum(counters["hits"] for counters in selected),
+            "misses": sum(counters["misses"] for counters in selected),
+        }
+
+def reset_stats() -> None:
+    """Reset the hit and miss counters"""
+    with _counters_lock:
+        _counters.clear()
+
+def put(namespace: str, key: str, value: Any) -> None:
+    """Store a value in the cache"""
+    path = _entry_path(namespace, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary file first so concurrent readers never see a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"value": value, "created": time.time()}, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def prune(namespace: str, max_age: Optional[float] = None, max_entries: Optional[int] = None) -> int:
+    """Remove the entries of a namespace older than max_age seconds, then the oldest beyond max_entries
+
+    Returns the number of entries removed.
+    """
+    entries = []
+    for path in (get_cache_dir() / namespace).glob("*/*.json"):
+        try:
+            entries.append((path.stat().st_mtime, path))
+        except OSError:
+            pass
+    entries.sort(reverse=True)
+
+    now = time.time()
+    removed = 0
+    for position, (mtime, path) in enumerate(entries):
+        if (max_age is not None and now - mtime > max_age) or (max_entries is not None and position >= max_entries):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+def _prune_now(namespace: str, every: float) -> bool:
+    """Check whether a namespace is due for pruning, at most once every so many seconds across processes"""
+    stamp = get_cache_dir() / namespace / ".pruned"
+    try:
+        if time.time() - stamp.stat().st_mtime < every:
+            return False
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return False
+    try:
+        stamp.touch()
+    except OSError:
+        return False
+    return True
+
+def _lock_is_stale(lock_path: Path, stale_after: float) -> bool:
+    """Check whether a lock was left behind by a crashed or hung process"""
+    try:
+        with open(lock_path, 'r', encoding='utf-8') as f:
+            owner = json.load(f)
+        age = time.time() - lock_path.stat().st_mtime
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError):
+        # Unreadable: either being written right now or garbage; only trust the age
+        try:
+            return time.time() - lock_path.stat().st_mtime > stale_after
+        except OSError:
+            return False
+
+    if age > stale_after:
+        return True
+    if owner.get("host") == socket.gethostname():
+        try:
+            os.kill(int(owner["pid"]), 0)
+        except ProcessLookupError:
+            return True
+        except (OSError, KeyError, ValueError):
+            pass
+    return False
+
+def _try_lock(lock_path: Path) -> bool:
+    """Atomically create the lock file; False if another process holds it"""
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({"pid": os.getpid(), "host": socket.gethostname(), "created": time.time()}, f)
+    return True
+
+def single_flight(namespace: str, key: str, compute: Callable[[], Any], timeout: float = 120.0,
+                  stale_after: float = 600.0, max_age: Optional[float] = None,
+                  max_entries: Optional[int] = None) -> Any:
+    """Get a cached value, computing it at most once across concurrent processes
+
+    The first caller claims the key with a lock file next to the entry and
+    computes the value; others wait for it to appear in the cache. A waiter
+    computes the value itself after timeout seconds or if the owner died.
+    With max_age, values are only shared for that many seconds, and the
+    namespace is pruned of expired entries (and down to max_entries) now
+    and then.
+    """
+    value = get(namespace, key, max_age)
+    if value is not None:
+        return value
+
+    path = _entry_path(namespace, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = path.with_suffix(".lock")
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+
+    def store(value: Any) -> Any:
+        put(namespace, key, value)
+        if (max_age is not None or max_entries is not None) and _prune_now(namespace, max_age or 60.0):
+            prune(namespace, max_age, max_entries)
+        return value
+
+    if _skips(namespace):
+        return store(compute())
+
+    while True:
+        if _try_lock(lock_path):
+            try:
+                # The previous owner may have finished between our cache check and taking the lock
+                value = _read(path, max_age)
+                if value is None:
+                    value = store(compute())
+                return value
+            finally:
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+
+        try:
+            seen = os.stat(lock_path)
+        except FileNotFoundError:
+            continue
+        if _lock_is_stale(lock_path, stale_after):
+            try:
+                # Only break the lock we judged; another waiter may already have replaced it
+                current = os.stat(lock_path)
+                if (current.st_ino, current.st_mtime_ns) == (seen.st_ino, seen.st_mtime_ns):
+                    os.remove(lock_path)
+            except OSError:
+                pass
+            continue
+
+        if time.monotonic() >= deadline:
+            # Don't wait forever on a slow owner; pay for our own request instead
+            return store(compute())
+
+        time.sleep(delay)
+        delay = min(delay * 2, 0.25)
+        value = _read(path, max_age)
+        if value is not None:
+            return value
@@ -1,16 +1,21 @@
 """
 Command-line interface for eGit
 """
+import json
+import os
 import sys
 import typer
 from rich.console import Console
+from rich.table import Table
 from rich import print as rprint
 from typing import Optional, List
+from pathlib import Path
 import subprocess
 
-from . import __version__
+from . import __version__, print_title
 from . import git
 from . import config as config_module
+from . import render
 
 app = typer.Typer(
     help="eGit - Enhanced Git CLI with LLM capabilities",
@@ -18,6 +23,12 @@ app = typer.Typer(
 )
 console = Console()
 
+history_app = typer.Typer(help="Browse and search the history of generated messages")
+app.add_typer(history_app, name="history")
+
+workspace_app = typer.Typer(help="Run egit across many repositories at once")
+app.add_typer(workspace_app, name="workspace")
+
 def version_callback(value: bool):
     """Callback for --version flag"""
     if value:
@@ -37,6 +48,7 @@ def pass_to_git(args: List[str]) -> None:
 
 @app.callback(invoke_without_command=True)
 def common(
+    ctx: typer.Context,
     version: Optional[bool] = typer.Option(
         None,
         "--version",
@@ -44,6 +56,31 @@ def common(
         help="Show eGit version and exit",
         callback=version_callback,
         is_eager=True
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print a per-phase timing breakdown (git, prompt building, LLM, database) when the command finishes"
+    ),
+    profile_trace: Optional[Path] = typer.Option(
+        None,
+        "--profile-trace",
+        help="Also write the timings as Chrome trace JSON to this file (implies --profile)"
+    ),
+    max_lines: Optional[int] = typer.Option(
+        None,
+        "--max-lines",
+        help="Lines of changes and diffs to show before summarizing the rest, 0 for all (default: output_max_lines)"
+    ),
+    pager: bool = typer.Option(
+        True,
+        "--pager/--no-pager",
+        help="Page changes and diffs that don't fit the terminal"
+    ),
+    color: bool = typer.Option(
+        True,
+        "--color/--no-color",
+        help="Color diff lines"
     )
 ):
     """
@@ -51,7 +88,14 @@ def common(
 
     Run 'egit --help' for usage information.
     """
-    pass
+    if not os.environ.get("EGIT_QUIET"):
+        # On stderr, so --json output can be piped as is
+        print_title(file=sys.stderr)
+    render.configure(max_lines=max_lines, pager=pager, color=color)
+    if profile or profile_trace:
+        from . import profiling
+        profiling.enable()
+        ctx.call_on_close(lambda: profiling.finish(console, profile_trace))
 
 @app.command()
 def release_notes(
@@ -80,11 +124,39 @@ def release_notes(
         "--draft",
         "-d",
         help="Show draft release notes without creating a tag"
+    ),
+    incremental: Optional[bool] = typer.Option(
+        None,
+        "--incremental/--full",
+        help="Reuse the notes of the commits already seen for this range and only process new ones (default: on with --draft)"
+    ),
+    paths: Optional[List[str]] = typer.Option(
+        None,
+        "--path",
+        "-p",
+        help="Write separate notes for the commits touching this path (repeatable); combined into one document"
+    ),
+    package_map: Optional[Path] = typer.Option(
+        None,
+        "--package-map",
+        help="JSON file of package name to root path(s); notes are written per package (default: package_map setting)"
+    ),
+    regenerate: bool = typer.Option(
+        False,
+        "--regenerate",
+        "--no-cache",
+        help="Ask the LLM again instead of reusing cached answers or draft notes"
+    ),
+    as_json: bool = typer.Option(
+        False,
+        "--json",
+        help="Print the notes, range, timings, token usage and cache status as JSON"
     )
 ):
     """
     Generate release notes for the specified version
     """
+    out = _status_console(as_json)
     try:
         # Validate version format
         if not version.startswith('v'):
@@ -96,78 +168,77 @@ def release_notes(
             staged_changes = git.get_staged_changes()
             if staged_changes:
                 # Ask user if they want to commit first
-                console.print("[yellow]You have staged changes. Would you like to commit them first?[/yellow]")
-                console.print("Changes to be committed:")
-                for change in staged_changes:
-                    console.print(f"  {change}")
+                out.print("[yellow]You have staged changes. Would you like to commit them first?[/yellow]")
+                out.print("Changes to be committed:")
+                render.print_lines(out, staged_changes)
                 
-                if typer.confirm("Commit these changes?"):
+                if typer.confirm("Commit these changes?", err=as_json):
                     
                     # Generate commit message
                     diffs = git.get_staged_diff()
-                    console.print("\n[yellow]Staged Changes:[/yellow]")
-                    for change in staged_changes:
-                        console.print(f"  {change}")
-                    console.print(f"[yellow]Commit Diff:[/yellow]")
-                    for diff in diffs:
-                        console.print(f"  {diff}")
+                    out.print("\n[yellow]Staged Changes:[/yellow]")
+                    render.print_lines(out, staged_changes)
+                    out.print(f"[yellow]Commit Diff:[/yellow]")
+                    render.print_lines(out, diffs, diff=True)
                     
                     from . import llm
                     commit_msg = llm.summarize_changes(staged_changes, diffs)
                     git.commit(commit_msg)
-                    console.print("[green]Changes committed successfully![/green]")
+                    out.print("[green]Changes committed successfully![/green]")
                 else:
                     raise typer.Exit("Please commit or stash your changes before creating a release.")
             else:
                 raise typer.Exit("Please commit or stash your changes before creating a release.")
         
-        # Get commit range
-        if not from_ref:
-            # Get the last tag as the starting point
-            try:
-                from_ref = git.get_last_tag()
-            except Exception:
-                console.print("[yellow]No previous tags found, using root commit[/yellow]")
-                from_ref = git.get_root_commit()
-        
-        to_ref = to_ref or "HEAD"
-        
-        # Get all commits in the range
-        commits = git.get_commits_between(from_ref, to_ref)
-        if not commits:
-            console.print("[yellow]No commits found in the specified range[/yellow]")
+        from .api import Session
+        result = Session().release_notes(
+            version, from_ref, to_ref,
+            incremental=incremental if incremental is not None else draft,
+            paths=paths, package_map=package_map, regenerate=regenerate
+        )
+        if as_json:
+            typer.echo(json.dumps(result.to_dict(), indent=2))
+        if result.from_root:
+            out.print("[yellow]No previous tags found, using root commit[/yellow]")
+        if not result.commits:
+            out.print("[yellow]No commits found in the specified range[/yellow]")
             raise typer.Exit(1)
-        
-        # Generate release notes
-        from . import llm
-        notes = llm.generate_release_notes(commits, version)
+        if result.packages:
+            out.print(f"[dim]Wrote notes for {len(result.packages)} packages: {', '.join(result.packages)}[/dim]")
+        if result.reused_commits:
+            out.print(f"[dim]Reused {result.reused_commits} commits from the previous draft, "
+                      f"processed {result.new_commits} new[/dim]")
+        notes = result.notes
         
         # Show the release notes
-        console.print("\n[bold]Release Notes:[/bold]")
-        console.print(notes)
+        if not as_json:
+            console.print("\n[bold]Release Notes:[/bold]")
+            render.print_text(console, notes)
         
         # Create tag if requested
         if create_tag and not draft:
             try:
                 # Check for staged changes first
                 git.create_tag(version, notes)
-                console.print(f"\n[green]Created tag {version} with release notes![/green]")
+                out.print(f"\n[green]Created tag {version} with release notes![/green]")
                 
                 # Push the tag
                 try:
                     git.push_tag(version)
-                    console.print(f"[green]Successfully pushed tag {version} to remote![/green]")
+                    out.print(f"[green]Successfully pushed tag {version} to remote![/green]")
                 except Exception as e:
-                    console.print(f"[yellow]Warning: Tag created but failed to push to remote: {str(e)}[/yellow]")
+                    out.print(f"[yellow]Warning: Tag created but failed to push to remote: {str(e)}[/yellow]")
                     
             except Exception as e:
-                console.print(f"[red]Error creating tag:[/red] {str(e)}")
+                out.print(f"[red]Error creating tag:[/red] {str(e)}")
                 raise typer.Exit(1)
         elif draft:
-            console.print("\n[yellow]Draft mode - no tag created[/yellow]")
+            out.print("\n[yellow]Draft mode - no tag created[/yellow]")
             
+    except typer.Exit:
+        raise
     except Exception as e:
-        console.print(f"[red]Error:[/red] {str(e)}")
+        out.print(f"[red]Error:[/red] {str(e)}")
         raise typer.Exit(1)
 
 @app.command()
@@ -193,81 +264,153 @@ def summarize(
         "--commit",
         "-c",
         help="Automatically commit changes with the generated summary"
+    ),
+    rev_range: Optional[str] = typer.Option(
+        None,
+        "--range",
+        "-r",
+        help="Summarize every commit in a range (e.g. v1.0.0..HEAD) and store the results in the history. Resumes where an interrupted run stopped."
+    ),
+    jobs: int = typer.Option(
+        4,
+        "--jobs",
+        "-j",
+        help="Number of concurrent LLM requests for --range"
+    ),
+    deadline: Optional[float] = typer.Option(
+        None,
+        "--deadline",
+        help="Seconds to wait for the LLM before using an offline message built from the changed files (default: summary_deadline)"
+    ),
+    paths: Optional[List[str]] = typer.Option(
+        None,
+        "--path",
+        "-p",
+        help="Summarize the changes under this path separately (repeatable); one line per path"
+    ),
+    package_map: Optional[Path] = typer.Option(
+        None,
+        "--package-map",
+        help="JSON file of package name to root path(s); changes are summarized per package (default: package_map setting)"
+    ),
+    regenerate: bool = typer.Option(
+        False,
+        "--regenerate",
+        "--no-cache",
+        help="Ask the LLM again instead of reusing cached answers"
+    ),
+    as_json: bool = typer.Option(
+        False,
+        "--json",
+        help="Print the summary (or --range counts), timings, token usage and cache status as JSON"
     )
 ):
     """
     Generate a natural language summary of changes in a commit, branch, or staged changes
     """
+    out = _status_console(as_json)
     try:
-        if commit:
-            # Summarize specific commit
-            message = git.get_commit_message(commit)
-            changes = git.get_commit_changes(commit)
-            diffs = git.get_commit_diff(commit)
-            
-            console.print(f"[bold]Commit:[/bold] {commit}")
-            console.print(f"[bold]Message:[/bold] {message}")
-            console.print("\n[bold]Changes:[/bold]")
-            for change in changes:
-                console.print(f"  {change}")
-        else:
-            changes = []
-            diffs = []
-            staged_changes = None
+        from .api import Session
+        session = Session()
+        if rev_range:
+            _backfill(session, rev_range, jobs, out, as_json, regenerate)
+            return
 
-            if auto_commit:
-                console.print("[yellow]Auto-commit is enabled. Staged changes will be committed automatically.[/yellow]")
-                staged = True
+        if auto_commit:
+            out.print("[yellow]Auto-commit is enabled. Staged changes will be committed automatically.[/yellow]")
+            staged = True
 
-                if branch:
-                    staged = False
-            
-            # Get staged changes if requested or if no specific option is chosen
-            if staged or (not staged and not branch):
-                staged_changes = git.get_staged_changes()
-                staged_diffs = git.get_staged_diff()
-                if staged_changes:
-                    console.print("\n[bold cyan]Staged Changes:[/bold cyan]")
-                    for change in staged_changes:
-                        console.print(f"  {change}")
-                    changes.extend(staged_changes)
-                    diffs.extend(staged_diffs)
-                else:
-                    console.print("[yellow]No staged changes found[/yellow]")
-
-            # Get current branch changes if requested or if no specific option is chosen
-            if branch or (not staged and not branch):
-                branch_changes = git.get_branch_changes()
-                branch_diffs = git.get_branch_diff()
-                if branch_changes:
-                    console.print("\n[bold green]Current Branch Changes:[/bold green]")
-                    for change in branch_changes:
-                        console.print(f"  {change}")
-                    changes.extend(branch_changes)
-                    diffs.extend(branch_diffs)
-                else:
-                    console.print("[yellow]No changes in current branch[/yellow]")
-
-        if changes:
-            # Generate and display summary
-            from . import llm
-            summary = llm.summarize_changes(changes, diffs)
-            console.print("\n[bold]Summary:[/bold]")
-            console.print(summary)
+            if branch:
+                staged = False
+
+        changes = session.collect_changes(commit, staged, branch)
+        if not as_json:
+            _print_changes(changes)
+        result = session.summarize(changes, deadline=deadline, paths=paths, package_map=package_map, regenerate=regenerate)
+        if as_json:
+            typer.echo(json.dumps(result.to_dict(), indent=2))
+        if result.summary is None and changes.changes:
+            out.print("[yellow]No changes under the given paths[/yellow]")
+        if result.summary is not None:
+            if result.fallback_reason:
+                out.print(f"[yellow]LLM unavailable ({result.fallback_reason}), using an offline message[/yellow]")
+            if not as_json:
+                console.print("\n[bold]Summary:[/bold]")
+                render.print_text(console, result.summary)
+                if result.tier:
+                    console.print(f"[dim]Answered by {result.model} ({result.tier} tier)[/dim]")
             
             # Auto-commit if requested and there are staged changes
             if auto_commit:
                 try:
-                    if not staged_changes:
+                    if not changes.staged_changes:
                         raise Exception("No changes staged for commit. Stage your changes first with 'git add'")
-                    git.commit(summary)
-                    console.print("\n[green]Changes committed successfully![/green]")
+                    git.commit(result.summary)
+                    out.print("\n[green]Changes committed successfully![/green]")
                 except Exception as e:
-                    console.print(f"\n[red]Error committing changes:[/red] {str(e)}")
+                    out.print(f"\n[red]Error committing changes:[/red] {str(e)}")
                     raise typer.Exit(1)
             
+    except typer.Exit:
+        raise
     except Exception as e:
-        console.print(f"[red]Error:[/red] {str(e)}")
+        out.print(f"[red]Error:[/red] {str(e)}")
+        raise typer.Exit(1)
+
+def _status_console(as_json: bool) -> Console:
+    """Get the console for status messages: stderr when stdout carries --json output"""
+    return Console(stderr=True) if as_json else console
+
+def _print_changes(changes) -> None:
+    """Print the collected changes of a summarize run"""
+    if changes.commit:
+        console.print(f"[bold]Commit:[/bold] {changes.commit}")
+        console.print(f"[bold]Message:[/bold] {changes.commit_message}")
+        console.print("\n[bold]Changes:[/bold]")
+        render.print_lines(console, changes.changes)
+        return
+    if changes.staged_changes is not None:
+        if changes.staged_changes:
+            console.print("\n[bold cyan]Staged Changes:[/bold cyan]")
+            render.print_lines(console, changes.staged_changes)
+        else:
+            console.print("[yellow]No staged changes found[/yellow]")
+    if changes.branch_changes is not None:
+        if changes.branch_changes:
+            console.print("\n[bold green]Current Branch Changes:[/bold green]")
+            render.print_lines(console, changes.branch_changes)
+        else:
+            console.print("[yellow]No changes in current branch[/yellow]")
+
+def _backfill(session, rev_range: str, jobs: int, out: Console, as_json: bool = False, regenerate: bool = False) -> None:
+    """Summarize every commit in a range with a progress display"""
+    from rich.progress import Progress
+
+    total = git.count_commits(rev_range)
+    if not total:
+        out.print("[yellow]No commits found in the specified range[/yellow]")
+        if as_json:
+            from .api import BackfillResult
+            typer.echo(json.dumps(BackfillResult(rev_range=rev_range).to_dict(), indent=2))
+        return
+
+    with Progress(console=out) as progress:
+        task = progress.add_task(f"Summarizing {rev_range}", total=total)
+
+        def on_result(result):
+            if result["error"]:
+                progress.console.print(f"[red]{result['hash'][:10]}[/red] {result['error']}")
+            progress.advance(task)
+
+        result = session.backfill(rev_range, jobs=jobs, on_result=on_result, regenerate=regenerate)
+
+    if as_json:
+        typer.echo(json.dumps(result.to_dict(), indent=2))
+    out.print(
+        f"[green]Summarized {result.summarized} commits[/green], "
+        f"skipped {result.skipped} already in history, {result.failed} failed"
+    )
+    if result.failed:
         raise typer.Exit(1)
 
 @app.command()
@@ -322,6 +465,407 @@ def config(
         console.print(f"[red]Error:[/red] {str(e)}")
         raise typer.Exit(1)
 
+def _print_history(messages) -> None:
+    """Print history rows as a table"""
+    table = Table(show_lines=False)
+    table.add_column("ID", justify="right", style="cyan")
+    table.add_column("Date")
+    table.add_column("Type")
+    table.add_column("Model")
+    table.add_column("Message")
+    for message in messages:
+        first_line = (message.generated_message or "").strip().split("\n", 1)[0]
+        table.add_row(
+            str(message.id),
+            message.created_at.strftime("%Y-%m-%d %H:%M") if message.created_at else "",
+            message.command_type or "",
+            message.model or "",
+            first_line
+        )
+    console.print(table)
+
+@history_app.command("list")
+def history_list(
+    command_type: Optional[str] = typer.Option(
+        None,
+        "--type",
+        help="Only show messages of this type (e.g. summarize, release_notes)"
+    ),
+    limit: int = typer.Option(
+        20,
+        "--limit",
+        "-n",
+        help="Number of messages per page"
+    ),
+    before: Optional[int] = typer.Option(
+        None,
+        "--before",
+        help="Show messages older than this ID (for paging)"
+    )
+):
+    """
+    List generated messages, newest first
+    """
+    try:
+        from . import db
+        messages = db.list_messages(command_type=command_type, limit=limit, before_id=before)
+        if not messages:
+            console.print("[yellow]No messages found[/yellow]")
+            return
+
+        _print_history(messages)
+        if len(messages) == limit:
+            console.print(f"[dim]Next page: egit history list --before {messages[-1].id}[/dim]")
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {str(e)}")
+        raise typer.Exit(1)
+
+@history_app.command("search")
+def history_search(
+    query: str = typer.Argument(
+        ...,
+        help="Words to search for in generated and original messages"
+    ),
+    command_type: Optional[str] = typer.Option(
+        None,
+        "--type",
+        help="Only search messages of this type (e.g. summarize, release_notes)"
+    ),
+    limit: int = typer.Option(
+        20,
+        "--limit",
+        "-n",
+        help="Number of results per page"
+    ),
+    page: int = typer.Option(
+        1,
+        "--page",
+        "-p",
+        help="Page of results to show"
+    )
+):
+    """
+    Full-text search the history of generated messages
+    """
+    try:
+        from . import db
+        messages = db.search_messages(query, command_type=command_type, limit=limit, offset=(max(page, 1) - 1) * limit)
+        if not messages:
+            console.print("[yellow]No matching messages found[/yellow]")
+            return
+
+        _print_history(messages)
+        if len(messages) == limit:
+            console.print(f"[dim]Next page: egit history search \"{query}\" --page {max(page, 1) + 1}[/dim]")
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {str(e)}")
+        raise typer.Exit(1)
+
+@history_app.command("vacuum")
+def history_vacuum(
+    max_age_days: Optional[int] = typer.Option(
+        None,
+        "--max-age-days",
+        help="Drop stored prompts and diffs older than this many days (default: history_max_age_days)"
+    ),
+    max_size_mb: Optional[float] = typer.Option(
+        None,
+        "--max-size-mb",
+        help="Cap the storage used by prompts and diffs (default: history_max_size_mb)"
+    )
+):
+    """
+    Apply the history retention policy and compact the database
+    """
+    try:
+        from . import db
+        current_config = config_module.get_config()
+        if max_age_days is None:
+            max_age_days = int(current_config.get("history_max_age_days", 90))
+        if max_size_mb is None:
+            max_size_mb = float(current_config.get("history_max_size_mb", 500))
+
+        result = db.vacuum_history(max_age_days=max_age_days, max_bytes=int(max_size_mb * 1024 * 1024))
+        console.print(
+            f"[green]Removed {result['removed_blobs']} stored prompts/diffs.[/green] "
+            f"{result['blobs']} remain, using {result['stored_bytes'] / 1024 / 1024:.1f} MB "
+            f"({result['raw_bytes'] / 1024 / 1024:.1f} MB uncompressed)"
+        )
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {str(e)}")
+        raise typer.Exit(1)
+
+@app.command("bench-llm")
+def bench_llm(
+    models: List[str] = typer.Option(
+        ...,
+        "--model",
+        "-m",
+        help="Model to evaluate (repeat to compare several)"
+    ),
+    temperatures: Optional[List[float]] = typer.Option(
+        None,
+        "--temperature",
+        help="Temperature to evaluate (repeat to sweep several)"
+    ),
+    max_tokens: Optional[int] = typer.Option(
+        None,
+        "--max-tokens",
+        help="Override llm_max_tokens for every run"
+    ),
+    fixtures: Optional[Path] = typer.Option(
+        None,
+        "--fixtures",
+        help="Directory of *.diff files and *.json release-note inputs to replay"
+    ),
+    rev_ranges: Optional[List[str]] = typer.Option(
+        None,
+        "--range",
+        "-r",
+        help="Commit range of this repository to generate release notes for (repeatable)"
+    ),
+    limit: int = typer.Option(
+        20,
+        "--limit",
+        "-n",
+        help="Number of recent history entries to replay when no fixtures or ranges are given"
+    ),
+    jobs: int = typer.Option(
+        4,
+        "--jobs",
+        "-j",
+        help="Number of concurrent LLM requests"
+    ),
+    output: Optional[Path] = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Write the full results, including every generated output, as JSON"
+    )
+):
+    """
+    Compare models and settings by replaying stored diffs and checking the generated messages
+    """
+    try:
+        from . import evaluation
+
+        cases = []
+        if fixtures:
+            cases.extend(evaluation.load_fixture_cases(fixtures))
+        if rev_ranges:
+            cases.extend(evaluation.load_range_cases(rev_ranges))
+        if not fixtures and not rev_ranges:
+            cases.extend(evaluation.load_history_cases(limit))
+        if not cases:
+            console.print("[yellow]No cases to evaluate[/yellow]")
+            return
+
+        matrix = evaluation.build_matrix(models, temperatures, max_tokens)
+        console.print(f"Evaluating {len(cases)} cases with {len(matrix)} settings")
+        report = evaluation.evaluate(cases, matrix, jobs=jobs)
+
+        table = Table(title="Model evaluation")
+        table.add_column("Settings", min_width=24)
+        for column in ("Cases", "Errors", "Pass rate", "p50 ms", "p95 ms", "Tokens/s", "Passes/s"):
+            table.add_column(column, justify="right")
+        for row in report:
+            table.add_row(
+                ", ".join(f"{key}={value}" for key, value in row["settings"].items()),
+                str(row["cases"]), str(row["errors"]),
+                f"{row['pass_rate']:.0%}" if row["pass_rate"] is not None else "-",
+                _format_ms(row["p50_ms"]), _format_ms(row["p95_ms"]),
+                f"{row['tokens_per_sec']:.1f}" if row["tokens_per_sec"] else "-",
+                f"{row['passes_per_sec']:.2f}" if row["passes_per_sec"] else "-"
+            )
+        console.print(table)
+
+        if output:
+            output.write_text(json.dumps(report, indent=2))
+            console.print(f"[green]Wrote results to {output}[/green]")
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {str(e)}")
+        raise typer.Exit(1)
+
+@workspace_app.command("release-notes")
+def workspace_release_notes(
+    version: str = typer.Argument(
+        ...,
+        help="Version number of the coordinated release (e.g., v1.0.0)"
+    ),
+    repos: str = typer.Option(
+        ...,
+        "--repos",
+        help="Glob of repository directories (e.g. '~/src/*') or a manifest file: a JSON list or one path per line"
+    ),
+    from_ref: Optional[str] = typer.Option(
+        None,
+        "--from",
+        help="Starting reference in every repository. Defaults to each repository's previous release."
+    ),
+    to_ref: str = typer.Option(
+        "HEAD",
+        "--to",
+        help="Ending reference in every repository"
+    ),
+    processes: int = typer.Option(
+        0,
+        "--processes",
+        "-P",
+        help="Worker processes collecting commits (default: one per CPU, at most one per repository)"
+    ),
+    jobs: int = typer.Option(
+        0,
+        "--jobs",
+        "-j",
+        help="LLM requests in flight across all repositories (default: llm_max_concurrency)"
+    ),
+    output: Optional[Path] = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Write every repository's notes and status as JSON"
+    )
+):
+    """
+    Generate release notes for many repositories, collecting and generating in parallel
+    """
+    try:
+        from rich.progress import Progress
+        from . import workspace
+
+        repo_paths = workspace.discover_repos(repos)
+        if not repo_paths:
+            console.print(f"[yellow]No git repositories found for {repos}[/yellow]")
+            raise typer.Exit(1)
+
+        with Progress(console=console) as progress:
+            task = progress.add_task(f"Release notes for {len(repo_paths)} repositories", total=len(repo_paths))
+
+            def on_result(result):
+                if result["error"]:
+                    progress.console.print(f"[red]{Path(result['repo']).name}[/red] {result['error']}")
+                progress.advance(task)
+
+            results = workspace.release_notes(repo_paths, version, from_ref, to_ref, processes=processes,
+                                              concurrency=jobs, on_result=on_result)
+
+        table = Table(title=f"Release {version}")
+        table.add_column("Repository")
+        table.add_column("Range")
+        for column in ("Commits", "Git ms", "LLM ms"):
+            table.add_column(column, justify="right")
+        table.add_column("Status")
+        for result in results:
+            status = "[red]failed[/red]" if result["error"] else "[green]ok[/green]" if result.get("notes") else "[yellow]no commits[/yellow]"
+            table.add_row(Path(result["repo"]).name, f"{result['from_ref'] or '-'}..{result['to_ref']}", str(result["commit_count"]),
+                          _format_ms(result.get("git_ms")), _format_ms(result.get("llm_ms")), status)
+        console.print(table)
+
+        for result in results:
+            if result.get("notes"):
+                console.print(f"\n[bold]{Path(result['repo']).name}[/bold]")
+                render.print_text(console, result["notes"])
+
+        if output:
+            output.write_text(json.dumps(results, indent=2))
+            console.print(f"[green]Wrote results to {output}[/green]")
+
+        failed = [result for result in results if result["error"]]
+        if failed:
+            console.print(f"\n[red]{len(failed)} of {len(results)} repositories failed:[/red]")
+            for result in failed:
+                console.print(f"  {result['repo']}: {result['error']}")
+    except typer.Exit:
+        raise
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {str(e)}")
+        raise typer.Exit(1)
+    if failed:
+        raise typer.Exit(1)
+
+def _format_ms(value: Optional[float]) -> str:
+    return f"{value:.0f}" if value is not None else "-"
+
+@app.command()
+def stats(
+    days: int = typer.Option(
+        30,
+        "--days",
+        help="Only include runs from the last N days (0 for all)"
+    ),
+    as_json: bool = typer.Option(
+        False,
+        "--json",
+        help="Print the report as JSON"
+    ),
+    prometheus: Optional[Path] = typer.Option(
+        None,
+        "--prometheus",
+        help="Write the report to this file in the Prometheus textfile format"
+    )
+):
+    """
+    Show latency, throughput and cache metrics of past runs
+    """
+    try:
+        from . import metrics
+        report = metrics.build_report(days=days or None)
+
+        if prometheus:
+            # Write then rename so the textfile collector never reads a partial file
+            tmp_path = prometheus.with_name(prometheus.name + ".tmp")
+            tmp_path.write_text(metrics.to_prometheus(report))
+            tmp_path.replace(prometheus)
+            if not as_json:
+                console.print(f"[green]Wrote Prometheus metrics to {prometheus}[/green]")
+
+        if as_json:
+            typer.echo(json.dumps(report, indent=2))
+            return
+
+        if not report["models"] and not report["commands"]:
+            console.print("[yellow]No metrics recorded yet[/yellow]")
+            return
+
+        table = Table(title="LLM calls by model")
+        for column in ("Model", "Calls", "p50 ms", "p95 ms", "Tokens/s", "Prompt tokens", "Completion tokens"):
+            table.add_column(column, justify="left" if column == "Model" else "right")
+        for row in report["models"]:
+            table.add_row(
+                row["model"], str(row["count"]), _format_ms(row["p50_ms"]), _format_ms(row["p95_ms"]),
+                f"{row['tokens_per_sec']:.1f}" if row["tokens_per_sec"] else "-",
+                str(row["prompt_tokens"]), str(row["completion_tokens"])
+            )
+        console.print(table)
+
+        table = Table(title="Commands")
+        for column in ("Command", "Runs", "p50 ms", "p95 ms", "git p50 ms", "Cache hit rate"):
+            table.add_column(column, justify="left" if column == "Command" else "right")
+        for row in report["commands"]:
+            table.add_row(
+                row["command"], str(row["count"]), _format_ms(row["p50_ms"]), _format_ms(row["p95_ms"]),
+                _format_ms(row["git_p50_ms"]),
+                f"{row['cache_hit_rate']:.0%}" if row["cache_hit_rate"] is not None else "-"
+            )
+        console.print(table)
+
+        table = Table(title="Git collection by repository size")
+        for column in ("Repository size", "Runs", "p50 ms", "p95 ms"):
+            table.add_column(column, justify="left" if column == "Repository size" else "right")
+        for row in report["git_by_repo_size"]:
+            table.add_row(row["repo_size"], str(row["count"]), _format_ms(row["p50_ms"]), _format_ms(row["p95_ms"]))
+        console.print(table)
+
+        table = Table(title="Weekly p50 latency trend")
+        for column in ("Week", "Model", "Calls", "p50 ms"):
+            table.add_column(column, justify="left" if column in ("Week", "Model") else "right")
+        for row in report["trend"]:
+            table.add_row(row["week"], row["model"], str(row["count"]), _format_ms(row["p50_ms"]))
+        console.print(table)
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {str(e)}")
+        raise typer.Exit(1)
+
 def main():
     """Main entry point for the CLI"""
     # Print the version if requested
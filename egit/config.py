@@ -2,11 +2,18 @@
 Configuration management for eGit
 """
 import os
+import copy
 import json
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 CONFIG_FILE = "egit.json"
+DB_FILE = "egit.db"
+
+# The parsed config file, keyed by its path, mtime and size so edits are picked up
+_loaded: Dict[str, Any] = {"key": None, "config": {}}
+_loaded_lock = threading.Lock()
 
 def get_config_dir() -> Path:
     """Get the configuration directory"""
@@ -22,22 +29,52 @@ def get_config_path() -> Path:
     """Get the path to the config file"""
     return get_config_dir() / CONFIG_FILE
 
+def get_db_path() -> Path:
+    """Get the path to the history database (overridable with EGIT_DB_FILE)"""
+    if os.getenv("EGIT_DB_FILE"):
+        return Path(os.environ["EGIT_DB_FILE"])
+    return get_config_dir() / DB_FILE
+
+def get_cache_dir() -> Path:
+    """Get the cache directory (overridable with EGIT_CACHE_DIR)"""
+    if os.getenv("EGIT_CACHE_DIR"):
+        cache_dir = Path(os.environ["EGIT_CACHE_DIR"])
+    else:
+        cache_dir = get_config_dir() / 'cache'
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+def _file_key(config_path: Path) -> Optional[Tuple[str, int, int]]:
+    try:
+        stat = config_path.stat()
+    except OSError:
+        return None
+    return (str(config_path), stat.st_mtime_ns, stat.st_size)
+
 def load_config() -> Dict[str, Any]:
-    """Load configuration from file"""
+    """Load configuration from file (parsed once per change of the file; callers get their own copy)"""
     config_path = get_config_path()
-    if config_path.exists():
-        try:
-            with open(config_path, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {}
-    return {}
+    key = _file_key(config_path)
+    if key is None:
+        return {}
+    with _loaded_lock:
+        if _loaded["key"] != key:
+            try:
+                with open(config_path, 'r') as f:
+                    config = json.load(f)
+            except json.JSONDecodeError:
+                config = {}
+            _loaded.update(key=key, config=config)
+        return copy.deepcopy(_loaded["config"])
 
 def save_config(config: Dict[str, Any]) -> None:
     """Save configuration to file"""
     config_path = get_config_path()
     with open(config_path, 'w') as f:
         json.dump(config, f, indent=2)
+    with _loaded_lock:
+        _loaded["key"] = None
 
 def get_config() -> Dict[str, Any]:
     """Get the current configuration, including environment variables"""
@@ -64,8 +101,8 @@ def get_config() -> Dict[str, Any]:
 def update_config(key: str, value: Any) -> None:
     """Update a configuration value"""
     config = load_config()
-    # Ensure the key exists
-    if key not in config:
+    # Ensure the key exists (keys added in newer versions may only be in the defaults)
+    if key not in config and key not in DEFAULT_CONFIG:
         raise KeyError(f"Key '{key}' does not exist in the configuration")
     config[key] = value
     save_config(config)
@@ -75,6 +112,12 @@ def get_config_value(key: str) -> Optional[Any]:
     config = get_config()
     return config.get(key)
 
+def as_bool(value: Any) -> bool:
+    """Interpret a config value (which may be a string from the CLI or env) as a boolean"""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
 # Default configuration
 DEFAULT_CONFIG = {
     "llm_provider": "ollama",
@@ -83,7 +126,28 @@ DEFAULT_CONFIG = {
     "llm_api_base": "http://localhost:11434",
     "llm_max_tokens": 4096,
     "llm_temperature": 0.7,
-    "git_executable": "git"
+    "llm_context_tokens": 8192,
+    "git_executable": "git",
+    "summary_cache": True,
+    "summary_symbols": "replace",
+    "release_notes_cluster": True,
+    "package_map": "",
+    "output_max_lines": 400,
+    "response_cache": True,
+    "response_wait_timeout": 120,
+    "response_cache_ttl": 60,
+    "response_cache_max_entries": 1000,
+    "summary_deadline": 0,
+    "llm_fast_model": "",
+    "llm_fast_max_diff_lines": 400,
+    "llm_endpoints": [],
+    "llm_hedge_after_ms": 0,
+    "llm_rpm": 0,
+    "llm_tpm": 0,
+    "llm_max_concurrency": 8,
+    "llm_max_retries": 4,
+    "history_max_age_days": 90,
+    "history_max_size_mb": 500
 }
 
 # Initialize config with defaults if it doesn't exist
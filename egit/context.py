@@ -0,0 +1,153 @@
+"""
+Size-aware prompt context: full patches for small changes, summaries of them for large ones
+"""
+import posixpath
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from . import git
+from .config import get_config
+from .rawdiff import RawDiff
+
+# Context tiers, from most to least detailed
+FULL = "full"
+STATS = "stats"
+ROLLUP = "rollup"
+
+# Tokens kept free for the instructions around the context
+PROMPT_OVERHEAD_TOKENS = 512
+# Output tokens reserved at most, even when llm_max_tokens is larger
+MAX_COMPLETION_RESERVE = 1024
+
+# Definitions worth naming when they appear on added or removed lines
+_SYMBOL_PATTERN = re.compile(
+    r"^\s*(?:export\s+)?(?:async\s+)?(?:def|class|function|func|fn|interface|struct|enum|type)\s+([A-Za-z_][\w]*)"
+)
+
+def estimate_tokens(lines: List[str]) -> int:
+    """Roughly estimate the tokens in some lines of text (about four characters per token)"""
+    if isinstance(lines, RawDiff):
+        # Bytes stand in for characters, which saves decoding a diff just to measure it
+        return (lines.nbytes + 1) // 4 if lines else 0
+    return sum(len(line) + 1 for line in lines) // 4
+
+def get_context_budget() -> int:
+    """Get the tokens available for diff context from llm_context_tokens"""
+    config = get_config()
+    context_tokens = int(config.get("llm_context_tokens", 8192))
+    reserve = min(int(config.get("llm_max_tokens", 500)), MAX_COMPLETION_RESERVE)
+    return max(256, context_tokens - reserve - PROMPT_OVERHEAD_TOKENS)
+
+def file_stats(file_diff: Dict[str, Any]) -> Dict[str, Any]:
+    """Count added and removed lines of one file's diff and collect its hunk headers and changed symbols"""
+    added = removed = 0
+    hunks: List[str] = []
+    symbols: List[str] = []
+    in_hunk = False
+    for line in file_diff["lines"]:
+        if line.startswith("@@"):
+            in_hunk = True
+            hunks.append(line)
+        elif not in_hunk:
+            continue
+        elif line.startswith("+"):
+            added += 1
+            match = _SYMBOL_PATTERN.match(line[1:])
+            if match and match.group(1) not in symbols:
+                symbols.append(match.group(1))
+        elif line.startswith("-"):
+            removed += 1
+            match = _SYMBOL_PATTERN.match(line[1:])
+            if match and match.group(1) not in symbols:
+                symbols.append(match.group(1))
+        elif line.startswith("Binary files"):
+            hunks.append(line)
+    return {"path": file_diff["path"], "added": added, "removed": removed, "hunks": hunks, "symbols": symbols}
+
+def build_stats_context(file_diffs: List[Dict[str, Any]]) -> List[str]:
+    """Describe each file by its line counts, hunk headers and changed symbols (like --numstat plus context)"""
+    lines = ["(Diff too large to include; showing per-file added/removed lines, hunk headers and changed symbols)"]
+    for stats in (file_stats(file_diff) for file_diff in file_diffs):
+        lines.append(f"{stats['added']}\t{stats['removed']}\t{stats['path']}")
+        if stats["symbols"]:
+            lines.append(f"    symbols: {', '.join(stats['symbols'])}")
+        lines.extend(f"    {hunk}" for hunk in stats["hunks"])
+    return lines
+
+def build_rollup_context(file_diffs: List[Dict[str, Any]], depth: int = 2) -> List[str]:
+    """Summarize the change per directory (up to depth levels deep): files touched and lines added/removed"""
+    directories: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+    for stats in (file_stats(file_diff) for file_diff in file_diffs):
+        directory = "/".join(posixpath.dirname(stats["path"]).split("/")[:depth]) or "."
+        totals = directories[directory]
+        totals[0] += 1
+        totals[1] += stats["added"]
+        totals[2] += stats["removed"]
+
+    lines = [f"(Diff too large to include; showing {len(file_diffs)} changed files rolled up per directory: files, added, removed lines)"]
+    for directory, (files, added, removed) in sorted(directories.items(), key=lambda item: -(item[1][1] + item[1][2])):
+        lines.append(f"{directory}/\t{files} files\t+{added}\t-{removed}")
+    return lines
+
+def rollup_changes(changes: List[str], depth: int = 2) -> List[str]:
+    """Collapse name-status lines into counts per status and directory"""
+    counts: Dict[Tuple[str, str], int] = defaultdict(int)
+    for change in changes:
+        parts = change.split("\t") if "\t" in change else change.split()
+        if len(parts) < 2:
+            continue
+        directory = "/".join(posixpath.dirname(parts[-1]).split("/")[:depth]) or "."
+        counts[(parts[0][:1], directory)] += 1
+    return [f"{status}\t{count} files in {directory}/" for (status, directory), count in sorted(counts.items())]
+
+def select_diff_context(changes: List[str], diffs: List[str], budget: int = 0) -> Tuple[List[str], List[str], str]:
+    """Pick the most detailed context that fits the token budget
+
+    Returns the change lines and diff lines to put in the prompt and the tier used.
+    """
+    budget = budget or get_context_budget()
+    if estimate_tokens(changes) + estimate_tokens(diffs) <= budget:
+        return changes, diffs, FULL
+
+    file_diffs = git.split_diff_by_file(diffs)
+    stats_context = build_stats_context(file_diffs)
+    if estimate_tokens(changes) + estimate_tokens(stats_context) <= budget:
+        return changes, stats_context, STATS
+
+    rollup = build_rollup_context(file_diffs)
+    rolled_changes = rollup_changes(changes)
+    # Deep trees can still overflow; keep the directories with the most churn
+    while len(rollup) > 2 and estimate_tokens(rolled_changes) + estimate_tokens(rollup) > budget:
+        rollup.pop()
+    return rolled_changes, rollup, ROLLUP
+
+def select_commit_context(commits: List[Dict[str, Any]], budget: int = 0) -> Tuple[List[Dict[str, Any]], str]:
+    """Pick how much of each commit to put in a release notes prompt
+
+    Full messages with bodies when they fit, then subjects only, then the
+    subjects that fit plus a count of the rest.
+    """
+    budget = budget or get_context_budget()
+
+    def size(items: List[Dict[str, Any]]) -> int:
+        return estimate_tokens([f"Commit: {c['hash']}\nMessage: {c['message']} {' '.join(c['body'] or [])}" for c in items])
+
+    if size(commits) <= budget:
+        return commits, FULL
+
+    # Hashes carry no meaning for the notes; dropping them and the bodies shrinks each commit to its subject
+    subjects = [dict(commit, hash=commit["hash"][:8], body=[]) for commit in commits]
+    if size(subjects) <= budget:
+        return subjects, STATS
+
+    kept = []
+    used = 0
+    for commit in subjects:
+        cost = size([commit])
+        if used + cost > budget:
+            break
+        kept.append(commit)
+        used += cost
+    kept.append({"hash": "...", "message": f"and {len(subjects) - len(kept)} more commits not shown", "body": []})
+    return kept, ROLLUP
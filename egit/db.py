@@ -1,50 +1,347 @@
 """
 Database management for eGit using SQLAlchemy
 """
-from datetime import datetime
-from typing import Optional, List
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from .config import DB_FILE
-
-# Initialize SQLAlchemy
+import atexit
+import hashlib
+import queue
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Iterator, Set, Union
+from sqlalchemy import (
+    create_engine, event, func, insert, inspect, select, text, update,
+    Column, Integer, String, DateTime, Text, Float, Index, LargeBinary
+)
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import declarative_base, sessionmaker
+from .config import get_db_path
+from .profiling import span
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
+
+# Initialize SQLAlchemy (the engine is created lazily so importing this module stays cheap)
 Base = declarative_base()
-engine = create_engine(f'sqlite:///{DB_FILE}')
-Session = sessionmaker(bind=engine)
+Session = sessionmaker()
+_engine = None
+_engine_lock = threading.Lock()
+_fts_available = False
+
+# Seconds SQLite waits on a lock held by another egit process before giving up
+BUSY_TIMEOUT = 30
 
 class GitMessage(Base):
     """Model for storing Git messages and related information"""
     __tablename__ = 'git_messages'
-    
+
     id = Column(Integer, primary_key=True)
-    commit_hash = Column(String(40), unique=True)
+    commit_hash = Column(String(40), index=True)
+    ref = Column(String(255))  # commit ref or range the message was generated for
     original_message = Column(Text)
     generated_message = Column(Text)
     command_type = Column(String(50))  # 'summarize', 'release_notes', etc.
+    model = Column(String(255))
+    tier = Column(String(20))  # cascade tier that answered: 'fast', 'escalated' or 'primary'
+    prompt_hash = Column(String(64), index=True)  # HistoryBlob holding the prompt
+    diff_hash = Column(String(64), index=True)  # HistoryBlob holding the input diff
+    latency_ms = Column(Float)
+    prompt_tokens = Column(Integer)
+    completion_tokens = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        Index('ix_git_messages_command_type_created_at', 'command_type', 'created_at'),
+    )
+
+    def get_prompt(self) -> Optional[str]:
+        """Load and decompress the prompt this message was generated from"""
+        return load_blob(self.prompt_hash) if self.prompt_hash else None
+
+    def get_diff(self) -> Optional[str]:
+        """Load and decompress the diff this message was generated from"""
+        return load_blob(self.diff_hash) if self.diff_hash else None
+
+class RunMetric(Base):
+    """Timings and counters of one egit command run"""
+    __tablename__ = 'run_metrics'
+
+    id = Column(Integer, primary_key=True)
+    command_type = Column(String(50))
+    model = Column(String(255))
+    total_ms = Column(Float)  # wall time of the whole command
+    git_ms = Column(Float)  # time spent collecting changes and diffs from git
+    llm_ms = Column(Float)
+    prompt_tokens = Column(Integer)
+    completion_tokens = Column(Integer)
+    cache_hits = Column(Integer)
+    cache_misses = Column(Integer)
+    repo_files = Column(Integer)  # tracked files, used to bucket git timings by repository size
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class HistoryBlob(Base):
+    """Compressed, content-addressed prompt or diff shared by any number of messages"""
+    __tablename__ = 'history_blobs'
+
+    hash = Column(String(64), primary_key=True)  # sha256 of the uncompressed content
+    codec = Column(String(8), nullable=False)  # 'zstd' or 'zlib'
+    size = Column(Integer, nullable=False)  # uncompressed size in bytes
+    data = Column(LargeBinary, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Enable WAL so readers and concurrent egit processes don't block each other"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT * 1000}")
+    cursor.close()
+
+# External-content FTS5 index over the message columns, kept in sync by triggers
+FTS_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS git_messages_fts USING fts5(
+        generated_message, original_message, content='git_messages', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS git_messages_fts_insert AFTER INSERT ON git_messages BEGIN
+        INSERT INTO git_messages_fts(rowid, generated_message, original_message)
+        VALUES (new.id, new.generated_message, new.original_message);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS git_messages_fts_delete AFTER DELETE ON git_messages BEGIN
+        INSERT INTO git_messages_fts(git_messages_fts, rowid, generated_message, original_message)
+        VALUES ('delete', old.id, old.generated_message, old.original_message);
+    END""",
+    # Only changes to the indexed text re-index a row; expiring its prompt/diff doesn't
+    """CREATE TRIGGER IF NOT EXISTS git_messages_fts_update
+        AFTER UPDATE OF generated_message, original_message ON git_messages BEGIN
+        INSERT INTO git_messages_fts(git_messages_fts, rowid, generated_message, original_message)
+        VALUES ('delete', old.id, old.generated_message, old.original_message);
+        INSERT INTO git_messages_fts(rowid, generated_message, original_message)
+        VALUES (new.id, new.generated_message, new.original_message);
+    END""",
+]
+
+def _create_fts(engine) -> bool:
+    """Create the full-text index, returning False if SQLite was built without FTS5"""
+    with engine.begin() as connection:
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = 'git_messages_fts'"
+        ).scalar()
+        trigger = connection.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'git_messages_fts_update'"
+        ).scalar()
+        if trigger and "UPDATE OF" not in trigger:
+            # Created by an older version, which re-indexed a row on any update
+            connection.exec_driver_sql("DROP TRIGGER git_messages_fts_update")
+        try:
+            for statement in FTS_SCHEMA:
+                connection.exec_driver_sql(statement)
+        except OperationalError as e:
+            if "fts5" in str(e):
+                return False
+            raise
+        if not exists:
+            # Index rows recorded before the index existed
+            connection.exec_driver_sql("INSERT INTO git_messages_fts(git_messages_fts) VALUES ('rebuild')")
+    return True
+
+def _add_missing_columns(engine) -> None:
+    """Add columns introduced by newer versions to tables created by older ones"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+def _create_schema(engine, retries: int = 5) -> None:
+    """Create missing tables, tolerating another process creating them at the same time"""
+    global _fts_available
+    for attempt in range(retries):
+        try:
+            Base.metadata.create_all(engine)
+            _add_missing_columns(engine)
+            _fts_available = _create_fts(engine)
+            return
+        except OperationalError as e:
+            if not any(reason in str(e) for reason in ("already exists", "duplicate column", "locked")) or attempt == retries - 1:
+                raise
+            time.sleep(0.05 * (attempt + 1))
+
+def get_engine():
+    """Get the database engine, creating it and the schema on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            engine = create_engine(f'sqlite:///{get_db_path()}', connect_args={"timeout": BUSY_TIMEOUT})
+            event.listen(engine, "connect", _set_sqlite_pragmas)
+            _create_schema(engine)
+            Session.configure(bind=engine)
+            _engine = engine
+    return _engine
+
 def init_db():
     """Initialize the database"""
-    Base.metadata.create_all(engine)
+    _create_schema(get_engine())
+
+def dispose_engine() -> None:
+    """Close all connections and forget the engine (e.g. after the DB path changed)"""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
 
 def save_message(commit_hash: str, original_message: str, generated_message: str, command_type: str):
     """Save a message to the database"""
+    save_messages([{
+        "commit_hash": commit_hash,
+        "original_message": original_message,
+        "generated_message": generated_message,
+        "command_type": command_type
+    }])
+
+def compress_blob(content: Union[str, bytes, memoryview]) -> Dict[str, Any]:
+    """Build a content-addressed, compressed blob row for a prompt or diff (raw diffs are stored byte for byte)"""
+    raw = content.encode("utf-8", errors="surrogateescape") if isinstance(content, str) else content
+    if zstandard is not None:
+        codec, data = "zstd", zstandard.ZstdCompressor(level=6).compress(raw)
+    else:
+        codec, data = "zlib", zlib.compress(raw, 6)
+    return {"hash": hashlib.sha256(raw).hexdigest(), "codec": codec, "size": len(raw), "data": data}
+
+def _decompress(codec: str, data: bytes) -> str:
+    """Decompress blob data written with any supported codec"""
+    if codec == "zstd":
+        if zstandard is None:
+            raise Exception("This history entry is zstd-compressed; install the 'zstandard' package to read it")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        raw = zlib.decompress(data)
+    return raw.decode("utf-8", errors="surrogateescape")
+
+def load_blob(blob_hash: str) -> Optional[str]:
+    """Load and decompress a stored prompt or diff by its hash"""
+    get_engine()
     session = Session()
     try:
-        message = GitMessage(
-            commit_hash=commit_hash,
-            original_message=original_message,
-            generated_message=generated_message,
-            command_type=command_type
+        blob = session.get(HistoryBlob, blob_hash)
+        return _decompress(blob.codec, blob.data) if blob else None
+    finally:
+        session.close()
+
+def _extract_blobs(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Move raw prompt/diff text out of message rows into deduplicated blob rows"""
+    blobs = {}
+    for row in rows:
+        for field in ("prompt", "diff"):
+            content = row.pop(field, None)
+            if content:
+                blob = compress_blob(content)
+                blobs.setdefault(blob["hash"], blob)
+                row[f"{field}_hash"] = blob["hash"]
+    return blobs
+
+def save_messages(rows: List[Dict[str, Any]], retries: int = 5) -> None:
+    """Insert many messages in a single transaction (raw 'prompt'/'diff' text is stored as blobs)"""
+    if not rows:
+        return
+    get_engine()
+
+    rows = [dict(row) for row in rows]
+    blobs = _extract_blobs(rows)
+
+    # executemany needs every row to bind the same columns
+    now = datetime.utcnow()
+    keys = set().union(*rows) | {"created_at"}
+    rows = [{key: row.get(key) for key in keys} | {"created_at": row.get("created_at") or now} for row in rows]
+
+    for attempt in range(retries):
+        session = Session()
+        try:
+            with span("db.write", rows=len(rows), blobs=len(blobs)):
+                if blobs:
+                    # Identical content (e.g. one diff summarized by several models) is stored once
+                    session.execute(
+                        insert(HistoryBlob).prefix_with("OR IGNORE"),
+                        [blob | {"created_at": now} for blob in blobs.values()]
+                    )
+                session.execute(insert(GitMessage), rows)
+                session.commit()
+            return
+        except OperationalError as e:
+            session.rollback()
+            # busy_timeout covers most contention; retry the rare lock upgrade failure
+            if "locked" not in str(e) or attempt == retries - 1:
+                raise
+            time.sleep(0.1 * (attempt + 1))
+        finally:
+            session.close()
+
+def save_metrics(rows: List[Dict[str, Any]], retries: int = 5) -> None:
+    """Insert many run metrics in a single transaction"""
+    if not rows:
+        return
+    get_engine()
+
+    columns = RunMetric.__table__.columns.keys()
+    now = datetime.utcnow()
+    rows = [{key: row.get(key) for key in columns if key != "id"} | {"created_at": row.get("created_at") or now} for row in rows]
+
+    for attempt in range(retries):
+        session = Session()
+        try:
+            session.execute(insert(RunMetric), rows)
+            session.commit()
+            return
+        except OperationalError as e:
+            session.rollback()
+            if "locked" not in str(e) or attempt == retries - 1:
+                raise
+            time.sleep(0.1 * (attempt + 1))
+        finally:
+            session.close()
+
+def get_metrics(since: Optional[datetime] = None, command_type: Optional[str] = None) -> List[RunMetric]:
+    """Get run metrics, oldest first"""
+    get_engine()
+    session = Session()
+    try:
+        stmt = select(RunMetric).order_by(RunMetric.id)
+        if since is not None:
+            stmt = stmt.where(RunMetric.created_at >= since)
+        if command_type:
+            stmt = stmt.where(RunMetric.command_type == command_type)
+        return session.execute(stmt).scalars().all()
+    finally:
+        session.close()
+
+def get_llm_timings(since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Get model, latency and token counts of every recorded LLM call, oldest first"""
+    get_engine()
+    session = Session()
+    try:
+        stmt = (
+            select(GitMessage.model, GitMessage.command_type, GitMessage.latency_ms,
+                   GitMessage.prompt_tokens, GitMessage.completion_tokens, GitMessage.created_at)
+            .where(GitMessage.latency_ms.isnot(None))
+            .order_by(GitMessage.id)
         )
-        session.add(message)
-        session.commit()
+        if since is not None:
+            stmt = stmt.where(GitMessage.created_at >= since)
+        return [dict(row._mapping) for row in session.execute(stmt)]
     finally:
         session.close()
 
 def get_message(commit_hash: str) -> Optional[GitMessage]:
     """Get a message from the database"""
+    get_engine()
     session = Session()
     try:
         return session.query(GitMessage).filter_by(commit_hash=commit_hash).first()
@@ -53,8 +350,258 @@ def get_message(commit_hash: str) -> Optional[GitMessage]:
 
 def get_messages_by_type(command_type: str) -> List[GitMessage]:
     """Get all messages of a specific type"""
+    return list(iter_messages(command_type))
+
+def iter_messages(command_type: Optional[str] = None, batch_size: int = 500) -> Iterator[GitMessage]:
+    """Stream messages oldest first, loading one batch at a time"""
+    after_id = 0
+    while True:
+        get_engine()
+        session = Session()
+        try:
+            query = session.query(GitMessage).filter(GitMessage.id > after_id)
+            if command_type:
+                query = query.filter(GitMessage.command_type == command_type)
+            batch = query.order_by(GitMessage.id).limit(batch_size).all()
+        finally:
+            session.close()
+
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        after_id = batch[-1].id
+
+def get_summarized_commits(command_type: str, model: Optional[str] = None) -> Set[str]:
+    """Get the hashes of commits that already have a message of this type"""
+    get_engine()
     session = Session()
     try:
-        return session.query(GitMessage).filter_by(command_type=command_type).all()
+        query = select(GitMessage.commit_hash).where(
+            GitMessage.command_type == command_type,
+            GitMessage.commit_hash.isnot(None)
+        )
+        if model:
+            query = query.where(GitMessage.model == model)
+        return set(session.execute(query.distinct()).scalars())
     finally:
         session.close()
+
+def list_messages(command_type: Optional[str] = None, limit: int = 20, before_id: Optional[int] = None) -> List[GitMessage]:
+    """Get one page of messages, newest first (pass the last id as before_id for the next page)"""
+    get_engine()
+    session = Session()
+    try:
+        query = session.query(GitMessage)
+        if command_type:
+            query = query.filter(GitMessage.command_type == command_type)
+        if before_id is not None:
+            query = query.filter(GitMessage.id < before_id)
+        return query.order_by(GitMessage.id.desc()).limit(limit).all()
+    finally:
+        session.close()
+
+def _fts_query(query: str) -> str:
+    """Quote each search term so user input can't break the FTS5 query syntax"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+def search_messages(query: str, command_type: Optional[str] = None, limit: int = 20, offset: int = 0) -> List[GitMessage]:
+    """Full-text search over generated and original messages, best matches first"""
+    if not query.strip():
+        return []
+    get_engine()
+    session = Session()
+    try:
+        if not _fts_available:
+            # Slow fallback for SQLite builds without FTS5
+            pattern = f"%{query}%"
+            fallback = session.query(GitMessage).filter(
+                GitMessage.generated_message.like(pattern) | GitMessage.original_message.like(pattern)
+            )
+            if command_type:
+                fallback = fallback.filter(GitMessage.command_type == command_type)
+            return fallback.order_by(GitMessage.id.desc()).limit(limit).offset(offset).all()
+
+        statement = text(
+            "SELECT git_messages.* FROM git_messages_fts "
+            "JOIN git_messages ON git_messages.id = git_messages_fts.rowid "
+            "WHERE git_messages_fts MATCH :query "
+            + ("AND git_messages.command_type = :command_type " if command_type else "")
+            + "ORDER BY git_messages_fts.rank LIMIT :limit OFFSET :offset"
+        )
+        params = {"query": _fts_query(query), "limit": limit, "offset": offset}
+        if command_type:
+            params["command_type"] = command_type
+        return session.query(GitMessage).from_statement(statement).params(**params).all()
+    finally:
+        session.close()
+
+class HistoryWriter:
+    """Write-behind queue that records messages from a background thread in batches"""
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, row: Dict[str, Any]) -> None:
+        """Queue a message (or, with a true '_metrics' key, run metrics) row for writing; never blocks on the database"""
+        self._ensure_started()
+        self._queue.put(row)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every queued row has been written"""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put({"_flush": done})
+        done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush pending rows and stop the background thread"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(None)
+            self._thread = None
+        thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="egit-history-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        waiters: List[threading.Event] = []
+        deadline = None
+        stop = False
+
+        while not stop:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is None:
+                    stop = True
+                elif "_flush" in item:
+                    waiters.append(item["_flush"])
+                else:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+
+            if batch and (stop or waiters or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                # Messages and metrics commit separately, so a failure in one doesn't lose the other
+                for save, rows in ((save_messages, [row for row in batch if not row.get("_metrics")]),
+                                   (save_metrics, [row for row in batch if row.get("_metrics")])):
+                    try:
+                        save(rows)
+                    except Exception as e:
+                        # History is best effort and must never break the command (or its --json output) that produced it
+                        print(f"Warning: failed to record history: {str(e)}", file=sys.stderr)
+                batch = []
+                deadline = None
+
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+
+_writer = HistoryWriter()
+atexit.register(_writer.close)
+
+def record_message(command_type: str, generated_message: str, **fields: Any) -> None:
+    """Record a generated message in the history without waiting for the database (pass raw prompt/diff text)"""
+    columns = set(GitMessage.__table__.columns.keys()) | {"prompt", "diff"}
+    row = {key: value for key, value in fields.items() if key in columns}
+    row.update(command_type=command_type, generated_message=generated_message)
+    row.setdefault("created_at", datetime.utcnow())
+    _writer.submit(row)
+
+def record_metrics(command_type: str, **fields: Any) -> None:
+    """Record the metrics of a command run without waiting for the database"""
+    columns = set(RunMetric.__table__.columns.keys())
+    row = {key: value for key, value in fields.items() if key in columns}
+    row.update(command_type=command_type, _metrics=True)
+    row.setdefault("created_at", datetime.utcnow())
+    _writer.submit(row)
+
+def flush_history(timeout: Optional[float] = None) -> None:
+    """Wait until all recorded messages have been written"""
+    _writer.flush(timeout)
+
+def get_blob_usage() -> Dict[str, int]:
+    """Get the number of stored blobs and their compressed and uncompressed sizes"""
+    get_engine()
+    session = Session()
+    try:
+        count, stored, raw = session.execute(
+            select(func.count(), func.coalesce(func.sum(func.length(HistoryBlob.data)), 0), func.coalesce(func.sum(HistoryBlob.size), 0))
+        ).one()
+        return {"blobs": count, "stored_bytes": stored, "raw_bytes": raw}
+    finally:
+        session.close()
+
+def vacuum_history(max_age_days: Optional[int] = None, max_bytes: Optional[int] = None) -> Dict[str, int]:
+    """Apply the retention policy: drop old prompts/diffs, cap blob storage and compact the file
+
+    Returns the blobs removed, the messages whose prompt/diff expired by age and the remaining blob usage.
+    """
+    flush_history()
+    get_engine()
+    session = Session()
+    try:
+        # Messages are kept; only the large inputs they reference expire
+        expired = 0
+        if max_age_days is not None:
+            cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+            expired = session.execute(
+                update(GitMessage)
+                .where(GitMessage.created_at < cutoff)
+                .where((GitMessage.prompt_hash.isnot(None)) | (GitMessage.diff_hash.isnot(None)))
+                .values(prompt_hash=None, diff_hash=None)
+            ).rowcount
+        session.commit()
+
+        removed = _delete_orphan_blobs(session)
+
+        if max_bytes is not None:
+            # Release blob references from the oldest messages until under the cap
+            while get_blob_usage()["stored_bytes"] > max_bytes:
+                oldest = session.execute(
+                    select(GitMessage.id)
+                    .where((GitMessage.prompt_hash.isnot(None)) | (GitMessage.diff_hash.isnot(None)))
+                    .order_by(GitMessage.id)
+                    .limit(100)
+                ).scalars().all()
+                if not oldest:
+                    break
+                session.execute(
+                    update(GitMessage).where(GitMessage.id.in_(oldest)).values(prompt_hash=None, diff_hash=None)
+                )
+                session.commit()
+                removed += _delete_orphan_blobs(session)
+    finally:
+        session.close()
+
+    # VACUUM can't run inside a transaction
+    with get_engine().connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        connection.exec_driver_sql("VACUUM")
+
+    return {"removed_blobs": removed, "expired_messages": expired, **get_blob_usage()}
+
+def _delete_orphan_blobs(session) -> int:
+    """Delete blobs no message references any more"""
+    result = session.execute(text(
+        "DELETE FROM history_blobs WHERE hash NOT IN ("
+        "SELECT prompt_hash FROM git_messages WHERE prompt_hash IS NOT NULL "
+        "UNION SELECT diff_hash FROM git_messages WHERE diff_hash IS NOT NULL)"
+    ))
+    session.commit()
+    return result.rowcount
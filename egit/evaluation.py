@@ -0,0 +1,148 @@
+"""
+Offline evaluation of models and settings by replaying stored diffs and commit ranges
+"""
+import itertools
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from . import validation
+from .metrics import percentile
+
+def load_history_cases(limit: int = 50) -> List[Dict[str, Any]]:
+    """Build cases from the most recent diffs and release notes stored in the history database"""
+    from . import db
+    from . import git
+
+    cases = []
+    for message in db.list_messages(command_type=None, limit=limit * 4):
+        if len(cases) >= limit:
+            break
+        if message.command_type == "release_notes" and message.original_message:
+            commits = [
+                {"hash": f"{index:040x}", "message": line, "body": []}
+                for index, line in enumerate(message.original_message.splitlines()) if line.strip()
+            ]
+            cases.append({"name": f"history:{message.id}", "kind": "release_notes", "commits": commits, "version": "v0.0.0"})
+        elif message.diff_hash:
+            diffs = (message.get_diff() or "").splitlines()
+            if diffs:
+                cases.append({"name": f"history:{message.id}", "kind": "summarize",
+                              "changes": git.get_changes_from_diff(diffs), "diffs": diffs})
+    return cases
+
+def load_fixture_cases(directory: Path) -> List[Dict[str, Any]]:
+    """Build cases from a directory of *.diff files and *.json release-note inputs ({"version", "commits"})"""
+    from . import git
+
+    cases = []
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix in (".diff", ".patch"):
+            diffs = path.read_text(encoding="utf-8", errors="replace").splitlines()
+            cases.append({"name": path.name, "kind": "summarize", "changes": git.get_changes_from_diff(diffs), "diffs": diffs})
+        elif path.suffix == ".json":
+            data = json.loads(path.read_text(encoding="utf-8"))
+            commits = [{"hash": commit.get("hash", ""), "message": commit["message"], "body": commit.get("body", [])}
+                       for commit in data["commits"]]
+            cases.append({"name": path.name, "kind": "release_notes", "commits": commits, "version": data.get("version", "v0.0.0")})
+    return cases
+
+def load_range_cases(rev_ranges: List[str]) -> List[Dict[str, Any]]:
+    """Build release-note cases from commit ranges of the current repository"""
+    from . import git
+
+    cases = []
+    for rev_range in rev_ranges:
+        from_ref, _, to_ref = rev_range.partition("..")
+        commits = git.get_commits_between(from_ref, to_ref or "HEAD")
+        if commits:
+            cases.append({"name": rev_range, "kind": "release_notes", "commits": commits, "version": "v0.0.0"})
+    return cases
+
+def build_matrix(models: List[str], temperatures: Optional[List[float]] = None,
+                 max_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Get every combination of the given settings as LLM config overrides"""
+    matrix = []
+    for model, temperature in itertools.product(models, temperatures or [None]):
+        overrides: Dict[str, Any] = {"model": model}
+        if temperature is not None:
+            overrides["temperature"] = temperature
+        if max_tokens:
+            overrides["max_tokens"] = max_tokens
+        matrix.append(overrides)
+    return matrix
+
+def run_case(case: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate the output of one case with one setting and check it"""
+    from . import llm
+
+    stats: Dict[str, Any] = {}
+    result = {"case": case["name"], "kind": case["kind"], "output": None, "error": None, "problems": []}
+    try:
+        if case["kind"] == "summarize":
+            output = llm.summarize_changes(case["changes"], case["diffs"], stats=stats, overrides=overrides)
+            result["problems"] = validation.check_commit_message(output)
+        else:
+            output = llm.generate_release_notes(case["commits"], case["version"], stats=stats, overrides=overrides)
+            result["problems"] = validation.check_release_notes(output)
+        result["output"] = output
+    except Exception as e:
+        result["error"] = str(e)
+
+    result.update(
+        latency_ms=stats.get("latency_ms"),
+        prompt_tokens=stats.get("prompt_tokens"),
+        completion_tokens=stats.get("completion_tokens"),
+    )
+    return result
+
+def _aggregate(overrides: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    latencies = [result["latency_ms"] for result in results if result["latency_ms"] is not None]
+    passed = sum(1 for result in results if not result["error"] and not result["problems"])
+    total_seconds = sum(latencies) / 1000
+    completion_tokens = sum(result["completion_tokens"] or 0 for result in results)
+    return {
+        "settings": overrides,
+        "cases": len(results),
+        "errors": sum(1 for result in results if result["error"]),
+        "passed": passed,
+        "pass_rate": passed / len(results) if results else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "prompt_tokens": sum(result["prompt_tokens"] or 0 for result in results),
+        "completion_tokens": completion_tokens,
+        "tokens_per_sec": completion_tokens / total_seconds if total_seconds else None,
+        # Conforming outputs per second of LLM time: the number models are compared by
+        "passes_per_sec": passed / total_seconds if total_seconds else None,
+        "results": results,
+    }
+
+def evaluate(cases: List[Dict[str, Any]], matrix: List[Dict[str, Any]], jobs: int = 4,
+             on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """Replay every case with every setting, at most jobs requests at a time
+
+    Settings run one after another so they don't compete for the same endpoint,
+    each with an empty cache so earlier runs can't answer for it.
+    """
+    report = []
+    previous_cache_dir = os.environ.get("EGIT_CACHE_DIR")
+    try:
+        for overrides in matrix:
+            with tempfile.TemporaryDirectory(prefix="egit-eval-") as cache_dir:
+                os.environ["EGIT_CACHE_DIR"] = cache_dir
+                with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+                    results = []
+                    for result in executor.map(lambda case: run_case(case, overrides), cases):
+                        results.append(result)
+                        if on_result:
+                            on_result(result)
+            report.append(_aggregate(overrides, results))
+    finally:
+        if previous_cache_dir is None:
+            os.environ.pop("EGIT_CACHE_DIR", None)
+        else:
+            os.environ["EGIT_CACHE_DIR"] = previous_cache_dir
+    return report
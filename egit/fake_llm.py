@@ -0,0 +1,312 @@
+"""
+Local stand-in LLM server for load and latency testing
+
+Speaks the OpenAI chat-completions API (/v1/chat/completions) and the Ollama
+API (/api/chat, /api/generate) with configurable latency and failure modes.
+Point eGit at it with:
+
+    python -m egit.fake_llm --port 8911 --ttft 0.3 --tokens-per-sec 40
+    egit config --set llm_api_base --value http://127.0.0.1:8911
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+COMMIT_MESSAGE = "Update request handling in the API client"
+
+RELEASE_NOTES = """Improve request handling and fix client errors
+
+FEATURES:
+- Add request handling improvements
+
+FIXES:
+- Fix client error handling
+
+CHANGES:
+- Update dependencies"""
+
+@dataclass
+class FakeLLMConfig:
+    """Behaviour of the fake server"""
+    ttft: float = 0.05  # seconds before the first token
+    tokens_per_sec: float = 200.0  # generation speed after the first token
+    error_rate: float = 0.0  # fraction of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0  # fraction of requests answered with HTTP 429
+    retry_after: float = 1.0  # Retry-After header sent with 429 responses
+    context_length: int = 32768  # prompts longer than this (in tokens) are rejected
+    max_concurrency: int = 0  # requests processed at once, the rest queue (0 is unlimited)
+    response: Optional[str] = None  # fixed response text instead of the canned ones
+    seed: Optional[int] = None
+
+@dataclass
+class FakeLLMStats:
+    """Counters exposed at GET /stats"""
+    requests: int = 0
+    completed: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    context_errors: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def to_dict(self) -> Dict[str, int]:
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.name != "lock"}
+
+def count_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return max(1, len(text) // 4)
+
+def _tokenize(text: str) -> List[str]:
+    """Split a response into word-sized pieces that are streamed as tokens"""
+    words = text.split(" ")
+    return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """HTTP server holding the fake's configuration and counters"""
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: FakeLLMConfig):
+        super().__init__(address, FakeLLMHandler)
+        self.config = config
+        self.stats = FakeLLMStats()
+        self.random = random.Random(config.seed)
+        self.random_lock = threading.Lock()
+        self.slots = threading.Semaphore(config.max_concurrency) if config.max_concurrency else None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def roll(self, rate: float) -> bool:
+        with self.random_lock:
+            return rate > 0 and self.random.random() < rate
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """Request handler for the OpenAI and Ollama endpoints"""
+    server: FakeLLMServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") in ("/v1/models", "/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "fake-model", "object": "model"}]})
+        elif self.path.rstrip("/") == "/api/tags":
+            self._send_json(200, {"models": [{"name": "fake-model"}]})
+        elif self.path.rstrip("/") == "/stats":
+            with self.server.stats.lock:
+                self._send_json(200, self.server.stats.to_dict())
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self) -> None:
+        path = self.path.rstrip("/")
+        if path in ("/v1/chat/completions", "/chat/completions"):
+            api = "openai"
+        elif path == "/api/chat":
+            api = "ollama_chat"
+        elif path == "/api/generate":
+            api = "ollama_generate"
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        if self.server.slots:
+            self.server.slots.acquire()
+        try:
+            self._track(in_flight=1)
+            self._complete(api, body)
+        finally:
+            self._track(in_flight=-1)
+            if self.server.slots:
+                self.server.slots.release()
+
+    def _track(self, **deltas: int) -> None:
+        stats = self.server.stats
+        with stats.lock:
+            for name, delta in deltas.items():
+                setattr(stats, name, getattr(stats, name) + delta)
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+
+    def _complete(self, api: str, body: Dict[str, Any]) -> None:
+        config = self.server.config
+        self._track(requests=1)
+
+        if api == "ollama_generate":
+            prompt = body.get("prompt", "")
+        else:
+            prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        model = body.get("model", "fake-model")
+        stream = bool(body.get("stream", False))
+        prompt_tokens = count_tokens(prompt)
+
+        if self.server.roll(config.rate_limit_rate):
+            self._track(rate_limited=1)
+            self._send_json(429, {"error": {"message": "Rate limit exceeded", "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+                            headers={"Retry-After": f"{config.retry_after:g}"})
+            return
+        if self.server.roll(config.error_rate):
+            self._track(errors=1)
+            self._send_json(500, {"error": {"message": "Internal server error", "type": "server_error"}})
+            return
+        if prompt_tokens > config.context_length:
+            self._track(context_errors=1)
+            self._send_json(400, {"error": {
+                "message": f"This model's maximum context length is {config.context_length} tokens. "
+                           f"However, your messages resulted in {prompt_tokens} tokens.",
+                "type": "invalid_request_error",
+                "code": "context_length_exceeded"
+            }})
+            return
+
+        if config.response is not None:
+            text = config.response
+        elif "release note" in prompt.lower():
+            text = RELEASE_NOTES
+        else:
+            text = COMMIT_MESSAGE
+        tokens = _tokenize(text)
+        completion_tokens = len(tokens)
+        delay = 1.0 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+
+        time.sleep(config.ttft)
+        if stream:
+            self._stream(api, model, tokens, delay, prompt_tokens)
+        else:
+            time.sleep(delay * max(completion_tokens - 1, 0))
+            self._send_json(200, self._response(api, model, text, prompt_tokens, completion_tokens))
+        self._track(completed=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def _response(self, api: str, model: str, text: str, prompt_tokens: int, completion_tokens: int) -> Dict[str, Any]:
+        if api == "openai":
+            return {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            }
+        data = {
+            "model": model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": completion_tokens,
+        }
+        if api == "ollama_chat":
+            data["message"] = {"role": "assistant", "content": text}
+        else:
+            data["response"] = text
+        return data
+
+    def _stream(self, api: str, model: str, tokens: List[str], delay: float, prompt_tokens: int) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if api == "openai" else "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(delay)
+            if api == "openai":
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                         "choices": [{"index": 0, "delta": {"role": "assistant", "content": token} if i == 0 else {"content": token},
+                                      "finish_reason": None}]}
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+            else:
+                piece = {"message": {"role": "assistant", "content": token}} if api == "ollama_chat" else {"response": token}
+                self._write_chunk(json.dumps({"model": model, "done": False, **piece}) + "\n")
+
+        if api == "openai":
+            final = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                     "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                               "total_tokens": prompt_tokens + len(tokens)}}
+            self._write_chunk(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n")
+        else:
+            final = self._response(api, model, "", prompt_tokens, len(tokens))
+            self._write_chunk(json.dumps(final) + "\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _write_chunk(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+def start_server(config: Optional[FakeLLMConfig] = None, host: str = "127.0.0.1", port: int = 0) -> FakeLLMServer:
+    """Start the fake server on a background thread (port 0 picks a free port)"""
+    server = FakeLLMServer((host, port), config or FakeLLMConfig())
+    thread = threading.Thread(target=server.serve_forever, name="egit-fake-llm", daemon=True)
+    thread.start()
+    return server
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Local OpenAI/Ollama-compatible fake LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8911)
+    parser.add_argument("--ttft", type=float, default=FakeLLMConfig.ttft, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=FakeLLMConfig.tokens_per_sec, help="Generation speed")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests failing with HTTP 429")
+    parser.add_argument("--retry-after", type=float, default=FakeLLMConfig.retry_after, help="Retry-After seconds for 429s")
+    parser.add_argument("--context-length", type=int, default=FakeLLMConfig.context_length, help="Maximum prompt tokens")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Requests processed at once (0 is unlimited)")
+    parser.add_argument("--response", default=None, help="Fixed response text")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config = FakeLLMConfig(
+        ttft=args.ttft,
+        tokens_per_sec=args.tokens_per_sec,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        context_length=args.context_length,
+        max_concurrency=args.max_concurrency,
+        response=args.response,
+        seed=args.seed,
+    )
+    server = FakeLLMServer((args.host, args.port), config)
+    print(f"Fake LLM server listening on {server.url} (OpenAI: {server.url}/v1, Ollama: {server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,19 @@ Git operations module
 """
 import subprocess
 import os
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from pathlib import Path
 from .config import get_config
+from .profiling import span
+from .rawdiff import RawDiff, concat
 
 def get_git_executable() -> str:
     """Get Git executable path from config"""
     config = get_config()
     return config.get("git_executable", "git")
 
-def run_git_command(args: List[str], cwd: Optional[Path] = None) -> str:
-    """Run a git command and return its output"""
+def _run_git(args: List[str], cwd: Optional[Path] = None, text: bool = True):
+    """Run a git command and return its stdout, decoded as UTF-8 when text is set"""
     try:
         # Start with current environment
         env = os.environ.copy()
@@ -26,22 +28,31 @@ def run_git_command(args: List[str], cwd: Optional[Path] = None) -> str:
         })
         
         # Run command with UTF-8 encoding
-        result = subprocess.run(
-            [get_git_executable()] + args,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            env=env,
-            check=True,
-            cwd=cwd
-        )
-        return result.stdout.strip()
+        decoding = {"text": True, "encoding": "utf-8", "errors": "replace"} if text else {}
+        with span("git", command=args[0] if args else ""):
+            result = subprocess.run(
+                [get_git_executable()] + args,
+                capture_output=True,
+                env=env,
+                check=True,
+                cwd=cwd,
+                **decoding
+            )
+        return result.stdout
     except subprocess.CalledProcessError as e:
         if e.stderr:
-            raise Exception(e.stderr.strip())
+            stderr = e.stderr if isinstance(e.stderr, str) else e.stderr.decode("utf-8", errors="replace")
+            raise Exception(stderr.strip())
         raise e
 
+def run_git_command(args: List[str], cwd: Optional[Path] = None) -> str:
+    """Run a git command and return its output"""
+    return _run_git(args, cwd).strip()
+
+def run_git_diff(args: List[str], cwd: Optional[Path] = None) -> RawDiff:
+    """Run a git command that prints a diff and return its lines undecoded"""
+    return RawDiff(_run_git(args, cwd, text=False))
+
 def get_commit_message(commit: str) -> str:
     """Get the commit message for a given commit"""
     return run_git_command(["log", "--format=%B", "-n", "1", commit])
@@ -51,20 +62,18 @@ def get_commit_changes(commit: str) -> List[str]:
     output = run_git_command(["show", "--name-status", "--format=", commit])
     return [line.strip() for line in output.splitlines() if line.strip()]
 
-def get_commit_diff(commit: str) -> List[str]:
+def get_commit_diff(commit: str) -> RawDiff:
     """Get the full diff for a commit"""
-    output = run_git_command(["show", "--patch", "--format=", commit])
-    return output.splitlines()
+    return run_git_diff(["show", "--patch", "--full-index", "--format=", commit])
 
 def get_staged_changes() -> List[str]:
     """Get list of staged changes"""
     output = run_git_command(["diff", "--cached", "--name-status"])
     return [line.strip() for line in output.splitlines() if line.strip()]
 
-def get_staged_diff() -> List[str]:
+def get_staged_diff() -> RawDiff:
     """Get full diff of staged changes"""
-    output = run_git_command(["diff", "--cached", "--patch"])
-    return output.splitlines()
+    return run_git_diff(["diff", "--cached", "--patch", "--full-index"])
 
 def get_branch_changes() -> List[str]:
     """Get list of changes in current branch compared to main/master"""
@@ -97,36 +106,194 @@ def get_branch_changes() -> List[str]:
         # If getting uncommitted changes fails, just return branch changes
         return [line.strip() for line in output.splitlines() if line.strip()]
 
-def get_branch_diff() -> List[str]:
+def get_branch_diff() -> RawDiff:
     """Get full diff of changes in current branch"""
     try:
         # First try to compare with main
         base_branch = "main"
-        output = run_git_command(["diff", "--patch", f"{base_branch}..."])
+        output = run_git_diff(["diff", "--patch", "--full-index", f"{base_branch}..."])
     except Exception:
         try:
             # If main doesn't exist, try master
             base_branch = "master"
-            output = run_git_command(["diff", "--patch", f"{base_branch}..."])
+            output = run_git_diff(["diff", "--patch", "--full-index", f"{base_branch}..."])
         except Exception:
             # If neither exists, show all changes in the current branch
-            output = run_git_command(["diff", "--patch", "HEAD"])
+            output = run_git_diff(["diff", "--patch", "--full-index", "HEAD"])
     
     # Get any uncommitted changes as well
     try:
-        staged_output = run_git_command(["diff", "--cached", "--patch"])
-        unstaged_output = run_git_command(["diff", "--patch"])
+        staged_output = run_git_diff(["diff", "--cached", "--patch", "--full-index"])
+        unstaged_output = run_git_diff(["diff", "--patch", "--full-index"])
         
         # Combine all diffs
-        all_diffs = []
-        all_diffs.extend(output.splitlines())
-        all_diffs.extend(staged_output.splitlines())
-        all_diffs.extend(unstaged_output.splitlines())
-        
-        return all_diffs
+        return concat([output, staged_output, unstaged_output])
     except Exception:
         # If getting uncommitted changes fails, just return branch diff
-        return output.splitlines()
+        return output
+
+def split_diff_by_file(diffs: List[str]) -> List[Dict[str, Any]]:
+    """Split unified diff lines into per-file sections with their blob ids"""
+    with span("diff.split", lines=len(diffs)):
+        if isinstance(diffs, RawDiff):
+            return _split_raw_diff_by_file(diffs)
+        return _split_diff_by_file(diffs)
+
+def _split_raw_diff_by_file(diffs: RawDiff) -> List[Dict[str, Any]]:
+    """Split a raw diff at its file headers; each file's lines are a slice of the same buffer"""
+    files = []
+    start = diffs.find_line(b"diff --git ")
+    while start >= 0:
+        end = diffs.find_line(b"diff --git ", start + 1)
+        lines = diffs.between(start, end)
+        # Only the header lines are decoded, the hunks stay bytes
+        header = _split_diff_by_file(lines.until(b"@@"))[0]
+        files.append(dict(header, lines=lines))
+        start = end
+    return files
+
+def _split_diff_by_file(diffs: List[str]) -> List[Dict[str, Any]]:
+    files = []
+    current = None
+
+    for line in diffs:
+        if line.startswith("diff --git "):
+            # "diff --git a/<path> b/<path>" - use the destination path
+            _, _, paths = line.partition(" b/")
+            current = {"path": paths or line[len("diff --git "):], "old_blob": None, "new_blob": None, "lines": []}
+            files.append(current)
+        elif current is None:
+            continue
+        elif line.startswith("index ") and current["old_blob"] is None:
+            # "index <old>..<new> [mode]"
+            blobs = line.split()[1]
+            if ".." in blobs:
+                current["old_blob"], current["new_blob"] = blobs.split("..", 1)
+
+        if current is not None:
+            current["lines"].append(line)
+
+    return files
+
+def read_blobs(blob_ids: List[str], cwd: Optional[Path] = None) -> Dict[str, str]:
+    """Read many blobs with a single `git cat-file --batch` (missing ones are left out)"""
+    blob_ids = list(dict.fromkeys(blob_ids))
+    if not blob_ids:
+        return {}
+    with span("git", command="cat-file", blobs=len(blob_ids)):
+        result = subprocess.run(
+            [get_git_executable(), "cat-file", "--batch"],
+            input=("\n".join(blob_ids) + "\n").encode(),
+            capture_output=True,
+            check=True,
+            cwd=cwd
+        )
+
+    blobs = {}
+    output = result.stdout
+    position = 0
+    for blob_id in blob_ids:
+        header_end = output.index(b"\n", position)
+        header = output[position:header_end].split()
+        position = header_end + 1
+        if len(header) == 3:
+            size = int(header[2])
+            blobs[blob_id] = output[position:position + size].decode("utf-8", errors="replace")
+            position += size + 1
+    return blobs
+
+def get_changes_from_diff(diffs: List[str]) -> List[str]:
+    """Derive name-status style change lines from a unified diff"""
+    changes = []
+    for file_diff in split_diff_by_file(diffs):
+        status = "M"
+        old_path = None
+        for line in file_diff["lines"]:
+            if line.startswith("new file mode"):
+                status = "A"
+            elif line.startswith("deleted file mode"):
+                status = "D"
+            elif line.startswith("rename from "):
+                status = "R"
+                old_path = line[len("rename from "):]
+            elif line.startswith("@@"):
+                break
+        changes.append(f"{status}\t{old_path}\t{file_diff['path']}" if old_path else f"{status}\t{file_diff['path']}")
+    return changes
+
+def iter_commits_with_patches(rev_range: str, cwd: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
+    """Stream every commit in a range with its message, changes and diff from a single git log"""
+    env = os.environ.copy()
+    env.update({"LANG": "C.UTF-8", "LC_ALL": "C.UTF-8"})
+
+    # Each commit starts with a \x1e line holding the hash; the message ends at a \x1f line.
+    # Merge commits are left out: git log shows them without a patch, and their changes are in the merged commits
+    process = subprocess.Popen(
+        [get_git_executable(), "log", "--patch", "--no-merges", "--full-index", "--format=%x1e%H%n%B%x1f", rev_range],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        cwd=cwd
+    )
+
+    def finish(commit: Dict[str, Any]) -> Dict[str, Any]:
+        while commit["diff"] and commit["diff"][-1] == b"\n":
+            commit["diff"].pop()
+        commit["message"] = "\n".join(commit["message"]).strip()
+        # The patch stays the bytes git wrote; one join instead of a decoded string per line
+        commit["diff"] = RawDiff(b"".join(commit["diff"]))
+        commit["changes"] = get_changes_from_diff(commit["diff"])
+        return commit
+
+    commit = None
+    in_message = False
+    closed = False
+    try:
+        for raw_line in process.stdout:
+            if raw_line.startswith(b"\x1e"):
+                if commit is not None:
+                    yield finish(commit)
+                commit = {"hash": raw_line[1:].decode("ascii").strip(), "message": [], "diff": []}
+                in_message = True
+            elif commit is None:
+                continue
+            elif in_message:
+                line = raw_line.decode("utf-8", errors="replace").rstrip("\n")
+                if line.endswith("\x1f"):
+                    commit["message"].append(line[:-1])
+                    in_message = False
+                else:
+                    commit["message"].append(line)
+            elif raw_line != b"\n" or commit["diff"]:
+                commit["diff"].append(raw_line)
+
+        if commit is not None:
+            yield finish(commit)
+    except GeneratorExit:
+        # The consumer stopped early; git exits on the closed pipe, which isn't a failure
+        closed = True
+        raise
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read().decode("utf-8", errors="replace")
+        process.stderr.close()
+        if process.wait() != 0 and not closed:
+            raise Exception(stderr.strip() or f"git log failed for {rev_range}")
+
+def count_commits(rev_range: str, cwd: Optional[Path] = None) -> int:
+    """Count the commits in a range, leaving out merges like iter_commits_with_patches does"""
+    return int(run_git_command(["rev-list", "--count", "--no-merges", rev_range], cwd=cwd) or 0)
+
+def count_tracked_files(cwd: Optional[Path] = None) -> int:
+    """Count the files in the index (read from its header instead of listing them)"""
+    index_path = Path(run_git_command(["rev-parse", "--git-path", "index"], cwd=cwd))
+    if cwd and not index_path.is_absolute():
+        index_path = Path(cwd) / index_path
+    with open(index_path, "rb") as f:
+        header = f.read(12)
+    if len(header) < 12 or header[:4] != b"DIRC":
+        return 0
+    return int.from_bytes(header[8:12], "big")
 
 def get_current_branch() -> str:
     """Get the name of the current branch"""
@@ -144,44 +311,42 @@ def commit(message: str) -> None:
         raise Exception("No changes staged for commit")
     run_git_command(["commit", "-m", message])
 
-def get_last_tag() -> str:
-    """Get the most recent tag"""
-    return run_git_command(["describe", "--tags", "--abbrev=0"])
-
-def get_root_commit() -> str:
-    """Get the first commit in the repository"""
-    return run_git_command(["rev-list", "--max-parents=0", "HEAD"])
-
-def get_commits_between(from_ref: str, to_ref: str) -> List[Dict[str, Any]]:
-    """Get all commits between two references"""
-    output = run_git_command([
-        "log",
-        "--format=%H%n%s%n%b%n---%n",
-        f"{from_ref}..{to_ref}"
-    ])
-    
+def get_last_tag(version: Optional[str] = None, to_ref: str = "HEAD", cwd: Optional[Path] = None) -> str:
+    """Get the tag of the previous release (the latest version below `version` that to_ref builds on)"""
+    from . import tags
+
+    tag = tags.previous_release(version, to_ref, cwd=cwd)
+    if not tag:
+        raise Exception("No previous tags found")
+    return tag
+
+def get_root_commit(ref: str = "HEAD", cwd: Optional[Path] = None) -> str:
+    """Get the first commit in the repository (the oldest root when histories were merged)"""
+    return run_git_command(["rev-list", "--max-parents=0", ref], cwd=cwd).splitlines()[-1]
+
+def get_commits_between(from_ref: str, to_ref: str, with_paths: bool = False, cwd: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """Get all commits between two references (with the paths each touched when with_paths is set)"""
+    # Each commit starts with a \x1e; its message ends at a \x1f, followed by its paths with --name-only,
+    # so the range is walked once either way
+    args = ["log", "--format=%x1e%H%n%s%n%b%x1f"]
+    if with_paths:
+        args.append("--name-only")
+    # Not stripped: Python counts \x1e and \x1f as whitespace
+    output = _run_git(args + [f"{from_ref}..{to_ref}"], cwd)
+
     commits = []
-    current_commit = {}
-    
-    for line in output.splitlines():
-        if not line.strip():
-            continue
-        
-        if line == "---":
-            if current_commit:
-                commits.append(current_commit)
-                current_commit = {}
-        elif not current_commit:
-            current_commit = {"hash": line, "message": "", "body": []}
-        elif "message" not in current_commit:
-            current_commit["message"] = line
-        else:
-            current_commit["body"].append(line)
-    
-    # Add the last commit if there is one
-    if current_commit:
-        commits.append(current_commit)
-    
+    for record in output.split("\x1e")[1:]:
+        message, _, paths = record.partition("\x1f")
+        lines = message.splitlines()
+        commit = {
+            "hash": lines[0].strip(),
+            "message": lines[1] if len(lines) > 1 else "",
+            "body": [line for line in lines[2:] if line.strip()],
+        }
+        if with_paths:
+            commit["paths"] = [line for line in paths.splitlines() if line.strip()]
+        commits.append(commit)
+
     return commits
 
 def has_uncommitted_changes() -> bool:
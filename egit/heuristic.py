@@ -0,0 +1,126 @@
+"""
+Offline commit message generation from name-status lines and diff stats
+"""
+import posixpath
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .validation import MAX_SUBJECT_LENGTH
+
+# Order in which change kinds are mentioned
+VERBS = {"A": "Add", "M": "Update", "D": "Remove", "R": "Rename", "C": "Copy", "T": "Update"}
+VERB_ORDER = ["Add", "Update", "Remove", "Rename", "Copy"]
+
+def parse_change(change: str) -> Optional[Tuple[str, List[str]]]:
+    """Split a name-status line ("M\\tpath", "R100\\told\\tnew" or "M path") into status letter and paths"""
+    parts = change.split("\t") if "\t" in change else change.split()
+    if len(parts) < 2 or not parts[0]:
+        return None
+    return parts[0][0].upper(), parts[1:]
+
+def count_changed_lines(diffs: List[str]) -> Dict[str, int]:
+    """Count added plus removed lines per file in a unified diff"""
+    counts: Dict[str, int] = {}
+    path = None
+    for line in diffs:
+        if line.startswith("diff --git "):
+            path = line.rsplit(" b/", 1)[-1]
+            counts.setdefault(path, 0)
+        elif path and line[:1] in ("+", "-") and not line.startswith(("+++ ", "--- ")):
+            counts[path] += 1
+    return counts
+
+def common_scope(paths: List[str]) -> str:
+    """Get the deepest directory containing every path ('' when they share none)"""
+    directories = [posixpath.dirname(path) for path in paths]
+    if not directories or any(not directory for directory in directories):
+        return ""
+    return posixpath.commonpath(directories)
+
+def _join(names: List[str]) -> str:
+    return names[0] if len(names) == 1 else ", ".join(names[:-1]) + " and " + names[-1]
+
+def _clause(verb: str, items: List[Tuple[str, ...]], detailed: bool) -> str:
+    if verb in ("Rename", "Copy") and len(items) == 1:
+        old, new = items[0][0], items[0][-1]
+        target = posixpath.basename(new) if posixpath.dirname(old) == posixpath.dirname(new) else new
+        return f"{verb} {posixpath.basename(old)} to {target}"
+    names = [posixpath.basename(item[-1]) for item in items]
+    if detailed and len(names) <= 3:
+        return f"{verb} {_join(names)}"
+    if detailed:
+        return f"{verb} {names[0]} and {len(names) - 1} other files"
+    return f"{verb} {len(names)} file{'s' if len(names) > 1 else ''}"
+
+def generate_message(changes: List[str], diffs: Optional[List[str]] = None) -> str:
+    """Generate a one-line commit message locally, without a model
+
+    Files are named most-changed first (by diff line counts when diffs are given),
+    and the common directory of all paths becomes the scope ("... in egit/db").
+    """
+    line_counts = count_changed_lines(diffs or [])
+    groups: Dict[str, List[Tuple[str, ...]]] = {}
+    all_paths = []
+    for change in changes:
+        parsed = parse_change(change)
+        if not parsed:
+            continue
+        status, paths = parsed
+        groups.setdefault(VERBS.get(status, "Update"), []).append(tuple(paths))
+        all_paths.extend(paths)
+
+    if not groups:
+        return "Update files"
+
+    for items in groups.values():
+        items.sort(key=lambda item: -line_counts.get(item[-1], 0))
+
+    scope = common_scope(all_paths)
+    suffix = f" in {scope}" if scope else ""
+    verbs = [verb for verb in VERB_ORDER if verb in groups]
+
+    # Most specific wording first, falling back to counts until the subject fits
+    for detailed in (True, False):
+        clauses = [_clause(verb, groups[verb], detailed) for verb in verbs]
+        clauses = [clauses[0]] + [clause[0].lower() + clause[1:] for clause in clauses[1:]]
+        for message in (", ".join(clauses) + suffix, ", ".join(clauses)):
+            if len(message) < MAX_SUBJECT_LENGTH:
+                return message
+
+    total = sum(len(items) for items in groups.values())
+    verb = verbs[0] if len(verbs) == 1 else "Update"
+    return f"{verb} {total} files{suffix}"[:MAX_SUBJECT_LENGTH - 1]
+
+def summarize_with_fallback(changes: List[str], diffs: List[str], deadline: Optional[float] = None,
+                            stats: Optional[Dict[str, Any]] = None, overrides: Optional[Dict[str, Any]] = None) -> str:
+    """Summarize with the LLM, falling back to the offline message if it fails or misses the deadline (seconds)
+
+    On fallback stats gets tier 'heuristic' and a 'fallback_reason'.
+    """
+    from . import llm
+
+    stats = stats if stats is not None else {}
+    llm_stats: Dict[str, Any] = {}
+    result: Dict[str, Any] = {}
+
+    def run() -> None:
+        try:
+            result["summary"] = llm.summarize_changes(changes, diffs, stats=llm_stats, overrides=overrides)
+        except Exception as e:
+            result["error"] = e
+
+    if deadline:
+        # A daemon thread, so a model that never answers can't keep the process alive after we move on
+        thread = threading.Thread(target=run, name="egit-summary", daemon=True)
+        thread.start()
+        thread.join(deadline)
+    else:
+        run()
+
+    if "summary" in result:
+        stats.update(llm_stats)
+        return result["summary"]
+
+    reason = str(result["error"]) if "error" in result else f"no answer within {deadline:g}s"
+    stats.update(model="heuristic", tier="heuristic", fallback_reason=reason)
+    return generate_message(changes, diffs)
@@ -0,0 +1,74 @@
+"""
+Incremental release notes: keep each range's categorized bullets and only process new commits
+"""
+from typing import Any, Dict, List, Optional
+
+from . import cache
+from . import clustering
+from . import llm
+from .profiling import span
+
+# Bump whenever the stored structure changes so old drafts are rebuilt
+STATE_VERSION = "1"
+
+def state_key(base: str, overrides: Optional[Dict[str, Any]] = None) -> str:
+    """Get the cache key of the draft built on top of a base commit"""
+    return cache.make_key(base, llm.get_llm_config(overrides)["model"], llm.PROMPT_VERSION, STATE_VERSION)
+
+def merge_sections(sections: Dict[str, List[str]], new: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Append new bullets to their sections, skipping ones already present"""
+    merged = {section: list(bullets) for section, bullets in sections.items()}
+    for section, bullets in new.items():
+        existing = merged.setdefault(section, [])
+        seen = {bullet.lower() for bullet in existing}
+        for bullet in bullets:
+            if bullet.lower() not in seen:
+                existing.append(bullet)
+                seen.add(bullet.lower())
+    return merged
+
+def find_delta(commits: List[Dict[str, Any]], state: Optional[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """Get the commits not yet in a stored draft (None when the draft can't be extended and must be rebuilt)
+
+    A draft is rebuilt when commits it covered left the range (a rebase or a
+    different branch) or when a new commit is a revert, which may cancel a
+    change already among its bullets.
+    """
+    if not state:
+        return None
+    hashes = {commit["hash"] for commit in commits}
+    seen = set(state["hashes"])
+    if not seen <= hashes:
+        return None
+    delta = [commit for commit in commits if commit["hash"] not in seen]
+    if any(clustering.REVERT_PATTERN.match(commit["message"]) for commit in delta):
+        return None
+    return delta
+
+def generate_release_notes(commits: List[Dict[str, Any]], version: str, base: str,
+                           stats: Optional[Dict[str, Any]] = None, overrides: Optional[Dict[str, Any]] = None) -> str:
+    """Generate release notes for base..commits, categorizing only the commits added since the last run
+
+    The categorized bullets are stored per base commit and model; the final
+    pass only writes the summary line, so a refresh after a push costs one
+    small prompt for the new commits and one for the summary.
+    """
+    stats = stats if stats is not None else {}
+    key = state_key(base, overrides)
+    state = cache.get("release_drafts", key)
+    delta = find_delta(commits, state)
+
+    if delta is None:
+        sections: Dict[str, List[str]] = {}
+        delta = commits
+    else:
+        sections = state["sections"]
+    stats.update(new_commits=len(delta), reused_commits=len(commits) - len(delta))
+
+    if delta:
+        with span("release_notes.categorize", commits=len(delta)):
+            sections = merge_sections(sections, llm.categorize_commits(delta, stats, overrides))
+        cache.put("release_drafts", key, {"hashes": [commit["hash"] for commit in commits], "sections": sections})
+
+    with span("release_notes.format"):
+        return llm.format_release_notes(sections, version, stats, overrides)
@@ -2,9 +2,33 @@
 LLM integration for eGit using LiteLLM
 """
 from typing import Optional, List, Dict, Any
+import litellm
 from litellm import completion
-from .config import load_config, get_config
+from .config import load_config, get_config, as_bool
+from . import cache
+from . import clustering
+from . import context
+from . import git
+from . import packages
+from . import profiling
+from . import rawdiff
+from . import ratelimit
+from . import routing
+from . import symbols
+from . import validation
+from .profiling import span
+import json
 import os
+import sys
+import time
+
+# LiteLLM prints a help banner to stdout with every failed call, which would corrupt --json output
+litellm.suppress_debug_info = True
+
+# Bump whenever the summary prompts change so cached partial summaries are invalidated
+PROMPT_VERSION = "1"
+
+_announced_model = None
 
 SUMMARY_PROMPT = """
 You are a helpful assistant that summarizes Git commit messages. Please summarize all of the changes this person has made to their code based off the commit messages.
@@ -31,8 +55,8 @@ def setup_llm_env():
         if config.get("llm_api_base"):
             os.environ["OPENAI_API_BASE"] = config["llm_api_base"]
 
-def get_llm_config() -> Dict[str, Any]:
-    """Get LLM configuration"""
+def get_llm_config(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Get LLM configuration (overrides replace individual settings, e.g. model or temperature)"""
     config = get_config()
     setup_llm_env()
     model = config.get("llm_model", "ollama/llama3.2:3b")
@@ -52,7 +76,14 @@ def get_llm_config() -> Dict[str, Any]:
     if provider == "gemini" or provider == "vertex_ai":
         LLM_CONFIG["api_base"] = None # Let LiteLLM handle this
 
-    print(f"Using LLM model: {LLM_CONFIG['model']}")
+    if overrides:
+        LLM_CONFIG.update(overrides)
+
+    # Only announce the model once, batch runs call this for every commit
+    global _announced_model
+    if LLM_CONFIG["model"] != _announced_model:
+        print(f"Using LLM model: {LLM_CONFIG['model']}", file=sys.stderr)
+        _announced_model = LLM_CONFIG["model"]
     
     return LLM_CONFIG
 
@@ -71,19 +102,107 @@ async def get_llm_response(prompt: str, max_tokens: Optional[int] = None) -> str
     except Exception as e:
         raise Exception(f"Error getting LLM response: {str(e)}")
 
-def summarize_changes(changes: List[str], diffs: List[str]) -> str:
-    """Generate a natural language summary of the changes"""
+def _complete(messages: List[Dict[str, str]], llm_config: Dict[str, Any], stats: Optional[Dict[str, Any]] = None) -> str:
+    """Run a chat completion and accumulate its latency and token usage into stats
+
+    Concurrent egit processes asking the same thing share a single LLM call,
+    and its answer is reused for response_cache_ttl seconds (a sampled
+    answer shouldn't be frozen for good).
+    """
     config = get_config()
-    
-    # Setup environment variables
-    setup_llm_env()
-    
-    # Prepare the prompt with both file changes and diffs
-    changes_text = "\n".join(changes)
-    diff_text = "\n".join(diffs)
-    
-    # Create a more specific system prompt
-    system_prompt = """You are a Git commit message generator. You will ONLY output a single line commit message.
+    if not as_bool(config.get("response_cache", True)):
+        return _complete_uncached(messages, llm_config, stats)
+
+    key = cache.make_key(json.dumps(messages, sort_keys=True), *(llm_config.get(name) for name in ("model", "temperature", "max_tokens")))
+    started = time.perf_counter()
+    computed = False
+
+    def compute() -> str:
+        nonlocal computed
+        computed = True
+        return _complete_uncached(messages, llm_config, stats)
+
+    content = cache.single_flight(
+        "responses", key, compute,
+        timeout=float(config.get("response_wait_timeout", 120)),
+        max_age=float(config.get("response_cache_ttl", 60)),
+        max_entries=int(config.get("response_cache_max_entries", 1000))
+    )
+    if not computed and stats is not None:
+        stats["model"] = llm_config.get("model")
+        stats["prompt"] = messages[-1]["content"]
+        stats["latency_ms"] = stats.get("latency_ms", 0.0) + (time.perf_counter() - started) * 1000
+    return content
+
+def _complete_uncached(messages: List[Dict[str, str]], llm_config: Dict[str, Any], stats: Optional[Dict[str, Any]] = None) -> str:
+    """Run a chat completion without the response cache"""
+    started = time.perf_counter()
+    endpoints = routing.get_endpoints(llm_config)
+    with span("llm.completion", model=llm_config.get("model")) as call_span:
+        if endpoints:
+            response, endpoint = ratelimit.call(
+                lambda: routing.complete(endpoints, messages, llm_config),
+                _estimate_prompt_tokens(messages),
+                llm_config.get("max_tokens"),
+                lambda result: _total_tokens(result[0])
+            )
+            llm_config = llm_config | {"model": endpoint.get("model", llm_config.get("model"))}
+            call_span.set(endpoint=endpoint["name"])
+        elif profiling.is_enabled():
+            response = ratelimit.call(
+                lambda: _complete_streaming(messages, llm_config, call_span, started),
+                _estimate_prompt_tokens(messages),
+                llm_config.get("max_tokens"),
+                _total_tokens
+            )
+        else:
+            response = ratelimit.call(
+                lambda: completion(
+                    messages=messages,
+                    **llm_config
+                ),
+                _estimate_prompt_tokens(messages),
+                llm_config.get("max_tokens"),
+                _total_tokens
+            )
+        content = response.choices[0].message.content.strip()
+        usage = getattr(response, "usage", None)
+        call_span.set(
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None)
+        )
+
+    if stats is not None:
+        stats["model"] = llm_config.get("model")
+        stats["prompt"] = messages[-1]["content"]
+        stats["latency_ms"] = stats.get("latency_ms", 0.0) + (time.perf_counter() - started) * 1000
+        for name in ("prompt_tokens", "completion_tokens"):
+            value = getattr(usage, name, None)
+            if isinstance(value, int):
+                stats[name] = stats.get(name, 0) + value
+
+    return content
+
+def _estimate_prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    return sum(ratelimit.estimate_tokens(message["content"]) for message in messages)
+
+def _total_tokens(response: Any) -> Optional[int]:
+    """Get the tokens a response counted against the tokens/min budget"""
+    value = getattr(getattr(response, "usage", None), "total_tokens", None)
+    return value if isinstance(value, int) else None
+
+def _complete_streaming(messages: List[Dict[str, str]], llm_config: Dict[str, Any], call_span, started: float):
+    """Stream a completion to measure time to first token, then rebuild the full response"""
+    from litellm import stream_chunk_builder
+
+    chunks = []
+    for chunk in completion(messages=messages, stream=True, **llm_config):
+        if not chunks:
+            call_span.set(ttft_ms=(time.perf_counter() - started) * 1000)
+        chunks.append(chunk)
+    return stream_chunk_builder(chunks, messages=messages)
+
+SUMMARY_SYSTEM_PROMPT = """You are a Git commit message generator. You will ONLY output a single line commit message.
     Your response must:
     1. Start with a verb in present tense
     2. Be under 72 characters
@@ -93,6 +212,20 @@ def summarize_changes(changes: List[str], diffs: List[str]) -> str:
     6. NOT give suggestions or improvements
     """
 
+FILE_SUMMARY_SYSTEM_PROMPT = """You are a Git change describer. You will ONLY output a single line describing the change to ONE file.
+    Your response must:
+    1. Start with a verb in present tense
+    2. Be under 100 characters
+    3. Mention the file or the component it belongs to
+    4. NOT explain or justify the changes
+    """
+
+def build_summary_prompt(changes: List[str], diffs: List[str]) -> str:
+    """Build the user prompt for a one-line commit message"""
+    # Prepare the prompt with both file changes and diffs
+    changes_text = "\n".join(changes)
+    diff_text = rawdiff.join(diffs)
+
     # Create a more structured user prompt
     prompt = f"""Git changes to summarize:
 
@@ -113,6 +246,73 @@ def summarize_changes(changes: List[str], diffs: List[str]) -> str:
     YOUR RESPONSE MUST BE EXACTLY ONE LINE WITH NO EXPLANATION OR EXTRA TEXT.
     RESPOND WITH ONLY THE COMMIT MESSAGE:
     """
+    return prompt
+
+def summarize_changes(changes: List[str], diffs: List[str], stats: Optional[Dict[str, Any]] = None,
+                      overrides: Optional[Dict[str, Any]] = None) -> str:
+    """Generate a natural language summary of the changes (latency, token usage and the answering tier are added to stats)
+
+    With llm_fast_model set, small diffs go to the fast model first and only
+    escalate to the configured model when its answer breaks the commit message rules.
+    """
+    config = get_config()
+    stats = stats if stats is not None else {}
+
+    fast_model = config.get("llm_fast_model")
+    if fast_model and not (overrides and "model" in overrides):
+        if len(diffs) <= int(config.get("llm_fast_max_diff_lines", 400)):
+            try:
+                summary = _summarize_changes(changes, diffs, stats, {**(overrides or {}), "model": fast_model})
+                if not validation.check_commit_message(summary):
+                    stats["tier"] = "fast"
+                    return summary
+            except Exception:
+                pass  # An unreachable fast model must not fail the summary
+            # Escalate; the fast attempt's latency and tokens stay in stats as the cost of the cascade
+            stats["tier"] = "escalated"
+        else:
+            stats["tier"] = "primary"
+
+    return _summarize_changes(changes, diffs, stats, overrides)
+
+def get_symbols_mode() -> str:
+    """Get how symbol facts are used in summary prompts: replace hunks, alongside them or off"""
+    mode = str(get_config().get("summary_symbols", "replace")).lower()
+    if mode in ("false", "0", "no", "none"):
+        return "off"
+    return mode if mode in ("replace", "alongside", "off") else "replace"
+
+def _summarize_changes(changes: List[str], diffs: List[str], stats: Dict[str, Any],
+                       overrides: Optional[Dict[str, Any]] = None) -> str:
+    """Generate a summary of the changes with a single model"""
+    config = get_config()
+
+    # Setup environment variables
+    setup_llm_env()
+
+    # Hunks of source files become the functions and classes they touch, which is most of what a summary needs
+    symbols_mode = get_symbols_mode()
+    if symbols_mode != "off":
+        with span("symbols.condense", lines=len(diffs)):
+            diffs = symbols.condense_diff(diffs, keep_hunks=symbols_mode == "alongside")
+
+    # Large diffs are reduced to stats or a per-directory rollup so prompt size stays bounded
+    with span("context.select", lines=len(diffs)) as context_span:
+        changes, diffs, tier = context.select_diff_context(changes, diffs)
+        context_span.set(tier=tier)
+    stats["context_tier"] = tier
+
+    # Multi-file diffs are summarized file by file so unchanged files can be served from the cache
+    if tier == context.FULL:
+        file_diffs = git.split_diff_by_file(diffs)
+        if as_bool(config.get("summary_cache", True)) and len(file_diffs) > 1:
+            try:
+                return summarize_file_diffs(changes, file_diffs, stats, overrides)
+            except Exception as e:
+                raise Exception(f"Error generating summary: {str(e)}")
+    
+    with span("prompt.build"):
+        prompt = build_summary_prompt(changes, diffs)
 
     # print("Using the Following Prompt:")
     # print(prompt)
@@ -123,44 +323,125 @@ def summarize_changes(changes: List[str], diffs: List[str]) -> str:
     # Get response from LLM
     try:
         MESSAGES = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
             {"role": "user", "content": prompt}
         ]
 
         # print("Using the Following Messages:")
         # print(MESSAGES)
 
-        llm_config = get_llm_config()
-        response = completion(
-            messages=MESSAGES,
-            **llm_config
-        )
-        
-        # Clean up the response
-        summary = response.choices[0].message.content.strip()
+        llm_config = get_llm_config(overrides)
+        summary = _complete(MESSAGES, llm_config, stats)
                 
         return summary
     except Exception as e:
-        return f"Error generating summary: {str(e)}"
+        raise Exception(f"Error generating summary: {str(e)}")
 
-def generate_release_notes(commits: List[Dict[str, Any]], version: str) -> str:
-    """Generate release notes from a list of commits"""
-    llm_config = get_llm_config()
-    
-    # Format commits for the prompt
+def summarize_file_diffs(changes: List[str], file_diffs: List[Dict[str, Any]], stats: Optional[Dict[str, Any]] = None,
+                         overrides: Optional[Dict[str, Any]] = None) -> str:
+    """Summarize a diff file by file, reusing cached partial summaries and summarizing the rest at once"""
+    llm_config = get_llm_config(overrides)
+    model = llm_config["model"]
+    symbols_mode = get_symbols_mode()
+
+    found: Dict[int, str] = {}
+    missing: Dict[int, Any] = {}  # file index to (cache key, file diff)
+    for index, file_diff in enumerate(file_diffs):
+        if file_diff["old_blob"] and file_diff["new_blob"]:
+            # The symbols mode decides whether the file was sent as hunks or facts
+            key = cache.make_key(file_diff["path"], file_diff["old_blob"], file_diff["new_blob"], model, PROMPT_VERSION,
+                                 symbols_mode)
+        else:
+            # Pure renames and mode changes carry no blob ids, so key on the diff text itself
+            key = cache.make_key(file_diff["path"], rawdiff.to_bytes(file_diff["lines"]), model, PROMPT_VERSION,
+                                 symbols_mode)
+
+        part = cache.get("file_summaries", key)
+        if part is None:
+            missing[index] = (key, file_diff)
+        else:
+            found[index] = part
+
+    # Uncached files are independent calls, so they run at once (bounded by llm_max_concurrency and the rate limiter)
+    file_stats = {index: {} for index in missing}
+    results = packages.run_concurrently(
+        missing, lambda index, item: _summarize_file(item[1], llm_config, file_stats[index])
+    )
+    for index, part in results.items():
+        if isinstance(part, Exception):
+            raise part
+        cache.put("file_summaries", missing[index][0], part)
+        found[index] = part
+    if stats is not None and file_stats:
+        for name, value in packages.combine_stats(list(file_stats.values())).items():
+            if name in ("latency_ms", "prompt_tokens", "completion_tokens"):
+                stats[name] = stats.get(name, 0) + value
+            else:
+                stats[name] = value
+    parts = [found[index] for index in range(len(file_diffs))]
+
+    # Compose the final message from the partial summaries
+    parts_text = "\n".join(f"- {part}" for part in parts)
+    # The change list is in the prompt too: the same descriptions can belong to different files
+    key = cache.make_key("\n".join(changes), parts_text, model, PROMPT_VERSION)
+    summary = cache.get("commit_summaries", key)
+    if summary is None:
+        prompt = f"""Per-file descriptions of the staged changes:
+
+    Changes: {chr(10).join(changes)}
+
+    File descriptions:
+{parts_text}
+
+    INSTRUCTIONS:
+    1. Combine the descriptions into ONE LINE starting with a present-tense verb
+    2. Focus on the most important change
+    3. Keep it under 72 characters
+
+    RESPOND WITH ONLY THE COMMIT MESSAGE:
+    """
+        summary = _complete([
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ], llm_config, stats)
+        cache.put("commit_summaries", key, summary)
+
+    return summary
+
+def _summarize_file(file_diff: Dict[str, Any], llm_config: Dict[str, Any], stats: Optional[Dict[str, Any]] = None) -> str:
+    """Generate a one-line description of the changes to a single file"""
+    diff_text = rawdiff.join(file_diff["lines"])
+    prompt = f"""File: {file_diff['path']}
+
+    Diff: {diff_text}
+
+    RESPOND WITH ONLY ONE LINE DESCRIBING THE CHANGE TO THIS FILE:
+    """
+    return _complete([
+        {"role": "system", "content": FILE_SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ], llm_config, stats)
+
+def format_commit_list(commits: List[Dict[str, Any]]) -> str:
+    """Format commits for a prompt"""
     commit_list = []
     for commit in commits:
         commit_text = f"Commit: {commit['hash']}\n"
         commit_text += f"Message: {commit['message']}\n"
+        if commit.get("count", 1) > 1:
+            commit_text += f"Similar commits: {commit['count']}\n"
         if commit['body']:
             commit_text += f"Details: {' '.join(commit['body'])}"
         commit_list.append(commit_text)
-    
+    return "\n".join(commit_list)
+
+def build_release_notes_prompt(commits: List[Dict[str, Any]], version: str) -> str:
+    """Build the user prompt for release notes"""
     # Create the prompt
     prompt = f"""Generate a very concise release note for version {version} suitable for a git tag message.
 
 Commits:
-{chr(10).join(commit_list)}
+{format_commit_list(commits)}
 
 Requirements:
 1. First line must be a clear, complete summary (this is what GitHub shows in the UI)
@@ -183,18 +464,94 @@ Requirements:
 6. The first line must make sense on its own as it will be shown separately
 
 ONLY respond with the release notes in the exact format above. Keep it very concise."""
+    return prompt
 
-    # Call the LLM
-    response = completion(
-        messages=[{
-            "role": "system",
-            "content": "You are an expert at writing clear, concise release notes for git tags that display well on GitHub."
-        }, {
-            "role": "user",
-            "content": prompt
-        }],
-        **llm_config
-    )
+def _prepare_release_commits(commits: List[Dict[str, Any]], stats: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Fold duplicate commits and cut the list down to the context budget"""
+    # Noisy ranges are folded into one entry per change before anything is cut for size
+    if as_bool(get_config().get("release_notes_cluster", True)):
+        with span("commits.cluster", commits=len(commits)) as cluster_span:
+            clustered = clustering.cluster_commits(commits)
+            cluster_span.set(clusters=len(clustered))
+        if stats is not None:
+            stats.update(commits=len(commits), clusters=len(clustered))
+        commits = clustered
+
+    # Long ranges drop commit bodies, then list only the commits that fit
+    commits, tier = context.select_commit_context(commits)
+    if stats is not None:
+        stats["context_tier"] = tier
+    return commits
+
+def generate_release_notes(commits: List[Dict[str, Any]], version: str, stats: Optional[Dict[str, Any]] = None,
+                           overrides: Optional[Dict[str, Any]] = None) -> str:
+    """Generate release notes from a list of commits (latency and token usage are added to stats)"""
+    llm_config = get_llm_config(overrides)
+    commits = _prepare_release_commits(commits, stats)
     
-    # Extract and return the release notes
-    return response.choices[0].message.content.strip()
+    with span("prompt.build"):
+        prompt = build_release_notes_prompt(commits, version)
+
+    # Call the LLM
+    return _complete([{
+        "role": "system",
+        "content": "You are an expert at writing clear, concise release notes for git tags that display well on GitHub."
+    }, {
+        "role": "user",
+        "content": prompt
+    }], llm_config, stats)
+
+CATEGORIZE_SYSTEM_PROMPT = """You sort git commits into release note sections. You will ONLY output section headers and bullet points.
+
+Rules:
+1. Use only these headers: FEATURES:, FIXES:, CHANGES:
+2. One short plain-text bullet per change, starting with "- "
+3. Leave out sections without changes and merge commits that describe the same change
+4. No summary line, no markdown, no commentary"""
+
+def build_categorize_prompt(commits: List[Dict[str, Any]]) -> str:
+    """Build the user prompt that sorts commits into release note sections"""
+    return f"Sort these commits into release note sections:\n\n{format_commit_list(commits)}"
+
+def parse_sections(text: str) -> Dict[str, List[str]]:
+    """Parse FEATURES:/FIXES:/CHANGES: sections with "- " bullets (bullets before any header count as changes)"""
+    sections: Dict[str, List[str]] = {}
+    current = "CHANGES:"
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.upper() in validation.RELEASE_NOTE_SECTIONS:
+            current = stripped.upper()
+        elif stripped.startswith(("-", "*")) and stripped.lstrip("-* ").strip():
+            sections.setdefault(current, []).append(stripped.lstrip("-* ").strip())
+    return sections
+
+def categorize_commits(commits: List[Dict[str, Any]], stats: Optional[Dict[str, Any]] = None,
+                       overrides: Optional[Dict[str, Any]] = None) -> Dict[str, List[str]]:
+    """Sort commits into release note sections of short bullets"""
+    llm_config = get_llm_config(overrides)
+    commits = _prepare_release_commits(commits, stats)
+    with span("prompt.build"):
+        prompt = build_categorize_prompt(commits)
+    return parse_sections(_complete([
+        {"role": "system", "content": CATEGORIZE_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ], llm_config, stats))
+
+def format_release_notes(sections: Dict[str, List[str]], version: str, stats: Optional[Dict[str, Any]] = None,
+                         overrides: Optional[Dict[str, Any]] = None) -> str:
+    """Write the summary line for categorized bullets and lay out the final release notes"""
+    body = []
+    for section in validation.RELEASE_NOTE_SECTIONS:
+        if sections.get(section):
+            body.extend(["", section] + [f"- {bullet}" for bullet in sections[section]])
+    if not body:
+        return f"Release {version}"
+
+    prompt = (f"Write a one-line summary of release {version} that can stand alone (it is shown on its own on GitHub). "
+              f"Plain text only.\n{chr(10).join(body)}")
+    summary = _complete([
+        {"role": "system", "content": "You are an expert at writing clear, concise release notes for git tags that display well on GitHub."},
+        {"role": "user", "content": prompt}
+    ], get_llm_config(overrides), stats)
+    summary = next((line.strip() for line in summary.splitlines() if line.strip()), f"Release {version}")
+    return "\n".join([summary] + body)
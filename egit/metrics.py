@@ -0,0 +1,173 @@
+"""
+Aggregated latency and throughput metrics for eGit
+"""
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from . import cache
+
+# Upper bounds (tracked files) of the repository size buckets git timings are grouped by
+REPO_SIZE_BUCKETS = [1_000, 10_000, 100_000]
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Get the pct-th percentile of values using linear interpolation"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def start_run() -> float:
+    """Reset the per-run counters and return the start time for record_run"""
+    cache.reset_stats()
+    return time.perf_counter()
+
+def record_run(command_type: str, started: float, git_ms: Optional[float] = None,
+               stats: Optional[Dict[str, Any]] = None) -> None:
+    """Record the metrics of a finished command run in the local database"""
+    from . import db
+    from . import git
+
+    stats = stats or {}
+    try:
+        repo_files = git.count_tracked_files()
+    except Exception:
+        repo_files = None
+    # Only lookups of LLM results count; routing, tag and symbol lookups would skew the hit rate
+    cache_stats = cache.get_stats(cache.LLM_NAMESPACES)
+    db.record_metrics(
+        command_type,
+        model=stats.get("model"),
+        total_ms=(time.perf_counter() - started) * 1000,
+        git_ms=git_ms,
+        llm_ms=stats.get("latency_ms"),
+        prompt_tokens=stats.get("prompt_tokens"),
+        completion_tokens=stats.get("completion_tokens"),
+        cache_hits=cache_stats["hits"],
+        cache_misses=cache_stats["misses"],
+        repo_files=repo_files,
+    )
+
+def _summarize(values: Iterable[Optional[float]]) -> Dict[str, Any]:
+    values = [value for value in values if value is not None]
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "mean_ms": sum(values) / len(values) if values else None,
+    }
+
+def _repo_size_bucket(files: Optional[int]) -> str:
+    if files is None:
+        return "unknown"
+    lower = 0
+    for upper in REPO_SIZE_BUCKETS:
+        if files < upper:
+            return f"{lower}-{upper - 1} files"
+        lower = upper
+    return f"{lower}+ files"
+
+def _week(created_at: datetime) -> str:
+    year, week, _ = created_at.isocalendar()
+    return f"{year}-W{week:02d}"
+
+def build_report(days: Optional[int] = 30) -> Dict[str, Any]:
+    """Compute percentiles, throughput, cache hit rates and weekly trends from the stored metrics"""
+    from . import db
+
+    db.flush_history()
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    calls = db.get_llm_timings(since)
+    runs = db.get_metrics(since)
+
+    by_model: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for call in calls:
+        by_model[call["model"] or "unknown"].append(call)
+    models = []
+    for model, model_calls in sorted(by_model.items()):
+        # Throughput over the whole call (prompt processing included), summed across calls
+        timed = [call for call in model_calls if call["completion_tokens"] and call["latency_ms"]]
+        total_seconds = sum(call["latency_ms"] for call in timed) / 1000
+        models.append({
+            "model": model,
+            **_summarize(call["latency_ms"] for call in model_calls),
+            "prompt_tokens": sum(call["prompt_tokens"] or 0 for call in model_calls),
+            "completion_tokens": sum(call["completion_tokens"] or 0 for call in model_calls),
+            "tokens_per_sec": sum(call["completion_tokens"] for call in timed) / total_seconds if total_seconds else None,
+        })
+
+    by_command: Dict[str, List[Any]] = defaultdict(list)
+    by_size: Dict[str, List[float]] = defaultdict(list)
+    for run in runs:
+        by_command[run.command_type].append(run)
+        if run.git_ms is not None:
+            by_size[_repo_size_bucket(run.repo_files)].append(run.git_ms)
+    commands = []
+    for command_type, command_runs in sorted(by_command.items()):
+        hits = sum(run.cache_hits or 0 for run in command_runs)
+        lookups = hits + sum(run.cache_misses or 0 for run in command_runs)
+        commands.append({
+            "command": command_type,
+            **_summarize(run.total_ms for run in command_runs),
+            "git_p50_ms": percentile([run.git_ms for run in command_runs if run.git_ms is not None], 50),
+            "cache_hit_rate": hits / lookups if lookups else None,
+        })
+    git_by_size = [{"repo_size": bucket, **_summarize(values)} for bucket, values in sorted(by_size.items())]
+
+    weekly: Dict[tuple, List[float]] = defaultdict(list)
+    for call in calls:
+        if call["created_at"] is not None:
+            weekly[(_week(call["created_at"]), call["model"] or "unknown")].append(call["latency_ms"])
+    trend = [
+        {"week": week, "model": model, "count": len(values), "p50_ms": percentile(values, 50)}
+        for (week, model), values in sorted(weekly.items())
+    ]
+
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "days": days,
+        "models": models,
+        "commands": commands,
+        "git_by_repo_size": git_by_size,
+        "trend": trend,
+    }
+
+def _label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def to_prometheus(report: Dict[str, Any]) -> str:
+    """Render a report in the Prometheus text exposition format (for the node_exporter textfile collector)"""
+    lines = []
+
+    def gauge(name: str, help_text: str, samples: List[tuple]) -> None:
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            return
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_label(val)}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}")
+
+    models = report["models"]
+    gauge("egit_llm_latency_ms", "LLM call latency percentiles in milliseconds",
+          [({"model": m["model"], "quantile": "0.5"}, m["p50_ms"]) for m in models]
+          + [({"model": m["model"], "quantile": "0.95"}, m["p95_ms"]) for m in models])
+    gauge("egit_llm_calls", "Number of LLM calls in the report window",
+          [({"model": m["model"]}, m["count"]) for m in models])
+    gauge("egit_llm_tokens_per_second", "Completion tokens generated per second of LLM call time",
+          [({"model": m["model"]}, m["tokens_per_sec"]) for m in models])
+
+    commands = report["commands"]
+    gauge("egit_command_duration_ms", "Command wall time percentiles in milliseconds",
+          [({"command": c["command"], "quantile": "0.5"}, c["p50_ms"]) for c in commands]
+          + [({"command": c["command"], "quantile": "0.95"}, c["p95_ms"]) for c in commands])
+    gauge("egit_cache_hit_ratio", "Share of LLM response and summary cache lookups that were hits",
+          [({"command": c["command"]}, c["cache_hit_rate"]) for c in commands])
+    gauge("egit_git_collection_ms", "Median time spent collecting data from git in milliseconds",
+          [({"repo_size": g["repo_size"]}, g["p50_ms"]) for g in report["git_by_repo_size"]])
+    return "\n".join(lines) + "\n"
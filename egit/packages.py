@@ -0,0 +1,144 @@
+"""
+Monorepo support: split changes and commits by package root and process the packages concurrently
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import git
+from . import rawdiff
+from .config import get_config
+from .heuristic import parse_change
+
+# Package that collects paths outside every configured root
+OTHER_PACKAGE = "(other)"
+
+def load_package_map(path: Path) -> Dict[str, List[str]]:
+    """Read a package map: a JSON object of package name to root path (or list of roots)
+
+    The object may also sit under a "packages" key. Roots are relative to the
+    repository root.
+    """
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        raise Exception(f"Could not read package map {path}: {str(e)}")
+    data = data.get("packages", data) if isinstance(data, dict) else data
+    if not isinstance(data, dict):
+        raise Exception(f"Package map {path} must be a JSON object of package name to root path")
+    return {name: [roots] if isinstance(roots, str) else list(roots) for name, roots in data.items()}
+
+def resolve_packages(paths: Optional[List[str]] = None, package_map: Optional[Path] = None) -> Dict[str, List[str]]:
+    """Get the packages to split by from --path and --package-map (or the package_map setting)
+
+    With only paths, every path is its own package. With a map, paths pick
+    the packages to keep, by name or root.
+    """
+    package_map = package_map or get_config().get("package_map") or None
+    packages = load_package_map(package_map) if package_map else {}
+    paths = [path.strip("/") for path in paths or []]
+    if not packages:
+        return {path: [path] for path in paths}
+    if paths:
+        packages = {name: roots for name, roots in packages.items()
+                    if name in paths or any(root.strip("/") in paths for root in roots)}
+    return packages
+
+def package_of(path: str, packages: Dict[str, List[str]]) -> str:
+    """Get the package whose root contains a path, preferring the deepest root"""
+    best, best_length = OTHER_PACKAGE, -1
+    for name, roots in packages.items():
+        for root in roots:
+            root = root.strip("/")
+            if (not root or path == root or path.startswith(root + "/")) and len(root) > best_length:
+                best, best_length = name, len(root)
+    return best
+
+def partition_changes(changes: List[str], diffs: List[str], packages: Dict[str, List[str]],
+                      keep_other: bool = True) -> Dict[str, Tuple[List[str], List[str]]]:
+    """Split name-status lines and a unified diff by package (renames count toward their new path)
+
+    Without keep_other, files outside every package are dropped instead of
+    going to (other), which is how --path scopes a run.
+    """
+    partitions: Dict[str, Tuple[List[str], List[str]]] = {}
+    for change in changes:
+        parsed = parse_change(change)
+        if parsed:
+            partitions.setdefault(package_of(parsed[1][-1], packages), ([], []))[0].append(change)
+    sections: Dict[str, List[Any]] = {}
+    for file_diff in git.split_diff_by_file(diffs):
+        sections.setdefault(package_of(file_diff["path"], packages), []).append(file_diff["lines"])
+    for name, file_lines in sections.items():
+        # Raw diffs stay raw: the file slices are joined once instead of decoding every line
+        partitions[name] = (partitions.get(name, ([], []))[0], rawdiff.concat(file_lines))
+    return {name: partitions[name] for name in _ordered(partitions, packages, keep_other)}
+
+def partition_commits(commits: List[Dict[str, Any]], packages: Dict[str, List[str]],
+                      keep_other: bool = True) -> Dict[str, List[Dict[str, Any]]]:
+    """Split commits (with "paths") by package; a commit touching several packages is listed in each
+
+    Without keep_other, commits touching no package are dropped instead of
+    going to (other).
+    """
+    partitions: Dict[str, List[Dict[str, Any]]] = {}
+    for commit in commits:
+        names = {package_of(path, packages) for path in commit.get("paths") or []} or {OTHER_PACKAGE}
+        for name in names:
+            partitions.setdefault(name, []).append(commit)
+    return {name: partitions[name] for name in _ordered(partitions, packages, keep_other)}
+
+def _ordered(partitions: Dict[str, Any], packages: Dict[str, List[str]], keep_other: bool = True) -> List[str]:
+    """Package names in map order, with unmatched paths last (or left out without keep_other)"""
+    return [name for name in list(packages) + ([OTHER_PACKAGE] if keep_other else []) if name in partitions]
+
+def run_concurrently(partitions: Dict[str, Any], func: Callable[[str, Any], str],
+                     jobs: int = 0) -> Dict[str, Any]:
+    """Run func(name, partition) for every package at once (bounded by llm_max_concurrency)
+
+    Returns each package's result, or the exception it raised, in package order.
+    """
+    jobs = jobs or int(get_config().get("llm_max_concurrency") or 8)
+
+    def run(item: Tuple[str, Any]) -> Any:
+        try:
+            return func(*item)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(partitions) or 1))) as executor:
+        return dict(zip(partitions, executor.map(run, partitions.items())))
+
+def combine_summaries(summaries: Dict[str, Any]) -> str:
+    """Join per-package commit summaries, one "package: summary" line each"""
+    lines = []
+    for name, summary in summaries.items():
+        if isinstance(summary, Exception):
+            raise Exception(f"Error summarizing {name}: {str(summary)}")
+        lines.append(f"{name}: {summary}")
+    return "\n".join(lines)
+
+def combine_release_notes(notes: Dict[str, Any], version: str) -> str:
+    """Join per-package release notes under one summary line naming the packages"""
+    failed = [name for name, text in notes.items() if isinstance(text, Exception)]
+    if failed:
+        raise Exception(f"Error generating release notes for {', '.join(failed)}: {str(notes[failed[0]])}")
+    names = list(notes)
+    lines = [f"Release {version} with changes to {len(names)} package{'s' if len(names) != 1 else ''}: {', '.join(names)}"]
+    for name, text in notes.items():
+        lines.extend(["", f"{name}:", text.strip()])
+    return "\n".join(lines)
+
+def combine_stats(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge the stats of concurrent per-package calls: tokens and commit counts add up, latency is the slowest call"""
+    combined: Dict[str, Any] = {}
+    for item in stats:
+        for key, value in item.items():
+            if key in ("prompt_tokens", "completion_tokens", "new_commits", "reused_commits") and value is not None:
+                combined[key] = combined.get(key, 0) + value
+            elif key == "latency_ms" and value is not None:
+                combined[key] = max(combined.get(key, 0), value)
+            else:
+                combined.setdefault(key, value)
+    return combined
@@ -0,0 +1,183 @@
+"""
+Lightweight hot-path instrumentation for eGit
+
+Spans are recorded only after enable() is called; while disabled, span()
+returns a shared no-op context manager so instrumented code pays a single
+flag check.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_enabled = False
+_spans: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+_started_at = 0.0
+
+class _NullSpan:
+    """Span used while profiling is disabled"""
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+    def set(self, **attrs: Any) -> None:
+        return None
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    """A timed region of code"""
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+        self.start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        record = {
+            "name": self.name,
+            "start": self.start,
+            "duration": end - self.start,
+            "thread": threading.get_ident(),
+            "attrs": self.attrs,
+        }
+        with _lock:
+            _spans.append(record)
+
+    def set(self, **attrs: Any) -> None:
+        """Attach attributes discovered while the span is running"""
+        self.attrs.update(attrs)
+
+def span(name: str, **attrs: Any):
+    """Time a block of code: `with span("git", command="diff"): ...`"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, attrs)
+
+def is_enabled() -> bool:
+    """Check whether spans are being recorded"""
+    return _enabled
+
+def enable() -> None:
+    """Start recording spans"""
+    global _enabled, _started_at
+    with _lock:
+        _spans.clear()
+        _started_at = time.perf_counter()
+        _enabled = True
+
+def disable() -> None:
+    """Stop recording spans"""
+    global _enabled
+    _enabled = False
+
+def get_spans() -> List[Dict[str, Any]]:
+    """Get a copy of the recorded spans"""
+    with _lock:
+        return list(_spans)
+
+def get_breakdown() -> List[Dict[str, Any]]:
+    """Aggregate the recorded spans by name"""
+    wall = time.perf_counter() - _started_at if _started_at else 0.0
+    phases: Dict[str, Dict[str, Any]] = {}
+    for record in get_spans():
+        phase = phases.setdefault(record["name"], {"name": record["name"], "calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+        duration_ms = record["duration"] * 1000
+        phase["calls"] += 1
+        phase["total_ms"] += duration_ms
+        phase["max_ms"] = max(phase["max_ms"], duration_ms)
+
+    rows = sorted(phases.values(), key=lambda phase: phase["total_ms"], reverse=True)
+    for row in rows:
+        row["mean_ms"] = row["total_ms"] / row["calls"]
+        row["wall_pct"] = row["total_ms"] / (wall * 1000) * 100 if wall else 0.0
+    return rows
+
+def print_report(console) -> None:
+    """Print the per-phase breakdown and the LLM call details as rich tables"""
+    from rich.table import Table
+
+    wall_ms = (time.perf_counter() - _started_at) * 1000 if _started_at else 0.0
+    table = Table(title=f"Profile ({wall_ms:.1f} ms wall, nested phases overlap)")
+    table.add_column("Phase")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total ms", justify="right")
+    table.add_column("Mean ms", justify="right")
+    table.add_column("Max ms", justify="right")
+    table.add_column("% wall", justify="right")
+    for row in get_breakdown():
+        table.add_row(
+            row["name"], str(row["calls"]), f"{row['total_ms']:.1f}", f"{row['mean_ms']:.1f}",
+            f"{row['max_ms']:.1f}", f"{row['wall_pct']:.1f}"
+        )
+    console.print(table)
+
+    llm_calls = [record for record in get_spans() if record["name"] == "llm.completion"]
+    if llm_calls:
+        calls = Table(title="LLM calls")
+        calls.add_column("Model")
+        calls.add_column("TTFT ms", justify="right")
+        calls.add_column("Total ms", justify="right")
+        calls.add_column("Prompt tokens", justify="right")
+        calls.add_column("Completion tokens", justify="right")
+        calls.add_column("Tokens/s", justify="right")
+        for record in llm_calls:
+            attrs = record["attrs"]
+            ttft = attrs.get("ttft_ms")
+            completion_tokens = attrs.get("completion_tokens")
+            generation_s = record["duration"] - (ttft or 0) / 1000
+            tokens_per_sec = completion_tokens / generation_s if completion_tokens and generation_s > 0 else None
+            calls.add_row(
+                str(attrs.get("model", "")),
+                f"{ttft:.1f}" if ttft is not None else "-",
+                f"{record['duration'] * 1000:.1f}",
+                str(attrs.get("prompt_tokens", "-")),
+                str(completion_tokens if completion_tokens is not None else "-"),
+                f"{tokens_per_sec:.1f}" if tokens_per_sec else "-"
+            )
+        console.print(calls)
+
+def write_chrome_trace(path: Path) -> None:
+    """Write the spans as Chrome trace JSON (open in chrome://tracing or Perfetto)"""
+    pid = os.getpid()
+    events = []
+    for record in get_spans():
+        events.append({
+            "name": record["name"],
+            "cat": "egit",
+            "ph": "X",
+            "ts": (record["start"] - _started_at) * 1_000_000,
+            "dur": record["duration"] * 1_000_000,
+            "pid": pid,
+            "tid": record["thread"],
+            "args": {key: value if isinstance(value, (int, float, str, bool)) or value is None else str(value)
+                     for key, value in record["attrs"].items()},
+        })
+    Path(path).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+
+def finish(console, trace_path: Optional[Path] = None) -> None:
+    """Write pending history, then print the report, write the trace if requested and stop recording"""
+    if not _enabled:
+        return
+    from . import db
+
+    # History is written behind the command; flush it so its database writes are in the report
+    db.flush_history(timeout=10)
+    print_report(console)
+    if trace_path:
+        write_chrome_trace(trace_path)
+        console.print(f"[green]Wrote Chrome trace to {trace_path}[/green]")
+    disable()
@@ -0,0 +1,213 @@
+"""
+Client-side rate limiting, adaptive concurrency and retries for LLM calls
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+from .config import get_config
+
+# Full-jitter exponential backoff: sleep uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+# Output tokens charged up front for a request; corrected once the actual usage is known
+DEFAULT_COMPLETION_ESTIMATE = 256
+
+TRANSIENT_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 520, 522, 524, 529}
+TRANSIENT_ERRORS = ("RateLimitError", "ServiceUnavailableError", "InternalServerError", "Timeout",
+                    "APIConnectionError", "APITimeoutError")
+
+class TokenBucket:
+    """Refills `rate` units per minute up to a burst of one minute's worth"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount units are available (0 if they are now)"""
+        self._refill(now)
+        # A single request larger than the bucket is let through once the bucket is full
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+class RateLimiter:
+    """Blocks callers until a request fits both the requests/min and tokens/min budgets (0 disables either)"""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+
+    def acquire(self, tokens: int) -> None:
+        """Wait for capacity for one request of about `tokens` tokens"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if self.requests:
+                    wait = max(wait, self.requests.wait_time(1, now))
+                if self.tokens:
+                    wait = max(wait, self.tokens.wait_time(tokens, now))
+                if wait <= 0:
+                    if self.requests:
+                        self.requests.take(1)
+                    if self.tokens:
+                        self.tokens.take(tokens)
+                    return
+            time.sleep(wait)
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """Correct the token budget once a request's real usage is known"""
+        if self.tokens and actual is not None:
+            with self._lock:
+                self.tokens.level = min(self.tokens.capacity, self.tokens.level + estimated - actual)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back, e.g. for a server's Retry-After"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+class AdaptiveConcurrency:
+    """Limits requests in flight, growing the limit additively on success and halving it on overload (AIMD)"""
+
+    def __init__(self, limit: int, maximum: int):
+        self.maximum = max(1, maximum)
+        self.limit = float(min(max(1, limit), self.maximum))
+        self.in_flight = 0
+        self._condition = threading.Condition()
+        self._last_decrease = 0.0
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        """Grow by about one slot per limit's worth of successful requests"""
+        with self._condition:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def on_overload(self) -> None:
+        """Halve the limit, at most once per second so one burst of 429s counts once"""
+        with self._condition:
+            now = time.monotonic()
+            if now - self._last_decrease >= 1.0:
+                self.limit = max(1.0, self.limit / 2)
+                self._last_decrease = now
+
+def status_code(error: Exception) -> Optional[int]:
+    """Get the HTTP status code carried by an LLM client exception"""
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+def is_transient(error: Exception) -> bool:
+    """Check whether retrying a failed request may succeed"""
+    code = status_code(error)
+    if code is not None:
+        return code in TRANSIENT_STATUS_CODES
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Get the Retry-After delay in seconds requested by the server, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or getattr(error, "litellm_response_headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+def backoff(attempt: int) -> float:
+    """Get a jittered exponential backoff delay for the given retry attempt (0-based)"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the tokens in a text (about four characters per token)"""
+    return len(text) // 4 + 1
+
+_limiter: Optional[RateLimiter] = None
+_concurrency: Optional[AdaptiveConcurrency] = None
+_settings: Optional[tuple] = None
+_setup_lock = threading.Lock()
+
+def _get_limits() -> tuple:
+    """Get the shared limiter and concurrency controller, recreating them when the settings change"""
+    global _limiter, _concurrency, _settings
+    config = get_config()
+    settings = (
+        float(config.get("llm_rpm") or 0),
+        float(config.get("llm_tpm") or 0),
+        int(config.get("llm_max_concurrency") or 8),
+    )
+    with _setup_lock:
+        if settings != _settings:
+            _limiter = RateLimiter(settings[0], settings[1])
+            _concurrency = AdaptiveConcurrency(settings[2], settings[2])
+            _settings = settings
+        return _limiter, _concurrency
+
+def call(func: Callable[[], Any], prompt_tokens: int, max_tokens: Optional[int] = None,
+         usage_tokens: Optional[Callable[[Any], Optional[int]]] = None) -> Any:
+    """Run an LLM request within the rate limits, retrying transient failures with backoff"""
+    limiter, concurrency = _get_limits()
+    max_retries = int(get_config().get("llm_max_retries", 4))
+    estimated = prompt_tokens + min(int(max_tokens or DEFAULT_COMPLETION_ESTIMATE), DEFAULT_COMPLETION_ESTIMATE)
+
+    attempt = 0
+    while True:
+        limiter.acquire(estimated)
+        concurrency.acquire()
+        try:
+            result = func()
+        except Exception as e:
+            concurrency.release()
+            limiter.settle(estimated, 0)
+            if not is_transient(e) or attempt >= max_retries:
+                raise
+            code = status_code(e)
+            if code is None or code == 429 or code >= 500:
+                concurrency.on_overload()
+            delay = retry_after(e)
+            if delay is not None:
+                limiter.pause(delay)
+            time.sleep(max(delay or 0.0, backoff(attempt)))
+            attempt += 1
+            continue
+        concurrency.release()
+        concurrency.on_success()
+        limiter.settle(estimated, usage_tokens(result) if usage_tokens else None)
+        return result
@@ -0,0 +1,148 @@
+"""
+Diffs kept as the bytes git wrote, decoded one line at a time when read
+"""
+from array import array
+from collections.abc import Sequence
+from typing import Iterable, Iterator, List, Optional, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+class RawDiff(Sequence):
+    """The lines of a diff: a byte range of one buffer
+
+    Slices share the buffer instead of copying, and a line is decoded from
+    UTF-8 only when it is read, so splitting a diff into files, measuring
+    it and hashing it never build text. Content that isn't valid UTF-8
+    reaches cache keys and the history byte for byte; only what ends up in
+    a prompt is decoded (with replacement characters).
+    """
+    __slots__ = ("_buffer", "_start", "_end", "_starts")
+
+    def __init__(self, data: Buffer = b"", start: int = 0, end: Optional[int] = None):
+        # The range holds whole lines, each ending in a newline except possibly the last
+        self._buffer = data if isinstance(data, bytes) else bytes(data)
+        self._start = start
+        self._end = len(self._buffer) if end is None else end
+        self._starts: Optional[array] = None  # Offset of every line, built on first indexed access
+
+    def _text_end(self) -> int:
+        """End of the last line, without its newline"""
+        if self._end > self._start and self._buffer[self._end - 1] == 0x0a:
+            return self._end - 1
+        return self._end
+
+    def _index(self) -> array:
+        if self._starts is None:
+            starts = array("q")
+            find, position, end = self._buffer.find, self._start, self._text_end()
+            if self._end > self._start:
+                starts.append(position)
+            while True:
+                position = find(b"\n", position, end)
+                if position < 0:
+                    break
+                position += 1
+                starts.append(position)
+            self._starts = starts
+        return self._starts
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def __getitem__(self, index):
+        count = len(self)
+        if isinstance(index, slice):
+            first, last, step = index.indices(count)
+            if step != 1:
+                return [self[position] for position in range(first, last, step)]
+            if first >= last:
+                return RawDiff()
+            starts = self._index()
+            return RawDiff(self._buffer, starts[first], starts[last] if last < count else self._end)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("diff line index out of range")
+        starts = self._index()
+        end = starts[index + 1] - 1 if index + 1 < count else self._text_end()
+        return str(memoryview(self._buffer)[starts[index]:end], "utf-8", "replace")
+
+    def __iter__(self) -> Iterator[str]:
+        view, find = memoryview(self._buffer), self._buffer.find
+        position, end = self._start, self._text_end()
+        if self._end == self._start:
+            return
+        while True:
+            newline = find(b"\n", position, end)
+            if newline < 0:
+                yield str(view[position:end], "utf-8", "replace")
+                return
+            yield str(view[position:newline], "utf-8", "replace")
+            position = newline + 1
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, RawDiff):
+            return len(self) == len(other) and self.raw() == other.raw()
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"RawDiff({self.nbytes} bytes)"
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the lines joined by newlines"""
+        return self._text_end() - self._start
+
+    def raw(self) -> memoryview:
+        """Get the lines as raw bytes joined by newlines, without copying"""
+        return memoryview(self._buffer)[self._start:self._text_end()]
+
+    def text(self) -> str:
+        """Decode all lines at once, joined by newlines"""
+        return str(self.raw(), "utf-8", "replace")
+
+    def find_line(self, prefix: bytes, offset: Optional[int] = None) -> int:
+        """Get the buffer offset of the first line at or after offset that starts with prefix, or -1"""
+        offset = self._start if offset is None else offset
+        if offset >= self._end:
+            return -1
+        if self._buffer.startswith(prefix, offset, self._end):
+            return offset
+        found = self._buffer.find(b"\n" + prefix, offset, self._end)
+        return -1 if found < 0 else found + 1
+
+    def between(self, start: int, end: int = -1) -> "RawDiff":
+        """Get the lines from one line offset (as found by find_line) up to another, or to the end"""
+        return RawDiff(self._buffer, start, self._end if end < 0 else end)
+
+    def until(self, prefix: bytes) -> "RawDiff":
+        """Get the lines before the first one that starts with prefix (all of them when none does)"""
+        found = self.find_line(prefix)
+        return self if found < 0 else RawDiff(self._buffer, self._start, found)
+
+def join(lines: Sequence) -> str:
+    """Join diff lines into prompt text, decoding raw diffs in one pass"""
+    if isinstance(lines, RawDiff):
+        return lines.text()
+    return "\n".join(lines)
+
+def to_bytes(lines: Sequence) -> Buffer:
+    """Get diff lines as bytes for hashing or storage (raw diffs as they are, without copying)"""
+    if isinstance(lines, RawDiff):
+        return lines.raw()
+    return "\n".join(lines).encode("utf-8", errors="surrogateescape")
+
+def concat(parts: Iterable[Sequence]) -> Union[RawDiff, List[str]]:
+    """Join several diffs into one, staying raw when any of them is"""
+    parts = list(parts)
+    raw = any(isinstance(part, RawDiff) for part in parts)
+    parts = [part for part in parts if len(part)]
+    if not raw:
+        return [line for part in parts for line in part]
+    if len(parts) == 1 and isinstance(parts[0], RawDiff):
+        return parts[0]
+    return RawDiff(b"\n".join(to_bytes(part) for part in parts))
@@ -0,0 +1,68 @@
+"""
+Batched terminal output for long change lists, diffs and generated text
+"""
+from typing import List, Optional
+
+from rich.console import Console
+from rich.pager import SystemPager
+from rich.text import Text
+
+from .config import get_config
+
+# ANSI styles of diff lines, by prefix (checked in order)
+DIFF_STYLES = (
+    ("+++", "\x1b[1m"), ("---", "\x1b[1m"), ("diff --git", "\x1b[1m"), ("@@", "\x1b[36m"),
+    ("+", "\x1b[32m"), ("-", "\x1b[31m"),
+)
+RESET = "\x1b[0m"
+
+_options = {"max_lines": None, "pager": True, "color": True}
+
+def configure(max_lines: Optional[int] = None, pager: Optional[bool] = None, color: Optional[bool] = None) -> None:
+    """Set the output options given on the command line (None keeps the current value)"""
+    if max_lines is not None:
+        _options["max_lines"] = max_lines
+    if pager is not None:
+        _options["pager"] = pager
+    if color is not None:
+        _options["color"] = color
+
+def get_max_lines() -> int:
+    """Get the number of lines shown before the rest is summarized (0: no limit)"""
+    if _options["max_lines"] is not None:
+        return int(_options["max_lines"])
+    return int(get_config().get("output_max_lines", 400) or 0)
+
+def format_lines(lines: List[str], indent: str = "  ", diff: bool = False, color: bool = False) -> str:
+    """Join lines into one string, coloring diff lines with ANSI codes when color is set
+
+    Building the text directly instead of rendering each line through rich is
+    what keeps 50k-line diffs fast; the text is never parsed for markup.
+    """
+    if not (diff and color):
+        return "\n".join(indent + line for line in lines)
+    formatted = []
+    for line in lines:
+        style = next((style for prefix, style in DIFF_STYLES if line.startswith(prefix)), None)
+        formatted.append(f"{style}{indent}{line}{RESET}" if style else indent + line)
+    return "\n".join(formatted)
+
+def print_lines(console: Console, lines: List[str], indent: str = "  ", diff: bool = False) -> None:
+    """Print many lines at once: through the pager when they don't fit the terminal, else capped at max_lines"""
+    if not lines:
+        return
+    color = _options["color"] and console.is_terminal and console.color_system is not None and not console.no_color
+    if _options["pager"] and console.is_terminal and len(lines) > console.height:
+        SystemPager().show(format_lines(lines, indent, diff, color) + "\n")
+        return
+
+    max_lines = get_max_lines()
+    shown = lines if not max_lines or len(lines) <= max_lines else lines[:max_lines]
+    console.file.write(format_lines(shown, indent, diff, color) + "\n")
+    console.file.flush()
+    if len(shown) < len(lines):
+        console.print(Text(f"{indent}... {len(lines) - len(shown)} more lines (--max-lines 0 shows all)", style="dim"))
+
+def print_text(console: Console, text: str) -> None:
+    """Print generated text (summaries, release notes) as is, without markup or highlighting"""
+    console.print(text, markup=False, highlight=False)
@@ -0,0 +1,166 @@
+"""
+Latency-aware routing and hedged requests across several LLM endpoints
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from litellm import acompletion
+
+from . import cache
+from .config import get_config
+from .metrics import percentile
+
+# Weight of the newest sample in the moving averages
+EWMA_ALPHA = 0.3
+# Latency samples kept per endpoint for the hedging deadline
+MAX_SAMPLES = 50
+# Hedge after this long while an endpoint has too few samples for a p95
+DEFAULT_HEDGE_AFTER_MS = 10000.0
+MIN_HEDGE_AFTER_MS = 250.0
+MIN_SAMPLES = 5
+# An endpoint failing at least this often in the last FAILING_WINDOW seconds is tried last
+FAILING_ERROR_RATE = 0.5
+FAILING_WINDOW = 60.0
+
+_stats: Optional[Dict[str, Dict[str, Any]]] = None
+_stats_lock = threading.Lock()
+
+def endpoint_name(endpoint: Dict[str, Any]) -> str:
+    """Get the name an endpoint's statistics are stored under"""
+    return endpoint.get("name") or f"{endpoint.get('model')}@{endpoint.get('api_base') or 'default'}"
+
+def get_endpoints(llm_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Get the configured endpoints that can serve a request for llm_config's model (empty: call it directly)
+
+    Endpoints are alternatives for llm_model; requests for another model
+    (e.g. the cascade's fast model or an evaluation override) are not routed.
+    """
+    config = get_config()
+    endpoints = config.get("llm_endpoints") or []
+    primary = config.get("llm_model") or ""
+    served = {primary, primary.replace("openai/", "ollama/")} | {endpoint.get("model") for endpoint in endpoints}
+    if not endpoints or llm_config.get("model") not in served:
+        return []
+    return [{key: value for key, value in endpoint.items() if key != "name"} | {"name": endpoint_name(endpoint)}
+            for endpoint in endpoints]
+
+def _load_stats() -> Dict[str, Dict[str, Any]]:
+    global _stats
+    if _stats is None:
+        _stats = cache.get("routing", "endpoints") or {}
+    return _stats
+
+def get_stats() -> Dict[str, Dict[str, Any]]:
+    """Get the recorded latency and error statistics of every endpoint"""
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _load_stats().items()}
+
+def reset_stats() -> None:
+    """Forget the in-memory statistics (they are reloaded from the cache on next use)"""
+    global _stats
+    with _stats_lock:
+        _stats = None
+
+def record(name: str, latency_ms: Optional[float], failed: bool) -> None:
+    """Fold the outcome of one request into an endpoint's moving averages and persist them"""
+    with _stats_lock:
+        all_stats = _load_stats()
+        stats = all_stats.setdefault(name, {"ewma_ms": None, "error_rate": 0.0, "samples": [], "last_error": None})
+        stats["error_rate"] = (1 - EWMA_ALPHA) * stats["error_rate"] + EWMA_ALPHA * (1.0 if failed else 0.0)
+        if failed:
+            stats["last_error"] = time.time()
+        elif latency_ms is not None:
+            stats["ewma_ms"] = latency_ms if stats["ewma_ms"] is None else (1 - EWMA_ALPHA) * stats["ewma_ms"] + EWMA_ALPHA * latency_ms
+            stats["samples"] = (stats["samples"] + [latency_ms])[-MAX_SAMPLES:]
+        snapshot = {key: dict(value) for key, value in all_stats.items()}
+    try:
+        cache.put("routing", "endpoints", snapshot)
+    except OSError:
+        pass  # Statistics are an optimization; losing an update is harmless
+
+def order_endpoints(endpoints: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Order endpoints by expected latency, keeping untried ones in configured order and failing ones last"""
+    stats = get_stats()
+    now = time.time()
+
+    def key(item: Tuple[int, Dict[str, Any]]) -> Tuple[bool, float, int]:
+        index, endpoint = item
+        endpoint_stats = stats.get(endpoint["name"])
+        if not endpoint_stats:
+            return (False, 0.0, index)
+        failing = (endpoint_stats["error_rate"] >= FAILING_ERROR_RATE
+                   and now - (endpoint_stats["last_error"] or 0) < FAILING_WINDOW)
+        score = (endpoint_stats["ewma_ms"] or 0.0) * (1 + 4 * endpoint_stats["error_rate"])
+        return (failing, score, index)
+
+    return [endpoint for _, endpoint in sorted(enumerate(endpoints), key=key)]
+
+def hedge_after_ms(endpoint: Dict[str, Any]) -> float:
+    """Get how long to wait for an endpoint before sending a duplicate request to the next one"""
+    configured = float(get_config().get("llm_hedge_after_ms") or 0)
+    if configured > 0:
+        return configured
+    samples = get_stats().get(endpoint["name"], {}).get("samples", [])
+    if len(samples) < MIN_SAMPLES:
+        return DEFAULT_HEDGE_AFTER_MS
+    return max(MIN_HEDGE_AFTER_MS, percentile(samples, 95))
+
+async def _call(endpoint: Dict[str, Any], messages: List[Dict[str, str]], llm_config: Dict[str, Any]) -> Any:
+    started = time.perf_counter()
+    # The primary's server and key belong to its provider; an endpoint without its own uses LiteLLM's defaults
+    call_config = llm_config | {"api_base": None, "api_key": None}
+    call_config.update((key, value) for key, value in endpoint.items() if key != "name")
+    try:
+        response = await acompletion(messages=messages, **call_config)
+    except asyncio.CancelledError:
+        raise  # The hedge won; a cancelled request says nothing about the endpoint
+    except Exception:
+        record(endpoint["name"], None, failed=True)
+        raise
+    record(endpoint["name"], (time.perf_counter() - started) * 1000, failed=False)
+    return response
+
+async def _complete_hedged(endpoints: List[Dict[str, Any]], messages: List[Dict[str, str]],
+                           llm_config: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+    pending: Dict[asyncio.Task, Dict[str, Any]] = {}
+    remaining = list(endpoints)
+    errors = []
+
+    def launch() -> None:
+        endpoint = remaining.pop(0)
+        pending[asyncio.ensure_future(_call(endpoint, messages, llm_config))] = endpoint
+
+    launch()
+    try:
+        while pending:
+            # Wait for the newest request's hedging deadline, or indefinitely when nothing is left to hedge with
+            newest = list(pending.values())[-1]
+            timeout = hedge_after_ms(newest) / 1000 if remaining else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for task in done:
+                endpoint = pending.pop(task)
+                if task.exception() is None:
+                    return task.result(), endpoint
+                errors.append(f"{endpoint['name']}: {task.exception()}")
+            # Fail over immediately instead of waiting for a deadline
+            if remaining and len(pending) == 0:
+                launch()
+        raise Exception("All LLM endpoints failed: " + "; ".join(errors))
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+def complete(endpoints: List[Dict[str, Any]], messages: List[Dict[str, str]],
+             llm_config: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+    """Run a completion on the best endpoint, hedging with the next one when it is slow
+
+    Returns the response and the endpoint that produced it.
+    """
+    return asyncio.run(_complete_hedged(order_endpoints(endpoints), messages, llm_config))
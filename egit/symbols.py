@@ -0,0 +1,219 @@
+"""
+Symbol-level change extraction: which functions and classes a diff adds, removes or modifies
+"""
+import ast
+import posixpath
+import re
+from typing import Dict, List, Optional, Tuple
+
+from . import cache
+from . import git
+from . import rawdiff
+from .profiling import span
+
+# Bump whenever the facts produced for a blob pair change so cached results are invalidated
+ANALYZER_VERSION = "1"
+
+NULL_BLOB = "0" * 40
+
+# Lightweight definition grammars for languages without a parser in the standard library
+REGEX_GRAMMARS: Dict[str, List[Tuple[str, "re.Pattern[str]"]]] = {
+    "javascript": [
+        ("class", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?class\s+([A-Za-z_$][\w$]*)")),
+        ("function", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)")),
+        ("function", re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)")),
+        ("interface", re.compile(r"^\s*(?:export\s+)?(?:interface|type)\s+([A-Za-z_$][\w$]*)")),
+    ],
+    "go": [
+        ("function", re.compile(r"^func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)")),
+        ("type", re.compile(r"^type\s+([A-Za-z_]\w*)")),
+    ],
+    "rust": [
+        ("function", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?fn\s+([A-Za-z_]\w*)")),
+        ("type", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait|type)\s+([A-Za-z_]\w*)")),
+        ("impl", re.compile(r"^\s*impl(?:<[^>]*>)?\s+(?:[\w:<>]+\s+for\s+)?([A-Za-z_][\w:<>]*)")),
+    ],
+    "java": [
+        ("class", re.compile(r"^\s*(?:(?:public|private|protected|abstract|final|static)\s+)*(?:class|interface|enum|record)\s+([A-Za-z_]\w*)")),
+        ("method", re.compile(r"^\s+(?:(?:public|private|protected|static|final|synchronized|abstract)\s+)+[\w<>\[\], ]+\s+([A-Za-z_]\w*)\s*\(")),
+    ],
+    "ruby": [
+        ("class", re.compile(r"^\s*(?:class|module)\s+([A-Z][\w:]*)")),
+        ("method", re.compile(r"^\s*def\s+(?:self\.)?([A-Za-z_]\w*[?!=]?)")),
+    ],
+}
+
+LANGUAGES = {
+    ".py": "python",
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript", ".ts": "javascript", ".tsx": "javascript",
+    ".go": "go",
+    ".rs": "rust",
+    ".java": "java", ".kt": "java", ".cs": "java",
+    ".rb": "ruby",
+}
+
+def get_language(path: str) -> Optional[str]:
+    """Get the analyzer language of a file from its extension"""
+    return LANGUAGES.get(posixpath.splitext(path)[1].lower())
+
+def _python_definitions(source: str) -> Optional[Dict[str, Tuple[str, str]]]:
+    """Map each function/class (methods as Class.method) to its kind and a formatting-independent fingerprint"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    definitions: Dict[str, Tuple[str, str]] = {}
+    module_rest = []
+    imports = []
+
+    def visit_body(body: List[ast.stmt], prefix: str, in_class: bool) -> List[str]:
+        rest = []
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "method" if in_class else "function"
+                definitions[prefix + node.name] = (kind, ast.dump(node))
+            elif isinstance(node, ast.ClassDef):
+                class_rest = visit_body(node.body, f"{prefix}{node.name}.", True)
+                header = [ast.dump(part) for part in node.bases + node.keywords + node.decorator_list]
+                definitions[prefix + node.name] = ("class", "".join(header + class_rest))
+            elif isinstance(node, (ast.Import, ast.ImportFrom)) and not prefix:
+                imports.append(ast.dump(node))
+            else:
+                rest.append(ast.dump(node))
+        return rest
+
+    module_rest.extend(visit_body(tree.body, "", False))
+    definitions["<imports>"] = ("imports", "".join(sorted(imports)))
+    definitions["<module>"] = ("module", "".join(module_rest))
+    return definitions
+
+def _regex_definitions(source: str, language: str) -> Optional[Dict[str, Tuple[str, str]]]:
+    """Split a file at definition lines; each definition's fingerprint is its whitespace-normalized text"""
+    grammar = REGEX_GRAMMARS[language]
+    definitions: Dict[str, Tuple[str, str]] = {}
+    current_name, current_kind, current_lines = "<module>", "module", []
+    seen: Dict[str, int] = {}
+
+    def close() -> None:
+        definitions[current_name] = (current_kind, " ".join(" ".join(current_lines).split()))
+
+    for line in source.splitlines():
+        for kind, pattern in grammar:
+            match = pattern.match(line)
+            if match:
+                close()
+                name = match.group(1)
+                # Overloads and repeated impl blocks get numbered so they stay distinct
+                seen[name] = seen.get(name, 0) + 1
+                current_name = name if seen[name] == 1 else f"{name}#{seen[name]}"
+                current_kind, current_lines = kind, []
+                break
+        current_lines.append(line)
+    close()
+    return definitions
+
+def extract_definitions(source: str, language: str) -> Optional[Dict[str, Tuple[str, str]]]:
+    """Get the definitions of a file (None if it can't be analyzed)"""
+    if language == "python":
+        return _python_definitions(source)
+    return _regex_definitions(source, language)
+
+def diff_definitions(old: Dict[str, Tuple[str, str]], new: Dict[str, Tuple[str, str]]) -> List[str]:
+    """Describe the added, removed and modified definitions between two versions"""
+    facts = []
+    for name, (kind, fingerprint) in new.items():
+        label = name.split("#")[0]
+        if name not in old:
+            # A new file's imports and top-level statements go without saying
+            if kind not in ("module", "imports"):
+                facts.append(f"added {kind} {label}")
+            elif fingerprint and old:
+                facts.append("modified module-level code" if kind == "module" else "modified imports")
+        elif old[name][1] != fingerprint:
+            facts.append("modified module-level code" if kind == "module" else
+                         "modified imports" if kind == "imports" else f"modified {kind} {label}")
+    for name, (kind, fingerprint) in old.items():
+        if name not in new and kind not in ("module", "imports"):
+            facts.append(f"removed {kind} {name.split('#')[0]}")
+    return facts
+
+def analyze_file(path: str, old_source: str, new_source: str) -> Optional[List[str]]:
+    """Get the symbol facts of one file change (None if the language or source can't be analyzed)"""
+    language = get_language(path)
+    if not language:
+        return None
+    old = extract_definitions(old_source, language) if old_source else {}
+    new = extract_definitions(new_source, language) if new_source else {}
+    if old is None or new is None:
+        return None
+    return diff_definitions(old, new)
+
+def analyze_file_diffs(file_diffs: List[Dict], cwd=None) -> Dict[str, Optional[List[str]]]:
+    """Get symbol facts for every analyzable file in a split diff, cached by blob ids"""
+    results: Dict[str, Optional[List[str]]] = {}
+    pending = []
+    for file_diff in file_diffs:
+        if not get_language(file_diff["path"]) or not file_diff["old_blob"] or not file_diff["new_blob"]:
+            continue
+        key = cache.make_key(file_diff["path"], file_diff["old_blob"], file_diff["new_blob"], ANALYZER_VERSION)
+        cached = cache.get("symbols", key)
+        if cached is not None:
+            results[file_diff["path"]] = cached["facts"]
+        else:
+            pending.append((file_diff, key))
+
+    if not pending:
+        return results
+
+    with span("symbols.analyze", files=len(pending)):
+        blob_ids = [blob for file_diff, _ in pending for blob in (file_diff["old_blob"], file_diff["new_blob"]) if blob != NULL_BLOB]
+        try:
+            blobs = git.read_blobs(blob_ids, cwd=cwd)
+        except Exception:
+            return results  # Not in this repository (e.g. a pasted diff); fall back to raw hunks
+
+        for file_diff, key in pending:
+            old_blob, new_blob = file_diff["old_blob"], file_diff["new_blob"]
+            if (old_blob != NULL_BLOB and old_blob not in blobs) or (new_blob != NULL_BLOB and new_blob not in blobs):
+                continue
+            facts = analyze_file(file_diff["path"], blobs.get(old_blob, ""), blobs.get(new_blob, ""))
+            cache.put("symbols", key, {"facts": facts})
+            results[file_diff["path"]] = facts
+    return results
+
+def condense_diff(diffs: List[str], cwd=None, keep_hunks: bool = False) -> List[str]:
+    """Replace the hunks of analyzable files with their symbol facts, keeping other files' hunks
+
+    File headers (diff --git, index, ---/+++) are kept so the result can still
+    be split per file and keyed by blob ids. With keep_hunks the facts are
+    added after the hunks instead.
+    """
+    file_diffs = git.split_diff_by_file(diffs)
+    facts_by_path = analyze_file_diffs(file_diffs, cwd=cwd)
+    if not facts_by_path:
+        return diffs
+
+    # Raw diffs are kept as slices of their buffer and joined once at the end
+    sections = []
+    for file_diff in file_diffs:
+        lines = file_diff["lines"]
+        facts = facts_by_path.get(file_diff["path"])
+        if facts is None:
+            sections.append(lines)
+            continue
+        if not keep_hunks:
+            lines = _before_hunks(lines)
+        sections.append(lines)
+        if facts:
+            sections.append(["Changed symbols:"] + [f"  {fact}" for fact in facts])
+        else:
+            sections.append(["Changed symbols: none (formatting or comments only)"])
+    return rawdiff.concat(sections)
+
+def _before_hunks(lines: List[str]) -> List[str]:
+    """Get a file's header lines, up to its first hunk"""
+    if isinstance(lines, rawdiff.RawDiff):
+        return lines.until(b"@@")
+    index = next((index for index, line in enumerate(lines) if line.startswith("@@")), len(lines))
+    return lines[:index]
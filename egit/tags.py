@@ -0,0 +1,144 @@
+"""
+Cached tag index with semantic-version ordering for picking the previous release
+"""
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import cache
+from . import git
+from .profiling import span
+
+# Bump whenever the stored index changes shape
+INDEX_VERSION = "1"
+
+SEMVER_PATTERN = re.compile(
+    r"^(?:[A-Za-z][\w.-]*?[-/_])?v?(\d+)\.(\d+)(?:\.(\d+))?(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$"
+)
+
+def parse_version(tag: str) -> Optional[Tuple]:
+    """Get a sort key following semver precedence (v1.2.0 > v1.2.0-rc.2 > v1.2.0-rc.1), None if the tag isn't a version
+
+    A "name-" or "name/" prefix (release/1.2.0, pkg-v1.2.0) and a missing patch number are accepted.
+    """
+    match = SEMVER_PATTERN.match(tag)
+    if not match:
+        return None
+    major, minor, patch, prerelease = match.groups()
+    identifiers: Tuple = ()
+    if prerelease:
+        identifiers = tuple((0, int(part), "") if part.isdigit() else (1, 0, part) for part in prerelease.split("."))
+    # A release sorts after all of its pre-releases
+    return (int(major), int(minor), int(patch or 0), 0 if prerelease else 1, identifiers)
+
+def is_prerelease(tag: str) -> bool:
+    """Check whether a version tag is a pre-release (v1.2.0-rc.1)"""
+    version = parse_version(tag)
+    return version is not None and version[3] == 0
+
+def refs_fingerprint(cwd: Optional[Path] = None) -> Tuple[str, List]:
+    """Get the repository's git directory and a fingerprint that changes whenever a tag is added, moved or deleted
+
+    Built from the stat of packed-refs and of every loose ref under refs/tags,
+    which is far cheaper than asking git for the tags themselves.
+    """
+    common_dir = Path(git.run_git_command(["rev-parse", "--git-common-dir"], cwd=cwd))
+    if not common_dir.is_absolute():
+        common_dir = (Path(cwd) if cwd else Path.cwd()) / common_dir
+    common_dir = common_dir.resolve()
+
+    fingerprint: List = []
+    try:
+        packed = (common_dir / "packed-refs").stat()
+        fingerprint.append(["packed-refs", packed.st_mtime_ns, packed.st_size])
+    except OSError:
+        pass
+    for directory, _, files in os.walk(common_dir / "refs" / "tags"):
+        for name in files:
+            try:
+                info = os.stat(os.path.join(directory, name))
+            except OSError:
+                continue
+            fingerprint.append([os.path.relpath(os.path.join(directory, name), common_dir), info.st_mtime_ns])
+    fingerprint.sort()
+    return str(common_dir), fingerprint
+
+def build_index(cwd: Optional[Path] = None) -> Dict[str, Any]:
+    """List every tag with its commit and date in one for-each-ref call
+
+    Versions are ordered newest first by semver precedence; other tags by date.
+    """
+    output = git.run_git_command([
+        "for-each-ref",
+        "--format=%(refname:strip=2)%00%(objectname)%00%(*objectname)%00%(creatordate:unix)",
+        "refs/tags",
+    ], cwd=cwd)
+
+    versions = []
+    others = []
+    for line in output.splitlines():
+        parts = line.split("\0")
+        if len(parts) != 4:
+            continue
+        name, target, peeled, date = parts
+        entry = {"tag": name, "commit": peeled or target, "date": int(date or 0)}
+        if parse_version(name):
+            versions.append(entry)
+        else:
+            others.append(entry)
+    versions.sort(key=lambda entry: parse_version(entry["tag"]), reverse=True)
+    others.sort(key=lambda entry: entry["date"], reverse=True)
+    return {"versions": versions, "others": others}
+
+def get_index(cwd: Optional[Path] = None) -> Dict[str, Any]:
+    """Get the tag index, rebuilding it only when the tag refs changed"""
+    with span("tags.index") as index_span:
+        common_dir, fingerprint = refs_fingerprint(cwd)
+        key = cache.make_key(common_dir, repr(fingerprint), INDEX_VERSION)
+        index = cache.get("tags", key)
+        index_span.set(cached=index is not None)
+        if index is None:
+            index = build_index(cwd)
+            cache.put("tags", key, index)
+        return index
+
+def _is_ancestor(commit: str, ref: str, cwd: Optional[Path] = None) -> bool:
+    try:
+        git.run_git_command(["merge-base", "--is-ancestor", commit, ref], cwd=cwd)
+        return True
+    except Exception:
+        return False
+
+def _merged_tags(to_ref: str, cwd: Optional[Path] = None) -> set:
+    output = git.run_git_command(["for-each-ref", f"--merged={to_ref}", "--format=%(refname:strip=2)", "refs/tags"], cwd=cwd)
+    return set(output.splitlines())
+
+def previous_release(version: Optional[str] = None, to_ref: str = "HEAD", cwd: Optional[Path] = None) -> Optional[str]:
+    """Get the tag of the release before `version` that to_ref builds on
+
+    Candidates are version tags below `version` (all of them when it isn't a
+    version), newest first, skipping pre-releases unless `version` is one or
+    there is no final release. Without version tags the newest tag by date is
+    used. The best candidate is checked with one merge-base; only when it
+    isn't reachable (e.g. on a maintenance branch) are the reachable tags listed.
+    """
+    index = get_index(cwd)
+    target = parse_version(version) if version else None
+    include_prereleases = version is not None and is_prerelease(version)
+
+    candidates = []
+    for entry in index["versions"]:
+        key = parse_version(entry["tag"])
+        if target and key >= target:
+            continue
+        candidates.append((key[3] == 0 and not include_prereleases, entry))
+    # Stable sort: final releases (or everything when pre-releases count) first, then the skipped pre-releases
+    candidates = [entry for _, entry in sorted(candidates, key=lambda item: item[0])] + index["others"]
+    if not candidates:
+        return None
+
+    if _is_ancestor(candidates[0]["commit"], to_ref, cwd):
+        return candidates[0]["tag"]
+    merged = _merged_tags(to_ref, cwd)
+    return next((entry["tag"] for entry in candidates if entry["tag"] in merged), None)
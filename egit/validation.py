@@ -0,0 +1,66 @@
+"""
+Conformance checks for generated commit messages and release notes
+"""
+import re
+from typing import List
+
+MAX_SUBJECT_LENGTH = 72
+
+RELEASE_NOTE_SECTIONS = ("FEATURES:", "FIXES:", "CHANGES:")
+
+# Conventional commit prefix such as "feat(cli): " is allowed before the verb
+_CONVENTIONAL_PREFIX = re.compile(r"^[a-z]+(\([^)]*\))?!?:\s*")
+
+# Words ending in -ed/-ing that are nevertheless present-tense verbs
+_PRESENT_TENSE_EXCEPTIONS = {"bring", "embed", "feed", "need", "proceed", "seed", "shed", "shred", "speed", "string", "succeed"}
+
+_BANNED_PHRASES = ("this commit", "this change", "summary")
+
+def check_commit_message(message: str) -> List[str]:
+    """Get the ways a generated commit message breaks the summary rules (empty if it conforms)"""
+    problems = []
+    text = message.strip()
+    if not text:
+        return ["message is empty"]
+
+    lines = text.splitlines()
+    if len(lines) > 1:
+        problems.append(f"message has {len(lines)} lines instead of one")
+    subject = lines[0].strip()
+    if len(subject) >= MAX_SUBJECT_LENGTH:
+        problems.append(f"subject is {len(subject)} characters, must be under {MAX_SUBJECT_LENGTH}")
+
+    words = _CONVENTIONAL_PREFIX.sub("", subject).split()
+    first_word = re.sub(r"[^a-z]", "", words[0].lower()) if words else ""
+    if not first_word or (first_word.endswith(("ed", "ing")) and first_word not in _PRESENT_TENSE_EXCEPTIONS):
+        problems.append("subject does not start with a present-tense verb")
+
+    lowered = text.lower()
+    for phrase in _BANNED_PHRASES:
+        if phrase in lowered:
+            problems.append(f"message contains \"{phrase}\"")
+    return problems
+
+def check_release_notes(notes: str) -> List[str]:
+    """Get the ways generated release notes break the required format (empty if they conform)"""
+    problems = []
+    lines = [line.rstrip() for line in notes.strip().splitlines()]
+    if not lines or not lines[0].strip():
+        return ["release notes are empty"]
+
+    if lines[0].strip().upper() in RELEASE_NOTE_SECTIONS:
+        problems.append("first line is a section header instead of a summary")
+
+    sections = [line.strip() for line in lines if line.strip().upper() in RELEASE_NOTE_SECTIONS]
+    if not sections:
+        problems.append(f"no {', '.join(RELEASE_NOTE_SECTIONS)} section")
+
+    for index, line in enumerate(lines):
+        if line.strip() in sections:
+            following = [next_line.strip() for next_line in lines[index + 1:] if next_line.strip()]
+            if not following or not following[0].startswith(("-", "*")):
+                problems.append(f"section {line.strip()} has no bullet points")
+
+    if any(line.lstrip().startswith(("#", "**", "```")) for line in lines):
+        problems.append("release notes contain markdown")
+    return problems
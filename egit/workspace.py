@@ -0,0 +1,114 @@
+"""
+Workspace mode: release notes for many repositories at once
+
+Git collection fans out across a process pool; the LLM calls of all
+repositories share one bounded asyncio pool, and each repository's call
+starts as soon as its commits are collected.
+"""
+import asyncio
+import glob
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from . import git
+from .config import get_config
+
+def discover_repos(spec: str) -> List[Path]:
+    """Find the repositories named by a glob pattern or a manifest file
+
+    A manifest is a JSON list of paths or a text file with one path per line
+    (# starts a comment); its paths are relative to the manifest.
+    """
+    path = Path(spec)
+    if path.is_file():
+        text = path.read_text(encoding="utf-8")
+        if path.suffix == ".json":
+            entries = json.loads(text)
+        else:
+            entries = [line.split("#", 1)[0].strip() for line in text.splitlines()]
+        candidates = [(path.parent / entry).resolve() for entry in entries if entry]
+    else:
+        candidates = [Path(match).resolve() for match in sorted(glob.glob(os.path.expanduser(spec), recursive=True))]
+
+    repos = []
+    for candidate in candidates:
+        if (candidate / ".git").exists() and candidate not in repos:
+            repos.append(candidate)
+    return repos
+
+def collect_repo(repo: str, version: str, from_ref: Optional[str] = None, to_ref: str = "HEAD") -> Dict[str, Any]:
+    """Collect the commits of one repository since its previous release (runs in a worker process)"""
+    started = time.perf_counter()
+    result: Dict[str, Any] = {"repo": repo, "from_ref": from_ref, "to_ref": to_ref, "commits": [], "error": None}
+    try:
+        if not from_ref:
+            try:
+                from_ref = git.get_last_tag(version, to_ref, cwd=Path(repo))
+            except Exception:
+                from_ref = git.get_root_commit(to_ref, cwd=Path(repo))
+        result["from_ref"] = from_ref
+        result["commits"] = git.get_commits_between(from_ref, to_ref, with_paths=True, cwd=Path(repo))
+    except Exception as e:
+        result["error"] = f"git: {str(e)}"
+    result["git_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+def _generate(collected: Dict[str, Any], version: str) -> Dict[str, Any]:
+    """Write the release notes of one collected repository and record them in the history"""
+    from . import db
+    from . import llm
+
+    stats: Dict[str, Any] = {}
+    started = time.perf_counter()
+    try:
+        collected["notes"] = llm.generate_release_notes(collected["commits"], version, stats=stats)
+        db.record_message(
+            "release_notes",
+            collected["notes"],
+            ref=f"{collected['repo']}:{collected['from_ref']}..{collected['to_ref']}",
+            original_message="\n".join(commit["message"] for commit in collected["commits"]),
+            **stats
+        )
+    except Exception as e:
+        collected["error"] = f"llm: {str(e)}"
+    collected["llm_ms"] = (time.perf_counter() - started) * 1000
+    return collected
+
+async def _run(repos: List[Path], version: str, from_ref: Optional[str], to_ref: str, processes: int,
+               concurrency: int, on_result: Optional[Callable[[Dict[str, Any]], None]]) -> List[Dict[str, Any]]:
+    loop = asyncio.get_running_loop()
+    llm_slots = asyncio.Semaphore(concurrency)
+    # Blocking LLM calls run on the default executor; size it so the semaphore is the only limit
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="egit-llm"))
+    # Spawned, not forked: workers must not inherit the history writer thread or open LLM clients
+    context = multiprocessing.get_context("spawn")
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+        async def process(repo: Path) -> Dict[str, Any]:
+            result = await loop.run_in_executor(pool, collect_repo, str(repo), version, from_ref, to_ref)
+            if not result["error"] and result["commits"]:
+                async with llm_slots:
+                    result = await asyncio.to_thread(_generate, result, version)
+            result["commit_count"] = len(result.pop("commits"))
+            if on_result:
+                on_result(result)
+            return result
+
+        return await asyncio.gather(*(process(repo) for repo in repos))
+
+def release_notes(repos: List[Path], version: str, from_ref: Optional[str] = None, to_ref: str = "HEAD",
+                  processes: int = 0, concurrency: int = 0,
+                  on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """Generate release notes for every repository, in repository order
+
+    Each result has repo, from_ref, to_ref, commit_count, notes (when
+    generated), error ("git: ..." or "llm: ...") and git_ms/llm_ms timings.
+    """
+    processes = processes or min(len(repos), os.cpu_count() or 4) or 1
+    concurrency = concurrency or int(get_config().get("llm_max_concurrency") or 8)
+    return asyncio.run(_run(repos, version, from_ref, to_ref, processes, concurrency, on_result))
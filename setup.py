@@ -23,6 +23,9 @@ setup(
         "platformdirs>=4.1.0",
         "sqlalchemy>=2.0.0"
     ],
+    extras_require={
+        "zstd": ["zstandard>=0.22.0"]
+    },
     entry_points={
         "console_scripts": [
             "egit=egit.cli:app",
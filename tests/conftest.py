@@ -5,6 +5,22 @@ import pytest
 from unittest.mock import MagicMock
 from typing import Dict, Any
 
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Keep the on-disk cache of every test in its own temporary directory"""
+    monkeypatch.setenv("EGIT_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+@pytest.fixture(autouse=True)
+def isolated_db(tmp_path, monkeypatch):
+    """Point the history database at a temporary file"""
+    from egit import db
+    monkeypatch.setenv("EGIT_DB_FILE", str(tmp_path / "egit.db"))
+    db.dispose_engine()
+    yield tmp_path / "egit.db"
+    db.flush_history(timeout=5)
+    db.dispose_engine()
+
 @pytest.fixture
 def mock_config() -> Dict[str, Any]:
     """Mock configuration for testing"""
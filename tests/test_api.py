@@ -0,0 +1,104 @@
+"""
+Tests for the Python API
+"""
+import json
+from unittest.mock import MagicMock
+
+from typer.testing import CliRunner
+
+from egit import cache
+from egit import config
+from egit.api import Changes, Session
+from egit.cli import app
+
+COMMITS = [
+    {"hash": "abc123", "message": "feat: add search", "body": [], "paths": ["search.py"]},
+    {"hash": "def456", "message": "fix: handle empty query", "body": [], "paths": ["search.py"]},
+]
+
+def _fake_summarize(changes, diffs, stats=None, overrides=None):
+    cache.get("file_summaries", "missing")
+    stats.update(model=(overrides or {}).get("model", "test-model"), latency_ms=12.5, prompt_tokens=40, completion_tokens=8)
+    return f"Update {len(changes)} files"
+
+def test_summarize_returns_structured_result(mocker, capsys):
+    """Test that a summary comes back with its model, timings, tokens and cache status and nothing is printed"""
+    summarize = mocker.patch("egit.llm.summarize_changes", side_effect=_fake_summarize)
+    changes = Changes(changes=["M\tsearch.py", "A\tquery.py"], diffs=["+ new code"])
+
+    result = Session(overrides={"model": "other-model"}).summarize(changes, deadline=0)
+
+    assert (result.summary, result.model, result.llm_ms, result.prompt_tokens) == ("Update 2 files", "other-model", 12.5, 40)
+    assert (result.cache_hits, result.cache_misses) == (0, 1)
+    assert result.total_ms >= result.git_ms >= 0
+    assert summarize.call_args.kwargs["overrides"] == {"model": "other-model"}
+    assert capsys.readouterr().out == ""
+
+def test_summarize_collects_staged_changes(mocker):
+    """Test that only the staged changes are collected with staged=True and an empty change set is not summarized"""
+    mocker.patch("egit.git.get_staged_changes", return_value=["M\tsearch.py"])
+    mocker.patch("egit.git.get_staged_diff", return_value=["+ new code"])
+    branch_changes = mocker.patch("egit.git.get_branch_changes", return_value=[])
+    mocker.patch("egit.llm.summarize_changes", side_effect=_fake_summarize)
+    session = Session()
+
+    assert session.summarize(staged=True, deadline=0).summary == "Update 1 files"
+    branch_changes.assert_not_called()
+
+    result = session.summarize(Changes(), deadline=0)
+    assert result.summary is None and result.model is None
+
+def test_release_notes_from_root_commit(mocker):
+    """Test that a range without a previous tag starts at the root commit and reports its commits"""
+    mocker.patch("egit.git.get_last_tag", side_effect=Exception("No tags found"))
+    mocker.patch("egit.git.get_root_commit", return_value="0000000")
+    mocker.patch("egit.git.get_commits_between", return_value=COMMITS)
+    mocker.patch("egit.llm.generate_release_notes",
+                 side_effect=lambda commits, version, stats=None, overrides=None: stats.update(model="test-model") or "Notes")
+
+    result = Session(record=False).release_notes("1.2.0")
+
+    assert result.to_dict() == json.loads(json.dumps(result.to_dict()))
+    assert (result.notes, result.version, result.from_ref, result.to_ref) == ("Notes", "v1.2.0", "0000000", "HEAD")
+    assert result.from_root and result.commits == 2 and result.model == "test-model"
+
+def test_cli_json_output(mocker):
+    """Test that --json prints only the result as JSON on stdout"""
+    mocker.patch("egit.git.has_uncommitted_changes", return_value=False)
+    mocker.patch("egit.git.get_last_tag", return_value="v1.1.0")
+    mocker.patch("egit.git.get_commits_between", return_value=COMMITS)
+    mocker.patch("egit.llm.generate_release_notes", return_value="Release notes content")
+
+    result = CliRunner().invoke(app, ["release-notes", "v1.2.0", "--json"])
+
+    assert result.exit_code == 0
+    output = json.loads(result.stdout)
+    assert (output["notes"], output["from_ref"], output["commits"]) == ("Release notes content", "v1.1.0", 2)
+
+def test_config_is_parsed_once_per_change(tmp_path, mocker):
+    """Test that the config file is reused until it changes and callers can't modify the shared copy"""
+    config_path = tmp_path / "egit.json"
+    mocker.patch("egit.config.get_config_path", return_value=config_path)
+    config.save_config({"llm_model": "a"})
+    json_load = mocker.spy(json, "load")
+
+    config.load_config()["llm_model"] = "changed"
+    assert config.load_config() == {"llm_model": "a"}
+    assert json_load.call_count == 1
+
+    config.save_config({"llm_model": "b"})
+    assert config.load_config() == {"llm_model": "b"}
+
+def test_regenerate_asks_the_llm_again(mock_config, mocker):
+    """Test that an identical request reuses the answer unless regenerating, which replaces it"""
+    mocker.patch("egit.llm.get_config", return_value=mock_config)
+    completion = mocker.patch("egit.llm.completion", side_effect=lambda **kwargs: MagicMock(choices=[
+        MagicMock(message=MagicMock(content=f"Update search {completion.call_count}"))
+    ]))
+    changes = Changes(changes=["M\tsearch.py"], diffs=["+ new code"])
+    session = Session(record=False)
+
+    assert session.summarize(changes, deadline=0).summary == "Update search 1"
+    assert session.summarize(changes, deadline=0).summary == "Update search 1"
+    assert session.summarize(changes, deadline=0, regenerate=True).summary == "Update search 2"
+    assert session.summarize(changes, deadline=0).summary == "Update search 2"
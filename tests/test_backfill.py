@@ -0,0 +1,107 @@
+"""
+Tests for batch summarization of commit ranges
+"""
+import subprocess
+import pytest
+from typer.testing import CliRunner
+from egit import backfill, db, git
+from egit.cli import app
+
+def _git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args], cwd=repo, check=True, capture_output=True)
+
+@pytest.fixture
+def repo(tmp_path):
+    """A small repository with three commits"""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    (repo / "a.py").write_text("a = 1\n")
+    _git(repo, "add", "a.py")
+    _git(repo, "commit", "-q", "-m", "Add a\n\nWith a body")
+    (repo / "a.py").write_text("a = 2\n")
+    (repo / "b.py").write_text("b = 1\n")
+    _git(repo, "add", "a.py", "b.py")
+    _git(repo, "commit", "-q", "-m", "Change a and add b")
+    _git(repo, "mv", "b.py", "c.py")
+    _git(repo, "commit", "-q", "-m", "Rename b")
+    return repo
+
+def test_iter_commits_with_patches(repo):
+    """Test streaming commits with their changes from one git log"""
+    commits = list(git.iter_commits_with_patches("HEAD", cwd=repo))
+
+    assert [c["message"] for c in commits] == ["Rename b", "Change a and add b", "Add a\n\nWith a body"]
+    assert commits[0]["changes"] == ["R\tb.py\tc.py"]
+    assert commits[1]["changes"] == ["M\ta.py", "A\tb.py"]
+    assert commits[1]["diff"][0] == "diff --git a/a.py b/a.py"
+
+def test_iter_commits_with_patches_skips_merges(repo):
+    """Test that merge commits, which have no patch in git log, are not streamed"""
+    _git(repo, "checkout", "-q", "-b", "feature")
+    (repo / "d.py").write_text("d = 1\n")
+    _git(repo, "add", "d.py")
+    _git(repo, "commit", "-q", "-m", "Add d")
+    _git(repo, "checkout", "-q", "-")
+    _git(repo, "merge", "-q", "--no-ff", "-m", "Merge feature", "feature")
+
+    commits = list(git.iter_commits_with_patches("HEAD", cwd=repo))
+
+    assert len(commits) == 4 and "Merge feature" not in {c["message"] for c in commits}
+    assert all(c["changes"] for c in commits)
+
+def test_iter_commits_with_patches_raises_on_git_failure(repo, mocker):
+    """Test that git failing after some commits were streamed is an error, but closing the stream early isn't"""
+    stream = git.iter_commits_with_patches("HEAD", cwd=repo)
+    next(stream)
+    stream.close()
+
+    popen = subprocess.Popen
+    mocker.patch("egit.git.subprocess.Popen", side_effect=lambda args, **kwargs: popen(
+        ["sh", "-c", 'git "$@"; echo "fatal: bad object" >&2; exit 128', "git", *args[1:]], **kwargs
+    ))
+    with pytest.raises(Exception, match="bad object"):
+        list(git.iter_commits_with_patches("HEAD", cwd=repo))
+
+def test_backfill_range_resumes(repo, mocker):
+    """Test that a second run skips commits already summarized"""
+    mocker.patch("egit.llm.get_llm_config", return_value={"model": "test-model"})
+    summarize = mocker.patch("egit.llm.summarize_changes", return_value="Summary")
+
+    counts = backfill.backfill_range("HEAD", jobs=2, cwd=repo)
+
+    assert counts == {"summarized": 3, "skipped": 0, "failed": 0}
+    assert len(db.get_summarized_commits("backfill")) == 3
+
+    counts = backfill.backfill_range("HEAD", jobs=2, cwd=repo)
+
+    assert counts == {"summarized": 0, "skipped": 3, "failed": 0}
+    assert summarize.call_count == 3
+
+def test_backfill_range_does_not_record_failures(repo, mocker):
+    """Test that failed summaries are retried on the next run"""
+    mocker.patch("egit.llm.get_llm_config", return_value={"model": "test-model"})
+    mocker.patch("egit.llm.summarize_changes", side_effect=Exception("Error generating summary: timeout"))
+
+    counts = backfill.backfill_range("HEAD", jobs=2, cwd=repo)
+
+    assert counts["failed"] == 3
+    assert db.get_summarized_commits("backfill") == set()
+
+def test_cli_backfill_counts_the_streamed_commits(repo, mocker, monkeypatch):
+    """Test that the progress total leaves out merges and failed commits exit 1 without a generic error"""
+    _git(repo, "checkout", "-q", "-b", "feature")
+    (repo / "d.py").write_text("d = 1\n")
+    _git(repo, "add", "d.py")
+    _git(repo, "commit", "-q", "-m", "Add d")
+    _git(repo, "checkout", "-q", "-")
+    _git(repo, "merge", "-q", "--no-ff", "-m", "Merge feature", "feature")
+    monkeypatch.chdir(repo)
+    mocker.patch("egit.llm.get_llm_config", return_value={"model": "test-model"})
+    mocker.patch("egit.llm.summarize_changes", side_effect=Exception("timeout"))
+
+    assert git.count_commits("HEAD") == 4
+    result = CliRunner().invoke(app, ["summarize", "--range", "HEAD"])
+
+    assert result.exit_code == 1
+    assert "4 failed" in result.stdout and "Error:" not in result.stdout
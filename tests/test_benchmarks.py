@@ -0,0 +1,34 @@
+"""
+Smoke tests for the git benchmark suite
+"""
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+import bench_git  # noqa: E402
+from synthetic_repo import RepoShape, generate_repo  # noqa: E402
+
+def test_generate_repo(tmp_path):
+    """Test generating a repository of a given shape"""
+    shape = RepoShape(commits=12, files=5, tag_every=5, branch_commits=2, binary_every=4, staged_files=2)
+
+    repo = generate_repo(tmp_path / "repo", shape)
+
+    assert (repo / ".git").exists()
+    assert (repo / "assets").exists()
+
+def test_bench_git_writes_json(tmp_path):
+    """Test running the suite and writing JSON results"""
+    output = tmp_path / "results.json"
+
+    exit_code = bench_git.main([
+        "--preset", "small", "--commits", "12", "--files", "5", "--tag-every", "5",
+        "--repeat", "1", "--repo-dir", str(tmp_path / "repo"), "--output", str(output)
+    ])
+
+    results = json.loads(output.read_text())["results"]
+    assert exit_code == 0
+    assert "e2e:release-notes" in results
+    assert all("error" not in result for result in results.values())
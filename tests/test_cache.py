@@ -0,0 +1,95 @@
+"""
+Tests for the on-disk cache and cross-process request coalescing
+"""
+import json
+import multiprocessing
+import os
+import socket
+import time
+from egit import cache
+
+def _coalesced_worker(cache_dir, counter_path, results):
+    os.environ["EGIT_CACHE_DIR"] = cache_dir
+
+    def compute():
+        with open(counter_path, "a") as f:
+            f.write("x")
+        time.sleep(0.5)
+        return "Add shared summary"
+
+    results.put(cache.single_flight("responses", "same-key", compute, timeout=30))
+
+def test_single_flight_across_processes(isolated_cache, tmp_path):
+    """Test that concurrent processes share one computation"""
+    counter_path = tmp_path / "calls"
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [context.Process(target=_coalesced_worker, args=(str(isolated_cache), str(counter_path), results))
+               for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+
+    assert [results.get(timeout=5) for _ in workers] == ["Add shared summary"] * 4
+    assert counter_path.read_text() == "x"
+
+def test_single_flight_breaks_stale_lock():
+    """Test that a lock left by a dead process doesn't block the key"""
+    key = cache.make_key("stale")
+    lock_path = cache._entry_path("responses", key).with_suffix(".lock")
+    lock_path.parent.mkdir(parents=True)
+    # A pid far above any real pid_max
+    lock_path.write_text(json.dumps({"pid": 2 ** 30, "host": socket.gethostname()}))
+
+    assert cache.single_flight("responses", key, lambda: "value", timeout=5) == "value"
+    assert not lock_path.exists()
+
+def test_single_flight_times_out_waiting():
+    """Test that a waiter computes the value itself when the owner takes too long"""
+    key = cache.make_key("slow")
+    lock_path = cache._entry_path("responses", key).with_suffix(".lock")
+    lock_path.parent.mkdir(parents=True)
+    lock_path.write_text(json.dumps({"pid": os.getpid(), "host": "elsewhere"}))
+
+    started = time.monotonic()
+    assert cache.single_flight("responses", key, lambda: "fallback", timeout=0.2) == "fallback"
+    assert time.monotonic() - started < 2
+    assert cache.get("responses", key) == "fallback"
+
+def test_single_flight_shares_answers_for_max_age(mocker):
+    """Test that a shared answer expires after max_age instead of being reused for good"""
+    now = time.time()
+    clock = mocker.patch("egit.cache.time.time", return_value=now)
+    answers = iter(["first", "second"])
+
+    assert cache.single_flight("responses", "key", lambda: next(answers), max_age=60) == "first"
+    assert cache.single_flight("responses", "key", lambda: next(answers), max_age=60) == "first"
+
+    clock.return_value = now + 61
+    assert cache.single_flight("responses", "key", lambda: next(answers), max_age=60) == "second"
+
+def test_prune_removes_expired_and_oldest_entries():
+    """Test that pruning drops entries past their age, then the oldest beyond the size bound"""
+    for index in range(5):
+        cache.put("responses", f"key-{index}", index)
+        path = cache._entry_path("responses", f"key-{index}")
+        os.utime(path, (time.time() - 100 * (5 - index),) * 2)
+
+    assert cache.prune("responses", max_age=350) == 2
+    assert cache.prune("responses", max_entries=2) == 1
+    assert [cache.get("responses", f"key-{index}") for index in range(5)] == [None, None, None, 3, 4]
+
+def test_refreshing_skips_cached_llm_answers():
+    """Test that LLM answers are recomputed and replaced while refreshing, and other namespaces still read"""
+    cache.put("commit_summaries", "key", "old")
+    cache.put("tags", "key", "index")
+
+    with cache.refreshing():
+        assert cache.get("commit_summaries", "key") is None
+        assert cache.get("tags", "key") == "index"
+        assert cache.single_flight("responses", "key", lambda: "new") == "new"
+        cache.put("commit_summaries", "key", "new")
+
+    assert cache.get("commit_summaries", "key") == "new"
+    assert cache.single_flight("responses", "key", lambda: "newer") == "new"
@@ -63,3 +63,20 @@ def test_release_notes(mock_config, mock_completion, mocker):
     result = runner.invoke(app, ["release-notes", "v1.0.0"])
     
     assert result.exit_code == 0
+
+def test_history_search(mocker):
+    """Test searching the generation history"""
+    from egit import db
+    db.save_messages([{"generated_message": "Add history command", "command_type": "summarize", "model": "test-model"}])
+
+    result = runner.invoke(app, ["history", "search", "history"])
+
+    assert result.exit_code == 0
+    assert "Add history command" in result.stdout
+
+def test_history_list_empty():
+    """Test listing an empty history"""
+    result = runner.invoke(app, ["history", "list"])
+
+    assert result.exit_code == 0
+    assert "No messages found" in result.stdout
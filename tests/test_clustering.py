@@ -0,0 +1,54 @@
+"""
+Tests for near-duplicate commit clustering
+"""
+from egit import clustering
+
+def _commit(index: int, message: str, body=None, paths=None) -> dict:
+    return {"hash": f"{index:040x}", "message": message, "body": body or [], "paths": paths or []}
+
+def test_reverted_pairs_are_dropped():
+    """Test that a revert cancels the commit it reverts, and a revert of a revert restores it"""
+    commits = [
+        _commit(4, 'Revert "Revert "feat: add cache""', [f"This reverts commit {3:040x}."]),
+        _commit(3, 'Revert "feat: add cache"', [f"This reverts commit {1:040x}."]),
+        _commit(2, 'Revert "docs: explain setup"'),
+        _commit(1, "feat: add cache"),
+        _commit(0, "docs: explain setup"),
+    ]
+
+    assert [commit["message"] for commit in clustering.drop_reverts(commits)] == ["feat: add cache"]
+
+def test_duplicates_merge_with_counts():
+    """Test that similar subjects of one type and area merge, keeping the oldest message"""
+    commits = [
+        _commit(5, "fix typo"),
+        _commit(4, "fix(parser): handle empty diff in parser again", paths=["egit/git.py"]),
+        _commit(3, "wip"),
+        _commit(2, "feat: add json output to stats", paths=["egit/cli.py"]),
+        _commit(1, "fix(parser): handle empty diff in parser", paths=["egit/git.py", "tests/test_git.py"]),
+        _commit(0, "fix: handle empty diff in parser", paths=["docs/index.md"]),
+    ]
+
+    clusters = clustering.cluster_commits(commits)
+
+    assert [(cluster["message"], cluster["count"]) for cluster in clusters] == [
+        (clustering.NOISE_MESSAGE, 2),
+        ("fix(parser): handle empty diff in parser", 2),
+        ("feat: add json output to stats", 1),
+        ("fix: handle empty diff in parser", 1),
+    ]
+    assert clusters[1]["hashes"] == [f"{4:040x}", f"{1:040x}"]
+
+def test_distinct_commits_are_kept():
+    """Test that unrelated commits and different types stay separate"""
+    commits = [_commit(0, "feat: add retry to routing"), _commit(1, "fix: add retry to routing"),
+               _commit(2, "Update README badges")]
+
+    assert [cluster["count"] for cluster in clustering.cluster_commits(commits)] == [1, 1, 1]
+
+def test_noisy_range_shrinks():
+    """Test that a long noisy range collapses to a handful of entries"""
+    messages = ["wip", "address review comments", "fix: handle empty diff", "feat(cli): add --json to stats"]
+    commits = [_commit(index, messages[index % 4] + ("" if index % 3 else " "), paths=["egit/cli.py"]) for index in range(400)]
+
+    assert len(clustering.cluster_commits(commits)) == 3
@@ -0,0 +1,56 @@
+"""
+Tests for size-aware prompt context selection
+"""
+from egit import context
+
+def _file_diff(path: str, lines: int) -> list:
+    return [
+        f"diff --git a/{path} b/{path}",
+        "index 1111111..2222222 100644",
+        f"--- a/{path}",
+        f"+++ b/{path}",
+        "@@ -1,3 +1,40 @@ class Client:",
+        "+def retry_request(url):",
+    ] + [f"+    value_{i} = compute({i})" for i in range(lines)]
+
+def test_small_diff_is_sent_in_full():
+    """Test that diffs within the budget are untouched"""
+    diffs = _file_diff("egit/client.py", 5)
+
+    assert context.select_diff_context(["M\tegit/client.py"], diffs, budget=1000) == (["M\tegit/client.py"], diffs, context.FULL)
+
+def test_large_diff_uses_stats_and_symbols():
+    """Test that a diff over budget becomes line counts, hunk headers and changed symbols"""
+    diffs = _file_diff("egit/client.py", 500) + _file_diff("egit/server.py", 500)
+
+    changes, lines, tier = context.select_diff_context(["M\tegit/client.py", "M\tegit/server.py"], diffs, budget=500)
+
+    assert tier == context.STATS
+    assert "501\t0\tegit/client.py" in lines
+    assert "    symbols: retry_request" in lines
+    assert "    @@ -1,3 +1,40 @@ class Client:" in lines
+    assert context.estimate_tokens(lines) < context.estimate_tokens(diffs) / 50
+
+def test_huge_diff_uses_directory_rollup():
+    """Test that thousands of files collapse into per-directory totals within the budget"""
+    paths = [f"pkg{i % 5}/sub/module_{i}.py" for i in range(2000)]
+    diffs = [line for path in paths for line in _file_diff(path, 2)]
+    changes = [f"M\t{path}" for path in paths]
+
+    changes, lines, tier = context.select_diff_context(changes, diffs, budget=400)
+
+    assert tier == context.ROLLUP
+    assert changes[0] == "M\t400 files in pkg0/sub/"
+    assert "pkg0/sub/\t400 files\t+1200\t-0" in lines
+    assert context.estimate_tokens(changes) + context.estimate_tokens(lines) <= 400
+
+def test_commit_context_tiers():
+    """Test that long ranges drop bodies, then commits"""
+    commits = [{"hash": f"{i:040x}", "message": f"Fix bug {i}", "body": ["Long explanation " * 10]} for i in range(50)]
+
+    assert context.select_commit_context(commits, budget=100000) == (commits, context.FULL)
+    subjects, tier = context.select_commit_context(commits, budget=800)
+    assert tier == context.STATS and subjects[0]["body"] == []
+    kept, tier = context.select_commit_context(commits, budget=100)
+    assert tier == context.ROLLUP
+    assert kept[-1]["message"] == f"and {50 - len(kept) + 1} more commits not shown"
@@ -0,0 +1,157 @@
+"""
+Tests for the history database
+"""
+import pytest
+from sqlalchemy import inspect, text
+from egit import db
+
+def test_save_messages_bulk_insert():
+    """Test inserting many messages at once"""
+    db.save_messages([
+        {"commit_hash": f"{i:040d}", "generated_message": f"Message {i}", "command_type": "summarize"}
+        for i in range(50)
+    ])
+
+    messages = db.get_messages_by_type("summarize")
+
+    assert len(messages) == 50
+    assert db.get_message(f"{7:040d}").generated_message == "Message 7"
+
+def test_save_message():
+    """Test saving a single message"""
+    db.save_message("abc123", "original", "generated", "summarize")
+
+    message = db.get_message("abc123")
+
+    assert message.original_message == "original"
+    assert message.created_at is not None
+
+def test_record_message_is_written_behind():
+    """Test that recorded messages reach the database after a flush"""
+    db.record_message("release_notes", "Notes", ref="v1.0.0..HEAD", latency_ms=12.5, prompt_tokens=100, ignored="x")
+    db.record_message("release_notes", "More notes", completion_tokens=5)
+
+    db.flush_history(timeout=5)
+
+    messages = db.get_messages_by_type("release_notes")
+    assert [m.generated_message for m in messages] == ["Notes", "More notes"]
+    assert messages[0].latency_ms == 12.5
+    assert messages[1].completion_tokens == 5
+
+def test_failed_messages_dont_lose_metrics(mocker, capsys):
+    """Test that metrics in the same batch are still written when saving the messages fails, and the warning goes to stderr"""
+    mocker.patch("egit.db.save_messages", side_effect=Exception("disk full"))
+    db.record_message("summarize", "Lost")
+    db.record_metrics(command_type="summarize", total_ms=5.0)
+
+    db.flush_history(timeout=5)
+
+    assert [metric.total_ms for metric in db.get_metrics()] == [5.0]
+    captured = capsys.readouterr()
+    assert captured.out == "" and "disk full" in captured.err
+
+def test_wal_mode_and_indexes():
+    """Test that the database uses WAL and indexes the history table"""
+    engine = db.get_engine()
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+
+    indexed = {tuple(index["column_names"]) for index in inspect(engine).get_indexes("git_messages")}
+    assert ("command_type", "created_at") in indexed
+    assert ("created_at",) in indexed
+
+def test_concurrent_processes_can_write(isolated_db):
+    """Test that several egit processes can record history at the same time"""
+    import subprocess
+    import sys
+
+    script = (
+        "from egit import db\n"
+        "for i in range(20):\n"
+        "    db.save_messages([{'generated_message': str(i), 'command_type': 'concurrent'}] * 10)\n"
+    )
+    processes = [subprocess.Popen([sys.executable, "-c", script]) for _ in range(4)]
+
+    assert all(process.wait(timeout=60) == 0 for process in processes)
+    assert len(db.get_messages_by_type("concurrent")) == 4 * 20 * 10
+
+def test_search_messages():
+    """Test full-text search over generated and original messages"""
+    db.save_messages([
+        {"generated_message": "Add retry to the LLM client", "original_message": "wip", "command_type": "summarize"},
+        {"generated_message": "Fix typo in README", "original_message": "docs: typo", "command_type": "summarize"},
+        {"generated_message": "Release v1.0.0", "original_message": "Add retry support", "command_type": "release_notes"},
+    ])
+
+    assert {m.command_type for m in db.search_messages("retry")} == {"summarize", "release_notes"}
+    assert [m.generated_message for m in db.search_messages("retry", command_type="release_notes")] == ["Release v1.0.0"]
+    assert [m.generated_message for m in db.search_messages("docs: typo")] == ["Fix typo in README"]
+    assert db.search_messages("missing") == []
+
+def test_list_messages_keyset_pagination():
+    """Test paging through messages newest first"""
+    db.save_messages([{"generated_message": f"Message {i}", "command_type": "summarize"} for i in range(5)])
+
+    first_page = db.list_messages(limit=2)
+    second_page = db.list_messages(limit=2, before_id=first_page[-1].id)
+
+    assert [m.generated_message for m in first_page] == ["Message 4", "Message 3"]
+    assert [m.generated_message for m in second_page] == ["Message 2", "Message 1"]
+    assert len(list(db.iter_messages("summarize", batch_size=2))) == 5
+
+def test_prompts_and_diffs_are_deduplicated():
+    """Test that identical diffs are stored once, compressed, and loaded lazily"""
+    diff = "diff --git a/file1.py b/file1.py\n" + "+ new code\n" * 1000
+    db.save_messages([
+        {"generated_message": "Add code", "command_type": "summarize", "model": "small", "prompt": "p1", "diff": diff},
+        {"generated_message": "Add new code", "command_type": "summarize", "model": "large", "prompt": "p2", "diff": diff},
+    ])
+
+    first, second = db.list_messages(limit=2)
+    usage = db.get_blob_usage()
+
+    assert first.diff_hash == second.diff_hash
+    assert first.get_diff() == diff
+    assert second.get_prompt() == "p1"
+    assert usage["blobs"] == 3
+    assert usage["stored_bytes"] < usage["raw_bytes"]
+
+def test_vacuum_history_applies_retention():
+    """Test that expired prompts and diffs are removed but messages are kept"""
+    from datetime import datetime, timedelta
+    db.save_messages([
+        {"generated_message": "Old", "command_type": "summarize", "diff": "old diff",
+         "created_at": datetime.utcnow() - timedelta(days=100)},
+        {"generated_message": "New", "command_type": "summarize", "diff": "new diff"},
+    ])
+
+    result = db.vacuum_history(max_age_days=90)
+
+    new, old = db.list_messages(limit=2)
+    assert result["removed_blobs"] == 1
+    assert old.get_diff() is None
+    assert new.get_diff() == "new diff"
+
+    result = db.vacuum_history(max_bytes=0)
+    assert result["blobs"] == 0
+    assert len(db.list_messages()) == 2
+
+def test_vacuum_history_expires_each_message_once():
+    """Test that a second vacuum leaves already expired messages and their search index alone"""
+    from datetime import datetime, timedelta
+    db.save_messages([
+        {"generated_message": f"Fix parser {i}", "command_type": "summarize", "diff": f"diff {i}",
+         "created_at": datetime.utcnow() - timedelta(days=100)}
+        for i in range(20)
+    ])
+
+    assert db.vacuum_history(max_age_days=90)["expired_messages"] == 20
+    assert db.vacuum_history(max_age_days=90)["expired_messages"] == 0
+
+    with db.get_engine().connect() as connection:
+        trigger = connection.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE name = 'git_messages_fts_update'"
+        ).scalar()
+    assert "UPDATE OF generated_message, original_message" in trigger
+    assert len(db.search_messages("parser")) == 20
@@ -0,0 +1,52 @@
+"""
+Tests for the offline model evaluation harness
+"""
+import json
+from egit import db, evaluation
+
+DIFF = [
+    "diff --git a/app.py b/app.py",
+    "index 1111111..2222222 100644",
+    "--- a/app.py",
+    "+++ b/app.py",
+    "@@ -1 +1,2 @@",
+    " a = 1",
+    "+b = 2",
+]
+
+def test_load_fixture_cases(tmp_path):
+    """Test loading diff and release-note fixtures"""
+    (tmp_path / "change.diff").write_text("\n".join(DIFF))
+    (tmp_path / "release.json").write_text(json.dumps({"version": "v1.0.0", "commits": [{"message": "Add b"}]}))
+
+    cases = evaluation.load_fixture_cases(tmp_path)
+
+    assert [case["kind"] for case in cases] == ["summarize", "release_notes"]
+    assert cases[0]["changes"] == ["M\tapp.py"]
+    assert cases[1]["commits"][0] == {"hash": "", "message": "Add b", "body": []}
+
+def test_load_history_cases():
+    """Test replaying diffs stored in the history database"""
+    db.save_messages([{"generated_message": "Add b", "command_type": "summarize", "diff": "\n".join(DIFF)}])
+
+    cases = evaluation.load_history_cases()
+
+    assert len(cases) == 1
+    assert cases[0]["diffs"] == DIFF
+
+def test_evaluate_matrix(mocker):
+    """Test running every case with every setting and aggregating the checks"""
+    def fake_summarize(changes, diffs, stats=None, overrides=None):
+        stats.update(latency_ms=100.0, completion_tokens=10)
+        return "Add b to the app" if overrides["model"] == "good" else "Added b to the app"
+
+    mocker.patch("egit.llm.summarize_changes", side_effect=fake_summarize)
+    cases = [{"name": f"case{i}", "kind": "summarize", "changes": ["M\tapp.py"], "diffs": DIFF} for i in range(4)]
+
+    report = evaluation.evaluate(cases, evaluation.build_matrix(["good", "bad"], [0.2]), jobs=2)
+
+    assert [row["settings"] for row in report] == [{"model": "good", "temperature": 0.2}, {"model": "bad", "temperature": 0.2}]
+    assert report[0]["pass_rate"] == 1.0
+    assert report[0]["passes_per_sec"] == 10.0
+    assert report[1]["passed"] == 0
+    assert report[1]["results"][0]["problems"] == ["subject does not start with a present-tense verb"]
@@ -0,0 +1,61 @@
+"""
+Tests for the fake LLM server
+"""
+import json
+import urllib.error
+import urllib.request
+import pytest
+from egit import fake_llm, llm
+
+@pytest.fixture
+def server():
+    server = fake_llm.start_server(fake_llm.FakeLLMConfig(ttft=0, tokens_per_sec=0, seed=1))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _post(url: str, payload: dict):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+def test_openai_chat_completion(server):
+    """Test the OpenAI-compatible endpoint"""
+    response = _post(f"{server.url}/v1/chat/completions", {"model": "m", "messages": [{"role": "user", "content": "hi"}]})
+
+    assert response["choices"][0]["message"]["content"] == fake_llm.COMMIT_MESSAGE
+    assert response["usage"]["completion_tokens"] > 0
+    assert server.stats.completed == 1
+
+def test_ollama_generate(server):
+    """Test the Ollama generate endpoint"""
+    response = _post(f"{server.url}/api/generate", {"model": "m", "prompt": "Write release notes", "stream": False})
+
+    assert response["response"] == fake_llm.RELEASE_NOTES
+    assert response["done"] is True
+
+def test_rate_limit_and_context_errors(server):
+    """Test the configurable failure modes"""
+    server.config.rate_limit_rate = 1.0
+    with pytest.raises(urllib.error.HTTPError) as error:
+        _post(f"{server.url}/v1/chat/completions", {"messages": [{"role": "user", "content": "hi"}]})
+    assert error.value.code == 429
+    assert error.value.headers["Retry-After"] == "1"
+
+    server.config.rate_limit_rate = 0.0
+    server.config.context_length = 10
+    with pytest.raises(urllib.error.HTTPError) as error:
+        _post(f"{server.url}/v1/chat/completions", {"messages": [{"role": "user", "content": "x" * 100}]})
+    assert error.value.code == 400
+    assert json.loads(error.value.read())["error"]["code"] == "context_length_exceeded"
+
+def test_summarize_changes_against_fake_server(server, mock_config, mocker):
+    """Test pointing egit's LLM layer at the fake server through llm_api_base"""
+    mock_config.update(llm_provider="openai", llm_model="openai/fake-model", llm_api_base=f"{server.url}/v1")
+    mocker.patch("egit.llm.get_config", return_value=mock_config)
+
+    stats = {}
+    summary = llm.summarize_changes(["M file1.py"], ["+ new code"], stats=stats)
+
+    assert summary == fake_llm.COMMIT_MESSAGE
+    assert stats["completion_tokens"] > 0
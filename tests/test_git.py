@@ -17,14 +17,14 @@ def test_get_staged_changes(mock_subprocess_run):
 
 def test_get_staged_diff(mock_subprocess_run):
     """Test getting staged diff"""
-    expected_diff = "+++ file1.py\n- old code\n+ new code"
+    expected_diff = b"+++ file1.py\n- old code\n+ new code\n"
     mock_subprocess_run.return_value.stdout = expected_diff
     
     diff = git.get_staged_diff()
     
     mock_subprocess_run.assert_called_once()
-    assert isinstance(diff, list)  
-    assert len(diff) == 3  
+    assert diff == ["+++ file1.py", "- old code", "+ new code"]
+    assert bytes(diff.raw()) == expected_diff.rstrip(b"\n")
 
 def test_get_branch_changes(mock_subprocess_run):
     """Test getting branch changes"""
@@ -55,3 +55,41 @@ def test_create_tag(mock_subprocess_run):
     args = mock_subprocess_run.call_args[0][0]
     assert "tag" in args
     assert "v1.0.0" in args
+
+def test_split_diff_by_file():
+    """Test splitting a diff into per-file sections"""
+    diff = [
+        "diff --git a/file1.py b/file1.py",
+        "index 1111111111111111111111111111111111111111..2222222222222222222222222222222222222222 100644",
+        "--- a/file1.py",
+        "+++ b/file1.py",
+        "+ new code",
+        "diff --git a/old.py b/new.py",
+        "similarity index 100%",
+        "rename from old.py",
+        "rename to new.py",
+    ]
+
+    files = git.split_diff_by_file(diff)
+
+    assert [f["path"] for f in files] == ["file1.py", "new.py"]
+    assert files[0]["old_blob"] == "1" * 40
+    assert files[0]["new_blob"] == "2" * 40
+    assert len(files[0]["lines"]) == 5
+    assert files[1]["old_blob"] is None
+
+def test_get_commits_between_with_paths_in_one_log(mock_subprocess_run):
+    """Test that commits and the paths they touched come from a single git log"""
+    mock_subprocess_run.return_value.stdout = (
+        "\x1eabc123\nfeat: add search\nWith a body\n\n\x1f\n\nsearch.py\ndocs/search.md\n"
+        "\x1edef456\nMerge branch 'feature'\n\x1f\n"
+    )
+
+    commits = git.get_commits_between("v1.0.0", "HEAD", with_paths=True)
+
+    mock_subprocess_run.assert_called_once()
+    assert "--name-only" in mock_subprocess_run.call_args.args[0]
+    assert commits == [
+        {"hash": "abc123", "message": "feat: add search", "body": ["With a body"], "paths": ["search.py", "docs/search.md"]},
+        {"hash": "def456", "message": "Merge branch 'feature'", "body": [], "paths": []},
+    ]
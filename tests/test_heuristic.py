@@ -0,0 +1,51 @@
+"""
+Tests for offline commit message generation
+"""
+import time
+from typer.testing import CliRunner
+from egit import heuristic
+from egit.cli import app
+from egit.validation import check_commit_message
+
+runner = CliRunner()
+
+def test_generate_message():
+    """Test messages for common change shapes"""
+    assert heuristic.generate_message(["M\tegit/cli.py"]) == "Update cli.py in egit"
+    assert heuristic.generate_message(["R100\tegit/a.py\tegit/b.py"]) == "Rename a.py to b.py in egit"
+    assert heuristic.generate_message(["A\tegit/heuristic.py", "M\tegit/cli.py"]) == "Add heuristic.py, update cli.py in egit"
+    assert heuristic.generate_message(["D\tdocs/a.md", "D\tdocs/b.md"]) == "Remove a.md and b.md in docs"
+    assert heuristic.generate_message(["M file1.py"]) == "Update file1.py"
+
+def test_generate_message_orders_by_diff_stats_and_fits():
+    """Test that the most-changed file is named and long change sets still fit on one line"""
+    changes = [f"M\tpkg/module_with_a_long_name_{i}.py" for i in range(20)]
+    diffs = ["diff --git a/pkg/module_with_a_long_name_7.py b/pkg/module_with_a_long_name_7.py", "+x", "+y"]
+
+    message = heuristic.generate_message(changes, diffs)
+
+    assert message == "Update module_with_a_long_name_7.py and 19 other files in pkg"
+    assert check_commit_message(message) == []
+
+def test_fallback_when_llm_fails(mocker):
+    """Test falling back when the model is unreachable"""
+    mocker.patch("egit.llm.summarize_changes", side_effect=Exception("connection refused"))
+    stats = {}
+
+    assert heuristic.summarize_with_fallback(["A\tnew.py"], [], stats=stats) == "Add new.py"
+    assert stats["tier"] == "heuristic"
+    assert stats["fallback_reason"] == "connection refused"
+
+def test_commit_is_not_blocked_by_slow_model(mocker):
+    """Test that --deadline commits the offline message when the model is too slow"""
+    mocker.patch("egit.llm.summarize_changes", side_effect=lambda *args, **kwargs: time.sleep(5) or "Late")
+    mocker.patch("egit.git.get_staged_changes", return_value=["M\tegit/cli.py"])
+    mocker.patch("egit.git.get_staged_diff", return_value=[])
+    commit = mocker.patch("egit.git.commit")
+
+    started = time.monotonic()
+    result = runner.invoke(app, ["summarize", "--commit", "--deadline", "0.2"])
+
+    assert result.exit_code == 0
+    assert time.monotonic() - started < 3
+    commit.assert_called_once_with("Update cli.py in egit")
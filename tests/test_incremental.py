@@ -0,0 +1,58 @@
+"""
+Tests for incremental release notes
+"""
+import pytest
+
+from egit import incremental
+from egit import llm
+
+def _commit(index: int, message: str) -> dict:
+    return {"hash": f"{index:040x}", "message": message, "body": []}
+
+@pytest.fixture
+def fake_llm(mocker):
+    """Answer categorize prompts with one bullet per commit subject and summaries with a fixed line"""
+    prompts = []
+
+    def complete(messages, llm_config, stats=None):
+        prompts.append(messages[1]["content"])
+        if messages[0]["content"] == llm.CATEGORIZE_SYSTEM_PROMPT:
+            subjects = [line[len("Message: "):] for line in messages[1]["content"].splitlines() if line.startswith("Message: ")]
+            return "FEATURES:\n" + "\n".join(f"- {subject}" for subject in subjects)
+        return "Adds caching and retries"
+
+    mocker.patch("egit.llm._complete", side_effect=complete)
+    mocker.patch("egit.llm.get_llm_config", return_value={"model": "test-model"})
+    return prompts
+
+def test_refresh_only_processes_new_commits(fake_llm):
+    """Test that a second run categorizes just the new commits and merges them into the stored bullets"""
+    commits = [_commit(2, "Add response cache"), _commit(1, "Add retries")]
+    notes = incremental.generate_release_notes(commits, "v1.0.0", "base")
+
+    assert notes == "Adds caching and retries\n\nFEATURES:\n- Add response cache\n- Add retries"
+
+    stats = {}
+    fake_llm.clear()
+    notes = incremental.generate_release_notes([_commit(3, "Add metrics export")] + commits, "v1.0.0", "base", stats=stats)
+
+    assert stats["new_commits"] == 1 and stats["reused_commits"] == 2
+    assert "Add metrics export" in fake_llm[0] and "Add retries" not in fake_llm[0]
+    assert notes.endswith("- Add response cache\n- Add retries\n- Add metrics export")
+
+def test_rewritten_range_is_rebuilt(fake_llm):
+    """Test that drafts are rebuilt when covered commits disappear or a new commit is a revert"""
+    incremental.generate_release_notes([_commit(1, "Add retries")], "v1.0.0", "base")
+
+    stats = {}
+    incremental.generate_release_notes([_commit(5, "Add retries differently")], "v1.0.0", "base", stats=stats)
+    assert stats["reused_commits"] == 0
+
+    commits = [_commit(6, 'Revert "Add retries differently"'), _commit(5, "Add retries differently")]
+    assert incremental.find_delta(commits, {"hashes": [f"{5:040x}"], "sections": {}}) is None
+
+def test_parse_sections():
+    """Test that bullets are grouped under their headers"""
+    text = "- stray bullet\nFEATURES:\n- Add cache\n\nfixes:\n* Fix crash\nsome commentary"
+
+    assert llm.parse_sections(text) == {"CHANGES:": ["stray bullet"], "FEATURES:": ["Add cache"], "FIXES:": ["Fix crash"]}
@@ -3,6 +3,7 @@ Tests for LLM functionality
 """
 import pytest
 import os
+import threading
 from typing import Dict, Any
 from egit import llm
 from unittest.mock import MagicMock, AsyncMock
@@ -81,3 +82,84 @@ def test_generate_release_notes(mock_config, mocker):
     mock_completion.assert_called_once()
     assert isinstance(notes, str)
     assert "Release notes content" in notes
+
+def _file_diff(path: str, old_blob: str, new_blob: str) -> list:
+    return [
+        f"diff --git a/{path} b/{path}",
+        f"index {old_blob * 40}..{new_blob * 40} 100644",
+        f"--- a/{path}",
+        f"+++ b/{path}",
+        "+ new code",
+    ]
+
+def test_summarize_changes_reuses_cached_file_summaries(mock_config, mocker):
+    """Test that only files with new blob pairs are re-summarized"""
+    mocker.patch("egit.llm.get_config", return_value=mock_config)
+    mock_completion = MagicMock()
+    mock_completion.side_effect = lambda **kwargs: MagicMock(choices=[
+        MagicMock(message=MagicMock(content=f"Update files {mock_completion.call_count}"))
+    ])
+    mocker.patch("egit.llm.completion", mock_completion)
+
+    changes = ["M file1.py", "M file2.py"]
+    diffs = _file_diff("file1.py", "a", "b") + _file_diff("file2.py", "c", "d")
+
+    # Two file summaries plus the final composition
+    assert llm.summarize_changes(changes, diffs) == "Update files 3"
+    assert mock_completion.call_count == 3
+
+    # Nothing changed, everything comes from the cache
+    assert llm.summarize_changes(changes, diffs) == "Update files 3"
+    assert mock_completion.call_count == 3
+
+    # Only file2.py changed: one file summary plus the composition
+    diffs = _file_diff("file1.py", "a", "b") + _file_diff("file2.py", "c", "e")
+    llm.summarize_changes(changes, diffs)
+    assert mock_completion.call_count == 5
+
+def test_file_summaries_run_at_once(mock_config, mocker):
+    """Test that uncached files are summarized concurrently and the composition is keyed on the change list"""
+    mocker.patch("egit.llm.get_config", return_value=mock_config)
+    both_files = threading.Barrier(2, timeout=5)
+
+    def complete(**kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        if prompt.startswith("File:"):
+            # Sequential calls would never get past the barrier
+            both_files.wait()
+            return MagicMock(choices=[MagicMock(message=MagicMock(content="Update code"))])
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=f"Compose {mock_completion.call_count}"))])
+
+    mock_completion = MagicMock(side_effect=complete)
+    mocker.patch("egit.llm.completion", mock_completion)
+    diffs = _file_diff("file1.py", "a", "b") + _file_diff("file2.py", "c", "d")
+
+    stats = {}
+    assert llm.summarize_changes(["M file1.py", "M file2.py"], diffs, stats=stats) == "Compose 3"
+    assert stats["latency_ms"] > 0
+
+    # Same per-file descriptions for other files: the composition isn't reused
+    diffs = _file_diff("file3.py", "a", "b") + _file_diff("file4.py", "c", "d")
+    assert llm.summarize_changes(["M file3.py", "M file4.py"], diffs) == "Compose 6"
+
+def test_summarize_changes_cascade(mock_config, mocker):
+    """Test that the fast model answers unless its message breaks the rules"""
+    mocker.patch("egit.llm.get_config", return_value=mock_config | {"llm_fast_model": "ollama/tiny"})
+    answers = {"ollama/tiny": "Add test helper", "ollama/llama3.2:3b": "Add test helper and fixtures"}
+    mock_completion = MagicMock()
+    mock_completion.side_effect = lambda **kwargs: MagicMock(choices=[
+        MagicMock(message=MagicMock(content=answers[kwargs["model"]]))
+    ])
+    mocker.patch("egit.llm.completion", mock_completion)
+    diffs = ["+ def test():", "- old code"]
+
+    stats = {}
+    assert llm.summarize_changes(["file1.py"], diffs, stats=stats) == "Add test helper"
+    assert (stats["model"], stats["tier"]) == ("ollama/tiny", "fast")
+
+    # An answer breaking the one-line rule is escalated to the configured model
+    answers["ollama/tiny"] = "This commit adds a test helper.\nIt is useful."
+    stats = {}
+    assert llm.summarize_changes(["file1.py"], diffs + ["+ more"], stats=stats) == "Add test helper and fixtures"
+    assert (stats["model"], stats["tier"]) == ("ollama/llama3.2:3b", "escalated")
+    assert mock_completion.call_count == 3
@@ -0,0 +1,77 @@
+"""
+Tests for aggregated run metrics
+"""
+import json
+from typer.testing import CliRunner
+from egit import cache, db, metrics
+from egit.cli import app
+
+runner = CliRunner()
+
+def _seed():
+    db.save_messages([
+        {"generated_message": f"Message {i}", "command_type": "summarize", "model": "fast-model",
+         "latency_ms": float(100 * (i + 1)), "prompt_tokens": 50, "completion_tokens": 10}
+        for i in range(10)
+    ])
+    db.save_metrics([
+        {"command_type": "summarize", "model": "fast-model", "total_ms": 500.0, "git_ms": 20.0,
+         "cache_hits": 3, "cache_misses": 1, "repo_files": 50},
+        {"command_type": "summarize", "model": "fast-model", "total_ms": 700.0, "git_ms": 400.0,
+         "cache_hits": 0, "cache_misses": 4, "repo_files": 20_000},
+    ])
+
+def test_percentile():
+    """Test interpolated percentiles"""
+    assert metrics.percentile([], 50) is None
+    assert metrics.percentile([1, 2, 3, 4], 50) == 2.5
+    assert metrics.percentile(list(range(101)), 95) == 95
+
+def test_build_report():
+    """Test percentiles, throughput, cache hit rates and repository size buckets"""
+    _seed()
+
+    report = metrics.build_report()
+
+    model = report["models"][0]
+    assert model["model"] == "fast-model"
+    assert model["count"] == 10
+    assert model["p50_ms"] == 550
+    assert model["tokens_per_sec"] == 100 / 5.5
+    command = report["commands"][0]
+    assert command["count"] == 2
+    assert command["cache_hit_rate"] == 3 / 8
+    assert [row["repo_size"] for row in report["git_by_repo_size"]] == ["0-999 files", "10000-99999 files"]
+    assert report["trend"][0]["count"] == 10
+
+def test_record_run_counts_cache_lookups():
+    """Test that a recorded run carries the LLM cache counters since start_run, leaving out other namespaces"""
+    started = metrics.start_run()
+    cache.put("responses", "key", "value")
+    cache.get("responses", "key")
+    cache.get("commit_summaries", "missing")
+    cache.get("routing", "endpoints")
+    cache.get("symbols", "missing")
+
+    metrics.record_run("summarize", started, git_ms=5.0, stats={"model": "test-model", "latency_ms": 12.0})
+    db.flush_history()
+
+    run = db.get_metrics()[0]
+    assert (run.cache_hits, run.cache_misses) == (1, 1)
+    assert cache.get_stats(["symbols"]) == {"hits": 0, "misses": 1}
+    assert cache.get_stats(None) == {"hits": 1, "misses": 3}
+    assert run.model == "test-model"
+    assert run.llm_ms == 12.0
+
+def test_stats_command_exports(tmp_path):
+    """Test the JSON and Prometheus exports of egit stats"""
+    _seed()
+    prom_path = tmp_path / "egit.prom"
+
+    result = runner.invoke(app, ["stats", "--json", "--prometheus", str(prom_path)])
+
+    assert result.exit_code == 0
+    assert json.loads(result.stdout)["models"][0]["model"] == "fast-model"
+    prom = prom_path.read_text()
+    assert 'egit_llm_latency_ms{model="fast-model",quantile="0.95"}' in prom
+    assert "egit_cache_hit_ratio" in prom
@@ -0,0 +1,75 @@
+"""
+Tests for monorepo package partitioning
+"""
+import json
+import threading
+
+from egit import packages
+
+PACKAGES = {"api": ["services/api"], "api-auth": ["services/api/auth"], "web": ["apps/web", "libs/ui"]}
+
+def _file_diff(path: str) -> list:
+    return [f"diff --git a/{path} b/{path}", "index 1111111..2222222 100644", f"--- a/{path}", f"+++ b/{path}",
+            "@@ -1 +1 @@", "-old", "+new"]
+
+def test_partition_changes_by_deepest_root():
+    """Test that files go to the package with the deepest matching root and the rest to (other)"""
+    paths = ["services/api/app.py", "services/api/auth/token.py", "libs/ui/button.js", "README.md"]
+    changes = [f"M\t{path}" for path in paths]
+    diffs = [line for path in paths for line in _file_diff(path)]
+
+    partitions = packages.partition_changes(changes, diffs, PACKAGES)
+
+    assert list(partitions) == ["api", "api-auth", "web", packages.OTHER_PACKAGE]
+    assert partitions["api-auth"] == (["M\tservices/api/auth/token.py"], _file_diff("services/api/auth/token.py"))
+    assert partitions["web"][0] == ["M\tlibs/ui/button.js"]
+
+def test_partition_commits_lists_shared_commits_in_each_package():
+    """Test that a commit touching two packages appears in both"""
+    commits = [
+        {"hash": "a", "message": "Share button", "body": [], "paths": ["apps/web/page.js", "services/api/app.py"]},
+        {"hash": "b", "message": "Fix token", "body": [], "paths": ["services/api/auth/token.py"]},
+        {"hash": "c", "message": "Empty", "body": [], "paths": []},
+    ]
+
+    partitions = packages.partition_commits(commits, PACKAGES)
+
+    assert {name: [commit["hash"] for commit in items] for name, items in partitions.items()} == {
+        "api": ["a"], "api-auth": ["b"], "web": ["a"], packages.OTHER_PACKAGE: ["c"]
+    }
+
+def test_resolve_packages(tmp_path):
+    """Test that --path alone makes one package per path and selects packages from a map"""
+    package_map = tmp_path / "packages.json"
+    package_map.write_text(json.dumps({"packages": {"api": "services/api", "web": ["apps/web", "libs/ui"]}}))
+
+    assert packages.resolve_packages(["services/api/", "docs"]) == {"services/api": ["services/api"], "docs": ["docs"]}
+    assert packages.resolve_packages(None, package_map) == {"api": ["services/api"], "web": ["apps/web", "libs/ui"]}
+    assert packages.resolve_packages(["libs/ui"], package_map) == {"web": ["apps/web", "libs/ui"]}
+    assert packages.resolve_packages(None, None) == {}
+
+def test_packages_run_concurrently_and_combine():
+    """Test that packages are processed at the same time and joined in package order"""
+    barrier = threading.Barrier(3, timeout=5)
+
+    def summarize(name, partition):
+        barrier.wait()  # Only passes if all three packages are in flight together
+        return f"Update {len(partition)} files"
+
+    results = packages.run_concurrently({"api": [1], "web": [1, 2], "(other)": [1, 2, 3]}, summarize, jobs=3)
+
+    assert packages.combine_summaries(results) == "api: Update 1 files\nweb: Update 2 files\n(other): Update 3 files"
+    assert packages.combine_release_notes({"api": "Faster\n\nFIXES:\n- Fix"}, "v1.0.0") == \
+        "Release v1.0.0 with changes to 1 package: api\n\napi:\nFaster\n\nFIXES:\n- Fix"
+
+def test_explicit_paths_leave_out_other_files():
+    """Test that without keep_other, files and commits outside every package are dropped rather than grouped"""
+    changes = ["M\tservices/api/app.py", "M\tREADME.md"]
+    diffs = [line for path in ("services/api/app.py", "README.md") for line in _file_diff(path)]
+    commits = [{"hash": "a", "message": "Fix api", "body": [], "paths": ["services/api/app.py"]},
+               {"hash": "b", "message": "Fix docs", "body": [], "paths": ["README.md"]}]
+    scope = packages.resolve_packages(["services/api"])
+
+    assert list(packages.partition_changes(changes, diffs, scope, keep_other=False)) == ["services/api"]
+    assert list(packages.partition_commits(commits, scope, keep_other=False)) == ["services/api"]
+    assert packages.partition_commits(commits[1:], scope, keep_other=False) == {}
@@ -0,0 +1,62 @@
+"""
+Tests for hot-path profiling
+"""
+import json
+import pytest
+from rich.console import Console
+from egit import profiling
+
+@pytest.fixture(autouse=True)
+def disable_profiling():
+    yield
+    profiling.disable()
+
+def test_span_is_noop_when_disabled():
+    """Test that nothing is recorded while profiling is off"""
+    with profiling.span("git", command="diff") as span:
+        span.set(lines=10)
+
+    assert profiling.get_spans() == []
+
+def test_breakdown_and_chrome_trace(tmp_path):
+    """Test aggregating spans and writing a Chrome trace"""
+    profiling.enable()
+    for _ in range(3):
+        with profiling.span("git", command="diff"):
+            pass
+    with profiling.span("llm.completion", model="test-model") as span:
+        span.set(ttft_ms=5.0, prompt_tokens=10, completion_tokens=4)
+
+    breakdown = {row["name"]: row for row in profiling.get_breakdown()}
+    assert breakdown["git"]["calls"] == 3
+    assert breakdown["llm.completion"]["calls"] == 1
+
+    trace_path = tmp_path / "trace.json"
+    console = Console(record=True, width=120)
+    profiling.finish(console, trace_path)
+
+    events = json.loads(trace_path.read_text())["traceEvents"]
+    assert len(events) == 4
+    assert events[-1]["args"]["model"] == "test-model"
+    assert "LLM calls" in console.export_text()
+    assert not profiling.is_enabled()
+
+def test_git_commands_are_instrumented(mock_subprocess_run):
+    """Test that git calls are recorded as spans"""
+    from egit import git
+    profiling.enable()
+
+    git.get_staged_changes()
+
+    assert [(s["name"], s["attrs"]["command"]) for s in profiling.get_spans()] == [("git", "diff")]
+
+def test_report_includes_pending_history_writes():
+    """Test that history still queued when the command finishes is written and reported"""
+    from egit import db
+    profiling.enable()
+    db.record_message("summarize", "Add parser")
+
+    console = Console(record=True, width=120)
+    profiling.finish(console)
+
+    assert "db.write" in console.export_text()
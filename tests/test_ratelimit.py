@@ -0,0 +1,70 @@
+"""
+Tests for client-side rate limiting and retries
+"""
+import pytest
+from unittest.mock import MagicMock
+from egit import llm, ratelimit
+
+class RateLimitError(Exception):
+    """Stand-in for litellm.RateLimitError"""
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("rate limited")
+        self.response = MagicMock(headers={"retry-after": retry_after} if retry_after else {})
+
+@pytest.fixture
+def no_sleep(mocker):
+    return mocker.patch("egit.ratelimit.time.sleep")
+
+def test_token_bucket_wait_time():
+    """Test that the bucket reports how long until capacity is available"""
+    bucket = ratelimit.TokenBucket(60)
+    now = bucket.updated
+    bucket.take(60)
+
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 1) == 0.0
+
+def test_adaptive_concurrency_aimd():
+    """Test additive increase and multiplicative decrease of the concurrency limit"""
+    concurrency = ratelimit.AdaptiveConcurrency(8, 8)
+    concurrency.on_overload()
+    concurrency.on_overload()  # Within the same second, counted once
+    assert concurrency.limit == 4
+
+    for _ in range(4):
+        concurrency.on_success()
+    assert 4.9 < concurrency.limit < 5
+
+def test_retry_honors_retry_after(mocker, no_sleep):
+    """Test that transient errors are retried after the server's Retry-After"""
+    mocker.patch("egit.ratelimit.get_config", return_value={})
+    mocker.patch("egit.ratelimit.backoff", return_value=0.0)
+    func = MagicMock(side_effect=[RateLimitError(retry_after="0.05"), "done"])
+
+    assert ratelimit.call(func, 10) == "done"
+    assert func.call_count == 2
+    assert no_sleep.call_args_list[0].args == (0.05,)
+
+def test_permanent_errors_are_not_retried(mocker, no_sleep):
+    """Test that errors like bad credentials fail immediately"""
+    mocker.patch("egit.ratelimit.get_config", return_value={})
+    error = Exception("invalid api key")
+    error.status_code = 401
+    func = MagicMock(side_effect=error)
+
+    with pytest.raises(Exception, match="invalid api key"):
+        ratelimit.call(func, 10)
+    assert func.call_count == 1
+    no_sleep.assert_not_called()
+
+def test_summarize_changes_raises_after_retries(mock_config, mocker, no_sleep):
+    """Test that a failed summary raises instead of returning an error message that could be committed"""
+    mocker.patch("egit.llm.get_config", return_value=mock_config)
+    mocker.patch("egit.ratelimit.get_config", return_value={"llm_max_retries": 2})
+    mock_completion = mocker.patch("egit.llm.completion", side_effect=RateLimitError())
+
+    with pytest.raises(Exception, match="Error generating summary"):
+        llm.summarize_changes(["file1.py"], ["+ code"])
+    assert mock_completion.call_count == 3
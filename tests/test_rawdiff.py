@@ -0,0 +1,85 @@
+"""
+Tests for raw (undecoded) diffs
+"""
+import subprocess
+
+from egit import cache
+from egit import git
+from egit import packages
+from egit.rawdiff import RawDiff, concat, join, to_bytes
+
+DIFF = (
+    b"diff --git a/app.py b/app.py\n"
+    b"index 1111111..2222222 100644\n"
+    b"--- a/app.py\n"
+    b"+++ b/app.py\n"
+    b"@@ -1 +1 @@\n"
+    b"-name = 'caf\xe9'\n"  # Latin-1, not valid UTF-8
+    b"+name = 'cafe'\n"
+    b"diff --git a/docs/notes.md b/docs/notes.md\n"
+    b"index 3333333..4444444 100644\n"
+    b"--- a/docs/notes.md\n"
+    b"+++ b/docs/notes.md\n"
+    b"@@ -1 +1 @@\n"
+    b"-old\n"
+    b"+new\n"
+)
+
+def test_lines_are_decoded_only_when_read():
+    """Test that a raw diff reads like a list of lines and keeps invalid UTF-8 bytes for hashing"""
+    diff = RawDiff(DIFF)
+
+    assert len(diff) == 14
+    assert diff[5] == "-name = 'caf�'"
+    assert diff[-1] == "+new" and list(diff[12:]) == ["-old", "+new"]
+    assert bytes(diff.raw()) == DIFF[:-1]
+    assert join(diff) == "\n".join(diff)
+    # Invalid bytes change the key; text decoded with replacement characters would collide
+    assert cache.make_key(to_bytes(diff)) != cache.make_key(DIFF.replace(b"\xe9", b"\xe8")[:-1])
+
+def test_split_keeps_file_slices_raw():
+    """Test that splitting a raw diff gives the same files as splitting its text, as slices of the buffer"""
+    diff = RawDiff(DIFF)
+
+    files = git.split_diff_by_file(diff)
+
+    assert [(f["path"], f["old_blob"], f["new_blob"]) for f in files] == [
+        (f["path"], f["old_blob"], f["new_blob"]) for f in git.split_diff_by_file(list(diff))
+    ]
+    assert all(isinstance(f["lines"], RawDiff) for f in files)
+    assert bytes(files[0]["lines"].raw()) == DIFF[:DIFF.index(b"diff --git a/docs")].rstrip(b"\n")
+    assert files[1]["lines"] == list(diff)[7:]
+
+def test_partitions_and_concat_stay_raw():
+    """Test that per-package diffs and joined diffs are still raw"""
+    partitions = packages.partition_changes(["M\tapp.py", "M\tdocs/notes.md"], RawDiff(DIFF), {"docs": ["docs"]})
+
+    assert isinstance(partitions["docs"][1], RawDiff)
+    assert bytes(partitions[packages.OTHER_PACKAGE][1].raw()).endswith(b"+name = 'cafe'")
+    assert concat([RawDiff(b"a\nb\n"), RawDiff(b""), ["c"]]) == ["a", "b", "c"]
+    assert concat([[], []]) == []
+
+def test_staged_diff_of_a_latin1_file(tmp_path, monkeypatch):
+    """Test that git output is read as bytes, so non-UTF-8 content survives until the prompt"""
+    def run(*args):
+        subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    run("init", "-q")
+    (tmp_path / "legacy.txt").write_bytes(b"caf\xe9\n")
+    run("add", "legacy.txt")
+    monkeypatch.chdir(tmp_path)
+
+    diff = git.get_staged_diff()
+
+    assert b"+caf\xe9" in bytes(diff.raw())
+    assert diff[-1] == "+caf�"
+    assert git.get_changes_from_diff(diff) == ["A\tlegacy.txt"]
+
+def test_length_and_indexing_use_the_line_index():
+    """Test that the line count comes from the cached index, so indexing doesn't rescan the buffer"""
+    diff = RawDiff(b"".join(b"+line %d\n" % index for index in range(1000)))
+
+    assert [diff[index] for index in (0, -1, 500)] == ["+line 0", "+line 999", "+line 500"]
+    assert diff._starts is not None and len(diff) == len(diff._starts) == 1000
+    assert (len(RawDiff(b"")), len(RawDiff(b"\n")), list(RawDiff(b"a\n\nb"))) == (0, 1, ["a", "", "b"])
+    assert list(reversed(diff))[:2] == ["+line 999", "+line 998"]
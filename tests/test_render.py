@@ -0,0 +1,47 @@
+"""
+Tests for batched CLI rendering
+"""
+import io
+
+import pytest
+from rich.console import Console
+
+from egit import render
+
+@pytest.fixture(autouse=True)
+def reset_options():
+    """Restore the default output options after each test"""
+    yield
+    render._options.update(max_lines=None, pager=True, color=True)
+
+def test_long_output_is_capped_with_a_count():
+    """Test that lines beyond max_lines are summarized and markup in the text is printed literally"""
+    console = Console(file=io.StringIO(), width=80)
+    render.configure(max_lines=2)
+
+    render.print_lines(console, ["M\t[red]a.py[/red]", "A\tb.py", "D\tc.py", "D\td.py"])
+
+    assert console.file.getvalue() == "  M\t[red]a.py[/red]\n  A\tb.py\n  ... 2 more lines (--max-lines 0 shows all)\n"
+
+def test_diff_lines_are_colored_on_terminals():
+    """Test that diff lines get ANSI colors only when color is enabled"""
+    lines = ["@@ -1 +1 @@", "-old", "+new", " same"]
+
+    assert render.format_lines(lines, diff=True, color=True).splitlines() == [
+        "\x1b[36m  @@ -1 +1 @@\x1b[0m", "\x1b[31m  -old\x1b[0m", "\x1b[32m  +new\x1b[0m", "   same"
+    ]
+    assert render.format_lines(lines, diff=True, color=False) == "  @@ -1 +1 @@\n  -old\n  +new\n   same"
+
+def test_output_taller_than_terminal_is_paged(mocker):
+    """Test that long output on a terminal goes to the pager in full, unless paging is off"""
+    show = mocker.patch("egit.render.SystemPager.show")
+    console = Console(file=io.StringIO(), force_terminal=True, height=10, width=80)
+    lines = [f"+line {index}" for index in range(1000)]
+
+    render.print_lines(console, lines)
+    assert show.call_args[0][0].count("\n") == 1000
+    assert console.file.getvalue() == ""
+
+    render.configure(pager=False, max_lines=5)
+    render.print_lines(console, lines)
+    assert "995 more lines" in console.file.getvalue()
@@ -0,0 +1,99 @@
+"""
+Tests for latency-aware routing and hedged requests
+"""
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock
+from egit import routing
+
+ENDPOINTS = [
+    {"name": "ollama", "model": "ollama/llama3.1:8b", "api_base": "http://ollama:11434"},
+    {"name": "hosted", "model": "openai/gpt-4o-mini"},
+]
+
+@pytest.fixture(autouse=True)
+def fresh_stats():
+    routing.reset_stats()
+    yield
+    routing.reset_stats()
+
+def _fake_acompletion(delays, failing=()):
+    calls = []
+
+    async def acompletion(messages, **kwargs):
+        calls.append(kwargs["model"])
+        await asyncio.sleep(delays[kwargs["model"]])
+        if kwargs["model"] in failing:
+            raise Exception("server overloaded")
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=f"Answer from {kwargs['model']}"))])
+
+    return acompletion, calls
+
+def test_hedges_slow_endpoint(mocker):
+    """Test that a slow endpoint is hedged and the loser cancelled"""
+    mocker.patch("egit.routing.get_config", return_value={"llm_hedge_after_ms": 50})
+    acompletion, calls = _fake_acompletion({"ollama/llama3.1:8b": 5.0, "openai/gpt-4o-mini": 0.01})
+    mocker.patch("egit.routing.acompletion", side_effect=acompletion)
+
+    started = time.perf_counter()
+    response, endpoint = routing.complete(routing.order_endpoints(ENDPOINTS), [{"role": "user", "content": "hi"}], {"model": "x"})
+
+    assert endpoint["name"] == "hosted"
+    assert time.perf_counter() - started < 1.0
+    assert calls == ["ollama/llama3.1:8b", "openai/gpt-4o-mini"]
+    # The cancelled request is not counted as a failure
+    assert "ollama" not in routing.get_stats()
+
+def test_fails_over_and_reorders(mocker):
+    """Test failing over on errors and routing later requests away from the failing endpoint"""
+    mocker.patch("egit.routing.get_config", return_value={})
+    acompletion, calls = _fake_acompletion({"ollama/llama3.1:8b": 0.0, "openai/gpt-4o-mini": 0.0}, failing={"ollama/llama3.1:8b"})
+    mocker.patch("egit.routing.acompletion", side_effect=acompletion)
+    messages = [{"role": "user", "content": "hi"}]
+
+    for _ in range(3):
+        _, endpoint = routing.complete(ENDPOINTS, messages, {"model": "x"})
+        assert endpoint["name"] == "hosted"
+
+    assert routing.order_endpoints(ENDPOINTS)[0]["name"] == "hosted"
+    assert calls.count("ollama/llama3.1:8b") == 2
+
+def test_all_endpoints_failing(mocker):
+    """Test the error when no endpoint can answer"""
+    mocker.patch("egit.routing.get_config", return_value={})
+    acompletion, _ = _fake_acompletion({"ollama/llama3.1:8b": 0.0, "openai/gpt-4o-mini": 0.0},
+                                       failing={"ollama/llama3.1:8b", "openai/gpt-4o-mini"})
+    mocker.patch("egit.routing.acompletion", side_effect=acompletion)
+
+    with pytest.raises(Exception, match="All LLM endpoints failed"):
+        routing.complete(ENDPOINTS, [{"role": "user", "content": "hi"}], {"model": "x"})
+
+def test_hedge_deadline_from_p95(mocker):
+    """Test that the hedging deadline follows the endpoint's p95 latency"""
+    mocker.patch("egit.routing.get_config", return_value={})
+    for latency in range(100, 1100, 100):
+        routing.record("ollama", float(latency), failed=False)
+
+    assert routing.hedge_after_ms({"name": "ollama"}) == pytest.approx(955.0)
+    assert routing.hedge_after_ms({"name": "hosted"}) == routing.DEFAULT_HEDGE_AFTER_MS
+
+def test_endpoints_dont_inherit_the_primary_server(mocker):
+    """Test that each endpoint is called with its own api_base and key, not the primary's"""
+    mocker.patch("egit.routing.get_config", return_value={})
+    bases = {}
+
+    async def acompletion(messages, **kwargs):
+        bases[kwargs["model"]] = (kwargs["api_base"], kwargs["api_key"], kwargs["temperature"])
+        raise Exception("server overloaded")
+
+    mocker.patch("egit.routing.acompletion", side_effect=acompletion)
+    primary = {"model": "x", "api_base": "http://localhost:11434", "api_key": "sk-123", "temperature": 0.2}
+
+    with pytest.raises(Exception):
+        routing.complete(ENDPOINTS, [{"role": "user", "content": "hi"}], primary)
+
+    assert bases == {
+        "ollama/llama3.1:8b": ("http://ollama:11434", None, 0.2),
+        "openai/gpt-4o-mini": (None, None, 0.2),
+    }
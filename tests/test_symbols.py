@@ -0,0 +1,87 @@
+"""
+Tests for symbol-level change extraction
+"""
+import subprocess
+
+from egit import symbols
+
+OLD_MODULE = '''import os
+
+TIMEOUT = 10
+
+class Client:
+    def get(self, url):
+        return url
+
+    def close(self):
+        pass
+
+def connect(host):
+    return Client()
+'''
+
+def test_python_facts():
+    """Test that added, removed and modified functions and methods are reported"""
+    new_module = OLD_MODULE.replace("        return url", "        return url.strip()") \
+        .replace("    def close(self):\n        pass\n", "    def reset(self):\n        pass\n") \
+        + "\ndef disconnect(client):\n    client.reset()\n"
+
+    facts = symbols.analyze_file("egit/client.py", OLD_MODULE, new_module)
+
+    # Client itself is unchanged: its methods are reported on their own
+    assert sorted(facts) == ["added function disconnect", "added method Client.reset",
+                             "modified method Client.get", "removed method Client.close"]
+
+def test_python_formatting_only_has_no_facts():
+    """Test that comments, blank lines and spacing don't count as changes"""
+    reformatted = OLD_MODULE.replace("def connect(host):", "# Open a client\ndef connect( host ):\n\n")
+
+    assert symbols.analyze_file("egit/client.py", OLD_MODULE, reformatted) == []
+    assert symbols.analyze_file("egit/client.py", OLD_MODULE, OLD_MODULE.replace("TIMEOUT = 10", "TIMEOUT = 30")) == \
+        ["modified module-level code"]
+
+def test_regex_language_facts():
+    """Test that languages without a parser are split at definition lines"""
+    old = "package net\n\nfunc Dial(addr string) error {\n\treturn nil\n}\n\ntype Conn struct {}\n"
+    new = "package net\n\nfunc Dial(addr string) error {\n\treturn dial(addr)\n}\n\nfunc dial(addr string) error {\n\treturn nil\n}\n"
+
+    assert symbols.analyze_file("net/dial.go", old, new) == ["modified function Dial", "added function dial", "removed type Conn"]
+    assert symbols.analyze_file("README.md", old, new) is None
+    assert symbols.analyze_file("broken.py", "def f(:\n", "def f():\n    pass\n") is None
+
+def _git(repo, *args) -> str:
+    return subprocess.run(["git", *args], cwd=repo, capture_output=True, text=True, check=True).stdout
+
+def test_condense_diff_uses_blobs_and_cache(tmp_path, mocker):
+    """Test that a staged diff's hunks become facts and repeated blob pairs come from the cache"""
+    _git(tmp_path, "init", "-q")
+    (tmp_path / "client.py").write_text(OLD_MODULE)
+    (tmp_path / "notes.txt").write_text("one\n")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init")
+    (tmp_path / "client.py").write_text(OLD_MODULE + "\ndef disconnect(client):\n    pass\n")
+    (tmp_path / "notes.txt").write_text("two\n")
+    _git(tmp_path, "add", ".")
+    diffs = _git(tmp_path, "diff", "--cached").splitlines()
+
+    condensed = symbols.condense_diff(diffs, cwd=tmp_path)
+
+    assert "Changed symbols:" in condensed
+    assert "  added function disconnect" in condensed
+    assert "+def disconnect(client):" not in condensed
+    assert "+two" in condensed
+    assert "diff --git a/client.py b/client.py" in condensed
+
+    read_blobs = mocker.patch("egit.git.read_blobs")
+    assert symbols.condense_diff(diffs, cwd=tmp_path) == condensed
+    read_blobs.assert_not_called()
+
+    alongside = symbols.condense_diff(diffs, cwd=tmp_path, keep_hunks=True)
+    assert "+def disconnect(client):" in alongside and "  added function disconnect" in alongside
+
+def test_condense_diff_without_blobs_keeps_hunks(mocker):
+    """Test that diffs whose blobs can't be read are left as they are"""
+    mocker.patch("egit.git.read_blobs", side_effect=Exception("not a git repository"))
+    diffs = ["diff --git a/a.py b/a.py", "index 1111111..2222222 100644", "--- a/a.py", "+++ b/a.py", "@@ -1 +1 @@", "-x = 1", "+x = 2"]
+
+    assert symbols.condense_diff(diffs) == diffs
@@ -0,0 +1,58 @@
+"""
+Tests for the tag index and previous-release lookup
+"""
+import subprocess
+
+import pytest
+
+from egit import tags
+
+def _git(repo, *args) -> str:
+    return subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=repo,
+                          capture_output=True, text=True, check=True).stdout.strip()
+
+@pytest.fixture
+def repo(tmp_path):
+    """A repository with releases v1.0.0, v1.1.0-rc.1, v1.1.0 and v2.0.0 on main and v1.0.1 on a maintenance branch"""
+    _git(tmp_path, "init", "-q", "-b", "main")
+    for tag in ("v1.0.0", "v1.1.0-rc.1", "v1.1.0", "nightly", "v2.0.0"):
+        _git(tmp_path, "commit", "-q", "--allow-empty", "-m", tag)
+        _git(tmp_path, "tag", "-a", tag, "-m", tag)
+    _git(tmp_path, "checkout", "-q", "-b", "maint-1.0", "v1.0.0")
+    _git(tmp_path, "commit", "-q", "--allow-empty", "-m", "fix")
+    _git(tmp_path, "tag", "v1.0.1")
+    _git(tmp_path, "checkout", "-q", "main")
+    return tmp_path
+
+def test_parse_version_precedence():
+    """Test that versions sort by semver precedence and other tags aren't versions"""
+    ordered = ["v1.0.0-alpha", "v1.0.0-alpha.1", "v1.0.0-beta.2", "v1.0.0-beta.11", "v1.0.0-rc.1", "1.0.0", "v1.2", "release/1.10.0"]
+
+    assert sorted(ordered, key=tags.parse_version) == ordered
+    assert tags.parse_version("nightly") is None
+    assert tags.is_prerelease("v2.0.0-rc.1") and not tags.is_prerelease("v2.0.0")
+
+def test_previous_release(repo):
+    """Test that the previous release is the highest lower version reachable from the target"""
+    assert tags.previous_release("v3.0.0", cwd=repo) == "v2.0.0"
+    assert tags.previous_release("v2.0.0", "v2.0.0", cwd=repo) == "v1.1.0"
+    assert tags.previous_release("v1.1.0", "v1.1.0", cwd=repo) == "v1.0.0"
+    assert tags.previous_release("v1.1.0-rc.2", "v1.1.0", cwd=repo) == "v1.1.0-rc.1"
+    assert tags.previous_release("v1.0.2", "maint-1.0", cwd=repo) == "v1.0.1"
+    assert tags.previous_release(None, "maint-1.0", cwd=repo) == "v1.0.1"
+
+def test_index_is_cached_until_tags_change(repo, mocker):
+    """Test that the index is rebuilt only after a tag is added"""
+    tags.get_index(cwd=repo)
+    build = mocker.spy(tags, "build_index")
+
+    tags.get_index(cwd=repo)
+    assert build.call_count == 0
+
+    _git(repo, "tag", "v3.0.0")
+    assert tags.get_index(cwd=repo)["versions"][0]["tag"] == "v3.0.0"
+    assert build.call_count == 1
+
+    _git(repo, "pack-refs", "--all")
+    _git(repo, "tag", "-d", "v3.0.0")
+    assert tags.get_index(cwd=repo)["versions"][0]["tag"] == "v2.0.0"
@@ -0,0 +1,26 @@
+"""
+Tests for generated message conformance checks
+"""
+from egit.validation import check_commit_message, check_release_notes
+
+def test_conforming_commit_message():
+    """Test that good commit messages pass"""
+    assert check_commit_message("Add retry handling to the git client") == []
+    assert check_commit_message("feat(cli): add history search") == []
+    assert check_commit_message("Embed symbols in the prompt") == []
+
+def test_commit_message_problems():
+    """Test the individual commit message rules"""
+    assert check_commit_message("") == ["message is empty"]
+    assert "subject does not start with a present-tense verb" in check_commit_message("Added retry handling")
+    assert any("lines" in problem for problem in check_commit_message("Add retries\n\nBecause it failed"))
+    assert any("characters" in problem for problem in check_commit_message("Add " + "x" * 80))
+    assert any("this commit" in problem for problem in check_commit_message("Fix what this commit broke"))
+
+def test_release_notes():
+    """Test the release note format rules"""
+    notes = "Faster summaries and history search\n\nFEATURES:\n- Add history search\n\nFIXES:\n- Fix cache keys\n"
+    assert check_release_notes(notes) == []
+    assert check_release_notes("FEATURES:\n- Add search") == ["first line is a section header instead of a summary"]
+    assert "no FEATURES:, FIXES:, CHANGES: section" in check_release_notes("# Release\n\nSome text")
+    assert check_release_notes("Summary\n\nFIXES:\n\nCHANGES:\n- Bump") == ["section FIXES: has no bullet points"]
@@ -0,0 +1,51 @@
+"""
+Tests for multi-repository workspace mode
+"""
+import subprocess
+
+import pytest
+
+from egit import workspace
+
+def _git(repo, *args) -> None:
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=repo, capture_output=True, check=True)
+
+@pytest.fixture
+def repos(tmp_path):
+    """Two repositories tagged v1.0.0 with new commits since, and a plain directory"""
+    paths = []
+    for name in ("api", "web"):
+        repo = tmp_path / name
+        repo.mkdir()
+        _git(repo, "init", "-q")
+        _git(repo, "commit", "-q", "--allow-empty", "-m", "Initial commit")
+        _git(repo, "tag", "v1.0.0")
+        _git(repo, "commit", "-q", "--allow-empty", "-m", f"Add {name} feature")
+        paths.append(repo)
+    (tmp_path / "notes").mkdir()
+    return paths
+
+def test_discover_repos_from_glob_and_manifest(tmp_path, repos):
+    """Test that globs and manifests resolve to repository directories only"""
+    assert workspace.discover_repos(str(tmp_path / "*")) == repos
+
+    manifest = tmp_path / "repos.txt"
+    manifest.write_text("web  # frontend\n\nnotes\napi\n")
+    assert workspace.discover_repos(str(manifest)) == [repos[1], repos[0]]
+
+def test_release_notes_for_every_repo(repos, mocker):
+    """Test that commits are collected per repository and failures are reported without stopping the rest"""
+    generate = mocker.patch("egit.llm.generate_release_notes",
+                            side_effect=lambda commits, version, stats=None: f"{version}: {commits[0]['message']}")
+    seen = []
+
+    results = workspace.release_notes(repos, "v1.1.0", processes=2, concurrency=2, on_result=seen.append)
+
+    assert [(result["from_ref"], result["commit_count"], result["notes"]) for result in results] == [
+        ("v1.0.0", 1, "v1.1.0: Add api feature"),
+        ("v1.0.0", 1, "v1.1.0: Add web feature"),
+    ]
+    assert len(seen) == 2 and generate.call_count == 2
+
+    results = workspace.release_notes(repos, "v1.1.0", from_ref="v0.9.0", processes=1)
+    assert all(result["error"].startswith("git: ") and result["commit_count"] == 0 for result in results)